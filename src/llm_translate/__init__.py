@@ -2,29 +2,38 @@
 LLM 多语言翻译基准测试工具
 
 支持一次 API 调用同时翻译到多个语言，并使用 LLM 评估翻译质量。
+
+公开接口按需导入（PEP 562）：``import llm_translate`` 不会加载 httpx，
+首次访问 ``llm_translate.multi_translate`` 等属性时才导入对应模块。
 """
 
-from llm_translate.translator import (
-    multi_translate,
-    evaluate_translations,
-    MultiTranslateResult,
-    TranslationScore,
-    EvaluationResult,
-)
-from llm_translate.config import (
-    EU_LANGUAGES,
-    DEFAULT_TARGET_LANGS,
-    AVAILABLE_MODELS,
-)
+import importlib
 
 __version__ = "1.0.0"
-__all__ = [
-    "multi_translate",
-    "evaluate_translations",
-    "MultiTranslateResult",
-    "TranslationScore",
-    "EvaluationResult",
-    "EU_LANGUAGES",
-    "DEFAULT_TARGET_LANGS",
-    "AVAILABLE_MODELS",
-]
+
+# 公开名称 -> 所在模块
+_LAZY_EXPORTS = {
+    "multi_translate": "llm_translate.translator",
+    "evaluate_translations": "llm_translate.translator",
+    "MultiTranslateResult": "llm_translate.translator",
+    "TranslationScore": "llm_translate.translator",
+    "EvaluationResult": "llm_translate.translator",
+    "EU_LANGUAGES": "llm_translate.config",
+    "DEFAULT_TARGET_LANGS": "llm_translate.config",
+    "AVAILABLE_MODELS": "llm_translate.config",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value  # 之后的访问不再经过 __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
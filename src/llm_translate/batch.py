@@ -0,0 +1,510 @@
+"""
+批处理任务模块 - 以异步 batch 接口提交 multi_translate 工作负载
+
+流程（OpenAI batch 格式）::
+
+    build_batch_requests   文本按 chunk_size 分组，每组一个 /v1/chat/completions 请求体
+    write_batch_input      写出输入 JSONL，每行 {custom_id, method, url, body}
+    provider.submit        上传并创建任务，返回 BatchJob
+    provider.poll          查询状态 (validating / in_progress / completed / failed / expired / cancelled)
+    provider.download      下载输出 JSONL，每行 {custom_id, response: {status_code, body}, error}
+    parse_batch_output     按 custom_id 映射回 MultiTranslateResult（与同步调用相同的解析与校验）
+
+BatchProvider 定义 submit / poll / download 接口：
+- GatewayBatchProvider  经 LiteLLM 网关的 /v1/files 与 /v1/batches
+- LocalBatchProvider    本地文件实现：任务目录里记录状态，轮询时由后台线程执行请求（经过录制带，
+                        配合 --replay 可完全离线）；进程退出后，下一次 poll 从未完成的请求继续
+"""
+
+import json
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from llm_translate.cassette import _truncate_partial_line
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# 任务目录中的文件
+INPUT_FILE = "input.jsonl"
+OUTPUT_FILE = "output.jsonl"
+ERROR_FILE = "errors.jsonl"
+META_FILE = "meta.json"
+STATE_FILE = "batch.json"
+
+
+@dataclass(slots=True)
+class BatchRequest:
+    """批处理输入中的一个请求（一组文本 × 全部目标语言）"""
+    custom_id: str
+    texts: List[str]
+    source_lang: str
+    target_langs: List[str]
+    model: str
+    body: dict = field(repr=False)
+    protocol: str = "json"  # 响应协议（见 protocols 模块）
+
+    def to_line(self) -> dict:
+        return {"custom_id": self.custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": self.body}
+
+    def meta(self) -> dict:
+        return {
+            "custom_id": self.custom_id,
+            "texts": self.texts,
+            "source_lang": self.source_lang,
+            "target_langs": self.target_langs,
+            "model": self.model,
+            "protocol": self.protocol,
+        }
+
+
+@dataclass(slots=True)
+class BatchJob:
+    """批处理任务状态"""
+    id: str
+    status: str
+    output_file_id: Optional[str] = None
+    error_file_id: Optional[str] = None
+    request_counts: Dict[str, int] = field(default_factory=dict)
+    created_at: Optional[float] = None
+    completed_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BatchJob":
+        return cls(
+            id=data["id"],
+            status=data["status"],
+            output_file_id=data.get("output_file_id"),
+            error_file_id=data.get("error_file_id"),
+            request_counts=data.get("request_counts") or {},
+            created_at=data.get("created_at"),
+            completed_at=data.get("completed_at"),
+        )
+
+
+def build_batch_requests(
+    texts: List[str],
+    source_lang: str = "en",
+    target_langs: Optional[List[str]] = None,
+    model: str = "gemini-2.5-flash-lite",
+    chunk_size: int = 20,
+    glossary: Optional[str] = None,
+    translate_prompt: Optional[str] = None,
+    temperature: float = 0.3,
+    max_tokens: int = 4096,
+    glossary_format: str = "table",
+) -> List[BatchRequest]:
+    """文本分组并构建请求体（提示词与同步 multi_translate 完全一致）"""
+    from llm_translate.translator import _build_translate_prompt, _chat_payload, get_translate_protocol
+
+    target_langs = target_langs or ["de", "fr", "es", "it", "pt", "nl", "pl"]
+    protocol = get_translate_protocol(translate_prompt)
+    requests = []
+    for start in range(0, len(texts), chunk_size):
+        chunk = list(texts[start:start + chunk_size])
+        system_prompt, user_prompt, _ = _build_translate_prompt(
+            chunk, source_lang, target_langs, glossary=glossary, prompt_template=translate_prompt,
+            glossary_format=glossary_format,
+        )
+        requests.append(BatchRequest(
+            custom_id=f"req-{len(requests)}",
+            texts=chunk,
+            source_lang=source_lang,
+            target_langs=target_langs,
+            model=model,
+            body=_chat_payload(user_prompt, model, system_prompt, temperature, max_tokens),
+            protocol=protocol,
+        ))
+    return requests
+
+
+def write_batch_input(requests: List[BatchRequest], path) -> Path:
+    """写出 OpenAI batch 输入 JSONL"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for request in requests:
+            f.write(json.dumps(request.to_line(), ensure_ascii=False) + "\n")
+    return path
+
+
+def _read_jsonl(path) -> List[dict]:
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        # 中断写入留下的半行不计入
+        return [json.loads(line) for line in f if line.endswith("\n") and line.strip()]
+
+
+def parse_batch_output(
+    requests: List[BatchRequest],
+    output_path,
+    error_path=None,
+    latency_ms: float = 0.0,
+) -> list:
+    """输出/错误 JSONL -> 与 requests 同序的 MultiTranslateResult 列表
+
+    Args:
+        requests: 提交时的请求
+        output_path: 输出 JSONL（全部失败时可为 None）
+        error_path: 错误 JSONL（可选）
+        latency_ms: 写入每个结果的延迟（批处理没有单请求延迟，通常为提交到下载的总耗时）
+    """
+    from llm_translate.protocols import ProtocolError
+    from llm_translate.translator import MultiTranslateResult, _parse_response
+    from llm_translate.validate import validate_translations
+
+    lines = {}
+    for item in [item for path in (output_path, error_path) if path for item in _read_jsonl(path)]:
+        lines.setdefault(item["custom_id"], item)
+
+    results = []
+    for request in requests:
+        item = lines.get(request.custom_id)
+        base = dict(
+            source_texts=request.texts,
+            source_lang=request.source_lang,
+            translations={},
+            model=request.model,
+            latency_ms=latency_ms,
+            prompt_tokens=0,
+            completion_tokens=0,
+            total_tokens=0,
+            success=False,
+        )
+        if item is None:
+            results.append(MultiTranslateResult(**base, error="批处理输出中没有该请求", error_type="error"))
+            continue
+        response = item.get("response") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            error = item.get("error") or {}
+            message = error.get("message") or f"HTTP {response.get('status_code')}"
+            results.append(MultiTranslateResult(**base, error=message, error_type="http_error"))
+            continue
+
+        body = response["body"]
+        usage = body.get("usage") or {}
+        base.update(
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+            total_tokens=usage.get("total_tokens", 0),
+        )
+        try:
+            translations = _parse_response(
+                body["choices"][0]["message"]["content"].strip(),
+                request.protocol, request.target_langs, len(request.texts),
+            )
+        except (json.JSONDecodeError, ProtocolError) as e:
+            name = "JSON" if request.protocol == "json" else request.protocol
+            results.append(MultiTranslateResult(**base, error=f"{name} 解析失败: {e}", error_type="parse_error"))
+            continue
+        issues = validate_translations(request.texts, translations, request.target_langs)
+        base.update(translations=translations, success=True)
+        results.append(MultiTranslateResult(**base, invalid_cells=issues, unresolved_cells=issues))
+    return results
+
+
+class BatchProvider:
+    """批处理接口"""
+
+    name = "base"
+
+    def submit(self, input_path, metadata: Optional[dict] = None) -> BatchJob:
+        """上传输入文件并创建任务"""
+        raise NotImplementedError
+
+    def poll(self, batch_id: str) -> BatchJob:
+        """查询任务状态"""
+        raise NotImplementedError
+
+    def download(self, job: BatchJob, dest_dir) -> tuple:
+        """下载输出/错误文件到 dest_dir，返回 (输出路径, 错误路径或 None)"""
+        raise NotImplementedError
+
+
+class GatewayBatchProvider(BatchProvider):
+    """经 LiteLLM 网关的 OpenAI 兼容批处理接口 (/v1/files, /v1/batches)"""
+
+    name = "gateway"
+
+    def __init__(self, base_url: Optional[str] = None, api_key: Optional[str] = None, timeout: float = 120.0):
+        from llm_translate.config import API_BASE_URL, API_KEY
+
+        self.base_url = base_url or API_BASE_URL
+        self.api_key = api_key or API_KEY
+        self.timeout = timeout
+
+    def _client(self):
+        import httpx
+
+        return httpx.Client(
+            base_url=self.base_url,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            timeout=self.timeout,
+        )
+
+    def submit(self, input_path, metadata: Optional[dict] = None) -> BatchJob:
+        with self._client() as client, open(input_path, "rb") as f:
+            response = client.post(
+                "/v1/files",
+                data={"purpose": "batch"},
+                files={"file": (Path(input_path).name, f, "application/jsonl")},
+            )
+            response.raise_for_status()
+            response = client.post("/v1/batches", json={
+                "input_file_id": response.json()["id"],
+                "endpoint": BATCH_ENDPOINT,
+                "completion_window": COMPLETION_WINDOW,
+                "metadata": metadata or {},
+            })
+            response.raise_for_status()
+        return BatchJob.from_dict(response.json())
+
+    def poll(self, batch_id: str) -> BatchJob:
+        with self._client() as client:
+            response = client.get(f"/v1/batches/{batch_id}")
+            response.raise_for_status()
+        return BatchJob.from_dict(response.json())
+
+    def download(self, job: BatchJob, dest_dir) -> tuple:
+        dest_dir = Path(dest_dir)
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        paths = []
+        with self._client() as client:
+            for file_id, name in ((job.output_file_id, OUTPUT_FILE), (job.error_file_id, ERROR_FILE)):
+                if not file_id:
+                    paths.append(None)
+                    continue
+                response = client.get(f"/v1/files/{file_id}/content")
+                response.raise_for_status()
+                path = dest_dir / name
+                path.write_bytes(response.content)
+                paths.append(path)
+        return paths[0], paths[1]
+
+
+class LocalBatchProvider(BatchProvider):
+    """本地文件实现的批处理：与网关相同的 submit / poll / download 约定
+
+    每个任务一个目录 <root>/<batch_id>/，包含输入、状态 (batch.json)、输出与错误 JSONL。
+    submit 只登记任务；poll 时在后台线程执行请求（translator._send_chat，经过录制带），
+    concurrency 个并发。输出按行追加，进程中断后下一次 poll 跳过已有输出的请求继续执行。
+
+    Args:
+        root: 任务目录的根目录
+        concurrency: 执行请求的并发数
+    """
+
+    name = "local"
+
+    def __init__(self, root="results/batch_local", concurrency: int = 4):
+        self.root = Path(root)
+        self.concurrency = concurrency
+        self._lock = threading.Lock()
+        self._running: Dict[str, threading.Thread] = {}
+
+    def _dir(self, batch_id: str) -> Path:
+        return self.root / batch_id
+
+    def _read_state(self, batch_id: str) -> dict:
+        path = self._dir(batch_id) / STATE_FILE
+        if not path.exists():
+            raise KeyError(f"批处理任务不存在: {batch_id}")
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _write_state(self, state: dict) -> None:
+        path = self._dir(state["id"]) / STATE_FILE
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp.replace(path)
+
+    def submit(self, input_path, metadata: Optional[dict] = None) -> BatchJob:
+        batch_id = f"batch_{uuid.uuid4().hex[:16]}"
+        job_dir = self._dir(batch_id)
+        job_dir.mkdir(parents=True)
+        shutil.copyfile(input_path, job_dir / INPUT_FILE)
+        total = len(_read_jsonl(job_dir / INPUT_FILE))
+        state = {
+            "id": batch_id,
+            "status": "in_progress",
+            "endpoint": BATCH_ENDPOINT,
+            "completion_window": COMPLETION_WINDOW,
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": total, "completed": 0, "failed": 0},
+            "created_at": time.time(),
+            "completed_at": None,
+            "metadata": metadata or {},
+        }
+        self._write_state(state)
+        return BatchJob.from_dict(state)
+
+    def _start(self, batch_id: str) -> None:
+        with self._lock:
+            thread = self._running.get(batch_id)
+            if thread is not None and thread.is_alive():
+                return
+            thread = threading.Thread(target=self._process, args=(batch_id,), daemon=True)
+            self._running[batch_id] = thread
+            thread.start()
+
+    def _process(self, batch_id: str) -> None:
+        """执行尚无输出的请求，全部完成后标记 completed"""
+        from llm_translate.translator import _send_chat
+
+        job_dir = self._dir(batch_id)
+        for name in (OUTPUT_FILE, ERROR_FILE):
+            if (job_dir / name).exists():
+                _truncate_partial_line(job_dir / name)
+        done = {item["custom_id"] for item in _read_jsonl(job_dir / OUTPUT_FILE)}
+        done |= {item["custom_id"] for item in _read_jsonl(job_dir / ERROR_FILE)}
+        pending = [line for line in _read_jsonl(job_dir / INPUT_FILE) if line["custom_id"] not in done]
+        write_lock = threading.Lock()
+
+        def run(line: dict) -> None:
+            item = {"id": f"batch_req_{uuid.uuid4().hex[:16]}", "custom_id": line["custom_id"]}
+            try:
+                body, _ = _send_chat(line["body"])
+                item.update(response={"status_code": 200, "request_id": item["id"], "body": body}, error=None)
+                name = OUTPUT_FILE
+            except Exception as e:
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                item.update(
+                    response={"status_code": status, "request_id": item["id"], "body": None} if status else None,
+                    error={"code": type(e).__name__, "message": str(e) or type(e).__name__},
+                )
+                name = ERROR_FILE
+            with write_lock, open(job_dir / name, "a", encoding="utf-8") as f:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            list(executor.map(run, pending))
+
+        state = self._read_state(batch_id)
+        completed = len(_read_jsonl(job_dir / OUTPUT_FILE))
+        failed = len(_read_jsonl(job_dir / ERROR_FILE))
+        state.update(
+            status="completed",
+            output_file_id=OUTPUT_FILE if completed else None,
+            error_file_id=ERROR_FILE if failed else None,
+            completed_at=time.time(),
+        )
+        state["request_counts"].update(completed=completed, failed=failed)
+        self._write_state(state)
+
+    def poll(self, batch_id: str) -> BatchJob:
+        state = self._read_state(batch_id)
+        if state["status"] == "in_progress":
+            # 由轮询驱动执行：本进程尚未在处理该任务时启动后台线程（跳过已有输出的请求）
+            self._start(batch_id)
+            job_dir = self._dir(batch_id)
+            state["request_counts"].update(
+                completed=len(_read_jsonl(job_dir / OUTPUT_FILE)),
+                failed=len(_read_jsonl(job_dir / ERROR_FILE)),
+            )
+        return BatchJob.from_dict(state)
+
+    def download(self, job: BatchJob, dest_dir) -> tuple:
+        dest_dir = Path(dest_dir)
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for file_id in (job.output_file_id, job.error_file_id):
+            if not file_id:
+                paths.append(None)
+                continue
+            path = dest_dir / file_id
+            shutil.copyfile(self._dir(job.id) / file_id, path)
+            paths.append(path)
+        return paths[0], paths[1]
+
+
+def get_provider(name: str, **kwargs) -> BatchProvider:
+    """按名称创建批处理后端 (gateway / local)"""
+    if name == "gateway":
+        return GatewayBatchProvider(**kwargs)
+    if name == "local":
+        return LocalBatchProvider(**kwargs)
+    raise ValueError(f"未知批处理后端: {name}")
+
+
+def save_meta(work_dir, job: BatchJob, provider: str, requests: List[BatchRequest]) -> Path:
+    """保存任务元数据（custom_id -> 原文与语言），供之后 fetch 映射结果"""
+    path = Path(work_dir) / META_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        "batch_id": job.id,
+        "provider": provider,
+        "submitted_at": time.time(),
+        "requests": [r.meta() for r in requests],
+    }, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def load_meta(work_dir) -> tuple:
+    """读取任务元数据，返回 (元数据 dict, [BatchRequest])（请求体不保存，body 为空）"""
+    meta = json.loads((Path(work_dir) / META_FILE).read_text(encoding="utf-8"))
+    requests = [BatchRequest(body={}, **r) for r in meta["requests"]]
+    return meta, requests
+
+
+def wait_for_batch(provider: BatchProvider, batch_id: str, poll_interval: float = 30.0,
+                   timeout: Optional[float] = None, on_poll=None) -> BatchJob:
+    """轮询直到任务结束（completed / failed / expired / cancelled）
+
+    Raises:
+        TimeoutError: 超过 timeout 秒仍未结束
+    """
+    start = time.monotonic()
+    while True:
+        job = provider.poll(batch_id)
+        if on_poll is not None:
+            on_poll(job)
+        if job.done:
+            return job
+        if timeout is not None and time.monotonic() - start > timeout:
+            raise TimeoutError(f"批处理任务 {batch_id} 在 {timeout:.0f}s 内未完成 (状态: {job.status})")
+        time.sleep(poll_interval)
+
+
+def batch_translate(
+    texts: List[str],
+    provider: BatchProvider,
+    work_dir="results/batches",
+    source_lang: str = "en",
+    target_langs: Optional[List[str]] = None,
+    model: str = "gemini-2.5-flash-lite",
+    chunk_size: int = 20,
+    glossary: Optional[str] = None,
+    translate_prompt: Optional[str] = None,
+    poll_interval: float = 30.0,
+    timeout: Optional[float] = None,
+    glossary_format: str = "table",
+) -> list:
+    """提交批处理任务、等待完成并返回与分组同序的 MultiTranslateResult 列表"""
+    requests = build_batch_requests(
+        texts, source_lang, target_langs, model, chunk_size, glossary, translate_prompt,
+        glossary_format=glossary_format,
+    )
+    start = time.perf_counter()
+    input_path = write_batch_input(requests, Path(work_dir) / f"pending_{uuid.uuid4().hex[:8]}.jsonl")
+    job = provider.submit(input_path)
+    job_dir = Path(work_dir) / job.id
+    save_meta(job_dir, job, provider.name, requests)
+    input_path.replace(job_dir / INPUT_FILE)
+
+    job = wait_for_batch(provider, job.id, poll_interval, timeout)
+    output_path, error_path = provider.download(job, job_dir)
+    latency_ms = (time.perf_counter() - start) * 1000
+    return parse_batch_output(requests, output_path, error_path, latency_ms)
@@ -0,0 +1,221 @@
+"""
+HTTP 录制/回放模块 - 保存 /v1/chat/completions 的请求与响应，离线复现基准测试
+
+目录结构::
+
+    cassettes/run1/
+        exchanges.jsonl   追加写的数据文件，每行一次交互 {key, model, status, body, latency_ms, recorded_at}
+        index.tsv         追加写的索引，每行 "key\\toffset\\tlength"
+
+请求按规范化 JSON（排序键、去掉认证头）的 sha256 作为键。回放时只把索引载入内存，
+按偏移用 os.pread 读取单条记录（不持锁、不读整个数据文件），几十万条交互也能快速打开；
+没有 os.pread 的平台（Windows）在锁内 seek + read。
+索引缺失或落后于数据文件（录制中断）时从数据文件尾部补建。
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+DATA_FILE = "exchanges.jsonl"
+INDEX_FILE = "index.tsv"
+
+
+class CassetteMiss(KeyError):
+    """回放时找不到对应的录制"""
+
+
+def request_hash(payload: dict) -> str:
+    """请求的规范化哈希"""
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _truncate_partial_line(path: Path) -> None:
+    """录制中断时数据文件可能以半行结尾，截掉后再追加"""
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        block = 1 << 16
+        pos = size
+        while pos > 0:
+            start = max(0, pos - block)
+            f.seek(start)
+            chunk = f.read(pos - start)
+            nl = chunk.rfind(b"\n")
+            if nl >= 0:
+                f.truncate(start + nl + 1)
+                return
+            pos = start
+        f.truncate(0)
+
+
+class Cassette:
+    """一盘录制带
+
+    Args:
+        path: 目录
+        mode: "record" 录制（真实请求并追加保存）或 "replay" 回放（不访问网络）
+        latency: 回放延迟，"recorded" 按录制时的延迟等待，"zero" 立即返回
+    """
+
+    def __init__(self, path, mode: str = "replay", latency: str = "recorded"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"未知模式: {mode}")
+        if latency not in ("recorded", "zero"):
+            raise ValueError(f"未知回放延迟: {latency}")
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self.recorded = 0
+        self.hits = 0
+        self.misses = 0
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        data_path = self.path / DATA_FILE
+        data_path.touch(exist_ok=True)
+        if mode == "record":
+            _truncate_partial_line(data_path)
+        self._load_index()
+        if mode == "record":
+            self._data = open(data_path, "ab")
+            self._index_file = open(self.path / INDEX_FILE, "a", encoding="utf-8")
+            self._reader = None
+        else:
+            self._data = self._index_file = None
+            self._reader = open(data_path, "rb")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _load_index(self) -> None:
+        """载入索引；索引落后于数据文件时扫描剩余部分补齐"""
+        indexed_end = 0
+        index_path = self.path / INDEX_FILE
+        if index_path.exists():
+            with open(index_path, "rb+") as f:
+                # 截掉中断写入留下的半行，之后的追加从完整行开始
+                raw = f.read()
+                end = raw.rfind(b"\n") + 1
+                if end < len(raw):
+                    f.truncate(end)
+            for line in raw[:end].decode("utf-8").splitlines():
+                parts = line.split("\t")
+                if len(parts) != 3:
+                    continue
+                key, offset, length = parts[0], int(parts[1]), int(parts[2])
+                self._index[key] = (offset, length)
+                indexed_end = max(indexed_end, offset + length)
+
+        data_path = self.path / DATA_FILE
+        if data_path.stat().st_size <= indexed_end:
+            return
+        rebuilt = []
+        with open(data_path, "rb") as f:
+            f.seek(indexed_end)
+            offset = indexed_end
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # 中断写入留下的半行
+                try:
+                    key = json.loads(line)["key"]
+                except (ValueError, KeyError):
+                    offset += len(line)
+                    continue
+                self._index[key] = (offset, len(line))
+                rebuilt.append(f"{key}\t{offset}\t{len(line)}\n")
+                offset += len(line)
+        if rebuilt:
+            with open(index_path, "a", encoding="utf-8") as f:
+                f.writelines(rebuilt)
+
+    def record(self, payload: dict, status: int, body: str, latency_ms: float) -> None:
+        """追加一次交互（数据先于索引落盘，中断时可由数据文件补建索引）"""
+        key = request_hash(payload)
+        line = (json.dumps({
+            "key": key,
+            "model": payload.get("model"),
+            "status": status,
+            "body": body,
+            "latency_ms": latency_ms,
+            "recorded_at": time.time(),
+        }, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            offset = self._data.tell()
+            self._data.write(line)
+            self._data.flush()
+            self._index_file.write(f"{key}\t{offset}\t{len(line)}\n")
+            self._index_file.flush()
+            self._index[key] = (offset, len(line))
+            self.recorded += 1
+
+    def replay(self, payload: dict) -> Tuple[int, str, float]:
+        """回放一次交互，返回 (HTTP 状态码, 响应体, 延迟ms)
+
+        Raises:
+            CassetteMiss: 没有录制过该请求
+        """
+        key = request_hash(payload)
+        entry = self._index.get(key)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            raise CassetteMiss(f"回放未命中: model={payload.get('model')} key={key[:12]}")
+        offset, length = entry
+        item = json.loads(self._read_at(offset, length))
+        with self._lock:
+            self.hits += 1
+        latency_ms = item.get("latency_ms") or 0.0
+        if self.latency == "recorded":
+            time.sleep(latency_ms / 1000)
+        else:
+            latency_ms = 0.0
+        return item["status"], item["body"], latency_ms
+
+    def _read_at(self, offset: int, length: int) -> bytes:
+        """读取数据文件中的一条记录"""
+        if hasattr(os, "pread"):
+            return os.pread(self._reader.fileno(), length, offset)
+        with self._lock:
+            self._reader.seek(offset)
+            return self._reader.read(length)
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "path": str(self.path),
+            "exchanges": len(self._index),
+            "recorded": self.recorded,
+            "replay_hits": self.hits,
+            "replay_misses": self.misses,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            for f in (self._data, self._index_file, self._reader):
+                if f is not None:
+                    f.close()
+
+
+# 当前生效的录制带（None 表示直接访问网络）
+_cassette: Optional[Cassette] = None
+
+
+def use_cassette(cassette: Optional[Cassette]) -> None:
+    """设置全局录制带（_call_llm 的每次请求都经过它）"""
+    global _cassette
+    _cassette = cassette
+
+
+def get_cassette() -> Optional[Cassette]:
+    return _cassette
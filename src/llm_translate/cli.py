@@ -3,39 +3,111 @@
 """
 
 import argparse
+import functools
 import json
+import math
+import random
 import sys
 import time
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import dataclasses
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
-
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich import box
+from typing import TYPE_CHECKING, List, Optional
 
 from llm_translate.config import (
-    API_KEY,
     EU_LANGUAGES,
     AVAILABLE_MODELS,
     DEFAULT_TARGET_LANGS,
     EVALUATOR_MODEL,
     get_model_short_name,
 )
-from llm_translate.translator import (
-    multi_translate,
-    evaluate_translations,
-    MultiTranslateResult,
-)
 
-console = Console()
+if TYPE_CHECKING:
+    from llm_translate.translator import MultiTranslateResult
+
+# 启动速度：rich、httpx（translator）等较重的依赖都在用到时才导入，
+# 使 `llm-translate --help` / `models` 不必加载它们（见 startup-bench 命令）
+
+
+class _LazyConsole:
+    """首次输出时才创建 rich Console"""
+
+    _console = None
+
+    def __getattr__(self, name):
+        if _LazyConsole._console is None:
+            from rich.console import Console
+
+            _LazyConsole._console = Console()
+        return getattr(_LazyConsole._console, name)
+
+
+console = _LazyConsole()
+
+
+def _maybe_start_metrics(args) -> None:
+    """按需启动指标暴露端点"""
+    port = getattr(args, "metrics_port", None)
+    if port:
+        from llm_translate.metrics import start_metrics_server
+
+        start_metrics_server(port)
+        console.print(f"[dim]指标端点: http://0.0.0.0:{port}/metrics[/dim]")
+
+
+def _maybe_use_cassette(args):
+    """按 --record / --replay 启用 HTTP 录制或回放，返回录制带（未启用为 None）"""
+    record = getattr(args, "record", None)
+    replay = getattr(args, "replay", None)
+    if not record and not replay:
+        return None
+    from llm_translate.cassette import Cassette, use_cassette
+
+    if replay:
+        cassette = Cassette(replay, mode="replay", latency=args.replay_latency)
+        delay = "按录制延迟" if args.replay_latency == "recorded" else "零延迟"
+        console.print(f"[dim]回放: {replay} ({len(cassette)} 次交互, {delay})[/dim]")
+    else:
+        cassette = Cassette(record, mode="record")
+        console.print(f"[dim]录制: {record} (已有 {len(cassette)} 次交互)[/dim]")
+    use_cassette(cassette)
+    return cassette
+
+
+def _finish_cassette(cassette) -> None:
+    """关闭录制带并打印统计"""
+    if cassette is None:
+        return
+    from llm_translate.cassette import use_cassette
+
+    use_cassette(None)
+    cassette.close()
+    st = cassette.stats()
+    if st["mode"] == "record":
+        console.print(f"[dim]录制: 新增 {st['recorded']} 次交互，共 {st['exchanges']} 次 → {st['path']}[/dim]")
+    else:
+        console.print(f"[dim]回放: 命中 {st['replay_hits']} 次，未命中 {st['replay_misses']} 次[/dim]")
+
+
+def _add_cassette_args(parser) -> None:
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", metavar="DIR", help="录制所有 LLM 请求/响应到目录（可重复追加）")
+    group.add_argument("--replay", metavar="DIR", help="从录制目录回放响应，不访问网络、不产生费用")
+    parser.add_argument(
+        "--replay-latency",
+        choices=["recorded", "zero"],
+        default="recorded",
+        help="回放延迟：recorded 按录制时的延迟等待，zero 立即返回 (默认: recorded)"
+    )
 
 
-def print_result(result: MultiTranslateResult):
+def print_result(result: "MultiTranslateResult"):
     """打印翻译结果"""
+    from rich.table import Table
+    from rich.panel import Panel
+    from rich import box
+
     # 显示源文本
     source_display = "\n".join(f"{i+1}. {t}" for i, t in enumerate(result.source_texts))
     console.print(Panel.fit(
@@ -71,14 +143,28 @@ def print_result(result: MultiTranslateResult):
         console.print(table)
         console.print()
 
+    call_desc = f"{result.fanout} 个并行请求" if result.fanout > 1 else "单次 API 调用"
+    if result.unique_texts is not None:
+        call_desc += f" | 去重后 {result.unique_texts} 条唯一"
     console.print(
-        f"[dim]单次 API 调用 | {len(result.source_texts)} 条文本 | 延迟: {result.latency_ms:.0f}ms | "
+        f"[dim]{call_desc} | {len(result.source_texts)} 条文本 | 延迟: {result.latency_ms:.0f}ms | "
         f"Tokens: {result.total_tokens} (输入: {result.prompt_tokens}, 输出: {result.completion_tokens})[/dim]"
     )
+    if result.invalid_cells:
+        console.print(
+            f"[yellow]校验: {len(result.invalid_cells)} 个单元格未通过"
+            + (f"，定向重译 {result.repair_calls} 次" if result.repair_calls else "")
+            + (f"，仍有 {len(result.unresolved_cells)} 个: "
+               + ", ".join(str(c) for c in result.unresolved_cells[:10]) if result.unresolved_cells else "，已全部修复")
+            + "[/yellow]"
+        )
 
 
 def print_evaluation(eval_result, translation_model: str, evaluator_model: str = None):
     """打印评估结果"""
+    from rich.table import Table
+    from rich import box
+
     eval_model_name = get_model_short_name(evaluator_model) if evaluator_model else "Opus 4.5"
     table = Table(
         title=f"翻译质量评分 (评估模型: {eval_model_name})",
@@ -123,6 +209,9 @@ def print_evaluation(eval_result, translation_model: str, evaluator_model: str =
 
 def print_evaluation_multi(eval_result, translation_model: str, evaluator_model: str = None):
     """打印多文本评估结果"""
+    from rich.table import Table
+    from rich import box
+
     eval_model_name = get_model_short_name(evaluator_model) if evaluator_model else "Opus 4.5"
     num_texts = len(eval_result.source_texts)
 
@@ -179,6 +268,10 @@ def print_evaluation_multi(eval_result, translation_model: str, evaluator_model:
 
 def cmd_translate(args):
     """翻译命令"""
+    from rich.panel import Panel
+    from llm_translate.config import API_KEY
+    from llm_translate.translator import evaluate_translations, multi_translate
+
     if args.file:
         text = Path(args.file).read_text(encoding="utf-8").strip()
         texts = [text]
@@ -188,17 +281,20 @@ def cmd_translate(args):
         console.print("[red]错误: 请提供要翻译的文本[/red]")
         return 1
 
-    if not API_KEY:
+    if not API_KEY and not args.replay:
         console.print("[red]错误: 未设置 API_KEY，请在 .env 文件中配置[/red]")
         return 1
 
+    _maybe_start_metrics(args)
+    cassette = _maybe_use_cassette(args)
+
     console.print(Panel.fit("[bold blue]多语言翻译 - 一次 API 调用[/bold blue]", border_style="blue"))
     console.print(f"模型: {args.model}")
     console.print(f"源语言: {args.source}")
     console.print(f"目标语言: {', '.join(args.targets)} ({len(args.targets)}个)")
     console.print(f"文本数量: {len(texts)}")
     if args.glossary:
-        console.print(f"术语表: {args.glossary}")
+        console.print(f"术语表: {args.glossary} ({args.glossary_format})")
     console.print()
 
     console.print("[cyan]正在翻译...[/cyan]")
@@ -208,7 +304,11 @@ def cmd_translate(args):
         target_langs=args.targets,
         model=args.model,
         glossary=args.glossary,
+        glossary_format=args.glossary_format,
         translate_prompt=args.translate_prompt,
+        fanout=args.fanout,
+        dedup=args.dedup,
+        repair=args.repair,
     )
 
     print_result(result)
@@ -232,12 +332,13 @@ def cmd_translate(args):
             json.dump(result.to_dict(), f, ensure_ascii=False, indent=2)
         console.print(f"[green]结果已保存到: {args.output}[/green]")
 
+    _finish_cassette(cassette)
     return 0 if result.success else 1
 
 
-@dataclass
+@dataclass(slots=True)
 class SingleResult:
-    """单个测试结果"""
+    """单个测试结果（slots：百万级结果时每条省去实例 __dict__）"""
     text_type: str
     text: str
     success: bool
@@ -258,6 +359,28 @@ class SingleResult:
     eval_prompt_tokens: Optional[int] = None
     eval_completion_tokens: Optional[int] = None
     eval_total_tokens: Optional[int] = None
+    # 语言 fan-out（与单次调用对比）
+    fanout: Optional[int] = None
+    baseline_latency_ms: Optional[float] = None
+    baseline_total_tokens: Optional[int] = None
+    # 在测试数据中的下标（分片合并时按此排序）
+    text_id: Optional[int] = None
+    # 去重：与之前某条文本相同，结果复用自该条（原下标）
+    dedup_of: Optional[int] = None
+    # 译文校验：未通过的 "lang:reason"（修复前 / 修复后仍未通过），定向重译请求数
+    invalid_cells: Optional[List[str]] = None
+    unresolved_cells: Optional[List[str]] = None
+    repair_calls: int = 0
+    # 修复后仍未通过校验：请求本身成功（计入延迟、tokens 与校验统计），但译文不可用，不评估也不计入成功率
+    validation_failed: bool = False
+    # 连接阶段耗时 ms {connect_ms, tls_ms, send_ms, ttfb_ms, receive_ms}
+    timings: Optional[dict] = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SingleResult":
+        """由 to_dict() 的输出还原（忽略未知键）"""
+        names = {f.name for f in dataclasses.fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
 
     def to_dict(self) -> dict:
         """转换为字典"""
@@ -278,11 +401,688 @@ class SingleResult:
             "eval_prompt_tokens": self.eval_prompt_tokens,
             "eval_completion_tokens": self.eval_completion_tokens,
             "eval_total_tokens": self.eval_total_tokens,
+            "fanout": self.fanout,
+            "baseline_latency_ms": self.baseline_latency_ms,
+            "baseline_total_tokens": self.baseline_total_tokens,
+            "text_id": self.text_id,
+            "dedup_of": self.dedup_of,
+            "invalid_cells": self.invalid_cells,
+            "unresolved_cells": self.unresolved_cells,
+            "repair_calls": self.repair_calls,
+            "validation_failed": self.validation_failed,
+            "timings": self.timings,
         }
 
 
+def _json_default(obj):
+    """json.dump 的 default：序列化时才把 SingleResult 转为 dict"""
+    if isinstance(obj, SingleResult):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# 多个评估模型并发写入同一条结果的 multi_eval
+_eval_record_lock = threading.Lock()
+
+
+def _record_evaluation(
+    single: SingleResult,
+    eval_model: str,
+    is_primary: bool,
+    lang_scores: dict,
+    latency_ms: float,
+    prompt_tokens: int,
+    completion_tokens: int,
+    total_tokens: int,
+    batch_size: int = 1,
+) -> None:
+    """把一个评估模型对单条文本的分数写入结果"""
+    eval_score = sum(lang_scores.values()) / len(lang_scores)
+    eval_lang_scores = {lang: int(v) for lang, v in lang_scores.items()}
+
+    # 存储到多评估结果（包含token信息）
+    entry = {
+        "score": eval_score,
+        "eval_scores": eval_lang_scores,
+        "eval_latency_ms": latency_ms,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": total_tokens,
+    }
+    if batch_size > 1:
+        entry["eval_batch_size"] = batch_size  # 批量评估时 token 为按条均摊值
+    with _eval_record_lock:
+        if single.multi_eval is None:
+            single.multi_eval = {}
+        single.multi_eval[get_model_short_name(eval_model)] = entry
+
+    # 第一个评估模型的结果作为默认（兼容旧格式）
+    if is_primary:
+        single.score = eval_score
+        single.eval_scores = eval_lang_scores
+        single.eval_latency_ms = latency_ms
+        single.eval_prompt_tokens = prompt_tokens
+        single.eval_completion_tokens = completion_tokens
+        single.eval_total_tokens = total_tokens
+
+
+def _record_evaluation_error(single: SingleResult, eval_model: str, error: str) -> None:
+    """记录评估调用异常"""
+    with _eval_record_lock:
+        if single.multi_eval is None:
+            single.multi_eval = {}
+        single.multi_eval[get_model_short_name(eval_model)] = {
+            "score": None,
+            "error": error,
+        }
+
+
+class _EvalBatch:
+    """积累待评估的翻译结果，达到条数或 token 预算后合并为一次评估调用
+
+    Args:
+        max_size: 每批最多条数
+        max_tokens: 每批原文+译文的 token 预算（估算值）
+        flush_fn: 接收 [(SingleResult, 译文), ...] 的评估函数
+    """
+
+    def __init__(self, max_size: int, max_tokens: int, flush_fn):
+        self.max_size = max_size
+        self.max_tokens = max_tokens
+        self.flush_fn = flush_fn
+        self._lock = threading.Lock()
+        self._items = []
+        self._tokens = 0
+
+    def add(self, item) -> list:
+        """加入一条，若凑满一批则评估并返回该批条目"""
+        from llm_translate.translator import estimate_tokens
+
+        single, translations = item
+        tokens = estimate_tokens(single.text) + sum(estimate_tokens(t) for t in translations.values())
+        batch = None
+        with self._lock:
+            self._items.append(item)
+            self._tokens += tokens
+            if len(self._items) >= self.max_size or self._tokens >= self.max_tokens:
+                batch, self._items, self._tokens = self._items, [], 0
+        if batch:
+            self.flush_fn(batch)
+        return batch or []
+
+    def flush(self) -> list:
+        with self._lock:
+            batch, self._items, self._tokens = self._items, [], 0
+        if batch:
+            self.flush_fn(batch)
+        return batch
+
+
+def _run_tournament(
+    models: List[str],
+    all_texts: list,
+    run_models,
+    initial: int = 50,
+    drop_fraction: float = 0.5,
+    max_latency_ms: Optional[float] = None,
+    max_tokens_per_text: Optional[float] = None,
+    evaluator_count: int = 1,
+    eval_batch_size: int = 1,
+):
+    """逐轮减半（successive halving）锦标赛
+
+    每轮让存活模型处理下一段文本（结果与之前轮次累加），
+    先淘汰不满足延迟/Token 约束的模型，再按评分淘汰末尾 drop_fraction，
+    存活者的文本量翻倍，直到只剩一个模型或用完全部文本。
+
+    Returns:
+        (各模型最终汇总列表, 锦标赛报告)
+    """
+    survivors = list(models)
+    latest = {}
+    rounds = []
+    processed = 0
+    size = max(1, initial)
+    round_no = 0
+
+    while survivors:
+        round_no += 1
+        size = min(size, len(all_texts))
+        texts = all_texts[processed:size]
+        console.print(
+            f"\n[bold cyan]第 {round_no} 轮: {len(survivors)} 个模型, "
+            f"文本 {processed + 1}-{size} (累计 {size} 条)[/bold cyan]\n"
+        )
+        for r in run_models(survivors, texts, processed):
+            r["tournament_rounds"] = round_no
+            latest[r["model"]] = r
+        processed = size
+        survivors = [m for m in survivors if m in latest]
+
+        round_info = {"round": round_no, "texts": size, "models": list(survivors), "eliminated": []}
+        rounds.append(round_info)
+        if size >= len(all_texts) or len(survivors) <= 1:
+            break
+
+        # 先按约束淘汰
+        kept = []
+        for m in survivors:
+            r = latest[m]
+            reason = None
+            if max_latency_ms is not None and r["avg_latency_ms"] > max_latency_ms:
+                reason = f"延迟 {r['avg_latency_ms']:.0f}ms > {max_latency_ms:.0f}ms"
+            elif max_tokens_per_text is not None and (r.get("avg_total_tokens") or 0) > max_tokens_per_text:
+                reason = f"Tokens {r['avg_total_tokens']:.0f} > {max_tokens_per_text:.0f}"
+            if reason:
+                round_info["eliminated"].append({"model": m, "score": r["overall_avg_score"], "reason": reason})
+            else:
+                kept.append(m)
+
+        # 再按评分淘汰末尾
+        kept.sort(key=lambda m: latest[m]["overall_avg_score"] or 0, reverse=True)
+        keep_count = max(1, math.ceil(len(kept) * (1 - drop_fraction)))
+        for m in kept[keep_count:]:
+            round_info["eliminated"].append({
+                "model": m,
+                "score": latest[m]["overall_avg_score"],
+                "reason": "评分排名靠后",
+            })
+        survivors = kept[:keep_count]
+        if len(survivors) <= 1:
+            break
+        size *= 2
+
+    # 节省的请求数：全量需要 模型数 × 文本数 次翻译（及对应评估）
+    full = len(models) * len(all_texts)
+    done = sum(len(r["details"]) for r in latest.values())
+    # 评估是批量的：按实际每条文本摊到的评估调用数估算，没有评估数据时按批大小
+    eval_calls = sum(r.get("eval_calls", 0) for r in latest.values())
+    if eval_calls and done:
+        eval_per_text = eval_calls / done
+    else:
+        eval_per_text = evaluator_count / max(eval_batch_size, 1)
+    report = {
+        "rounds": rounds,
+        "winner": survivors[0] if len(survivors) == 1 else None,
+        "translate_requests": done,
+        "translate_requests_full": full,
+        "translate_requests_saved": full - done,
+        "eval_requests": eval_calls,
+        "eval_requests_saved": round((full - done) * eval_per_text),
+    }
+    return list(latest.values()), report
+
+
+def print_benchmark_table(results: List[dict], evaluator_models: List[str]):
+    """打印各模型的评分/延迟/成功率表格（results 已排序）"""
+    from rich.table import Table
+    from rich import box
+
+    # 获取评估模型短名称列表
+    eval_model_names = [get_model_short_name(m) for m in evaluator_models]
+    multi_eval_mode = len(evaluator_models) > 1
+
+    table = Table(
+        title="\n电商翻译全模型测试结果",
+        box=box.ROUNDED,
+        show_header=True,
+        header_style="bold magenta"
+    )
+    table.add_column("排名", justify="center", width=4)
+    table.add_column("模型", style="bold", width=20)
+
+    if multi_eval_mode:
+        # 多评估模型：为每个评估模型添加一列
+        for eval_name in eval_model_names:
+            # 简化名称
+            short_name = eval_name.replace("Gemini ", "G").replace("Claude ", "C").replace(" Flash", "F").replace(" Lite", "L").replace(" Pro", "P")
+            table.add_column(short_name, justify="center", width=10)
+    else:
+        table.add_column("标题评分", justify="center", width=10)
+        table.add_column("描述评分", justify="center", width=10)
+        table.add_column("总评分", justify="center", width=10)
+
+    table.add_column("平均延迟", justify="center", width=10)
+    table.add_column("成功率", justify="center", width=8)
+
+    def ci_fmt(r):
+        """抽样评估时在总评分后显示置信区间半宽"""
+        ci = r.get("overall_ci")
+        if not ci:
+            return ""
+        return f" [dim]±{(ci[1] - ci[0]) / 2:.1f}[/dim]"
+
+    def score_fmt(s):
+        if s is None:
+            return "[dim]N/A[/dim]"
+        color = "green" if s >= 90 else "yellow" if s >= 80 else "red"
+        return f"[{color}]{s:.1f}[/]"
+
+    for i, r in enumerate(results, 1):
+        rank = f"🏆{i}" if i == 1 else f"  {i}"
+
+        if multi_eval_mode:
+            # 多评估模型：显示每个评估模型的分数
+            row = [rank, r["model_short"]]
+            for eval_name in eval_model_names:
+                score = r.get("multi_eval_scores", {}).get(eval_name)
+                row.append(score_fmt(score))
+            row.append(f"{r['avg_latency_ms']:.0f}ms")
+            row.append(r["success_rate"])
+            table.add_row(*row)
+        else:
+            table.add_row(
+                rank,
+                r["model_short"],
+                score_fmt(r["title_avg_score"]),
+                score_fmt(r["desc_avg_score"]),
+                f"[bold]{score_fmt(r['overall_avg_score'])}[/bold]{ci_fmt(r)}",
+                f"{r['avg_latency_ms']:.0f}ms",
+                r["success_rate"],
+            )
+
+    console.print(table)
+
+
+def print_tournament(report: dict):
+    """打印锦标赛各轮淘汰情况"""
+    from rich.table import Table
+    from rich import box
+
+    table = Table(
+        title="\n锦标赛淘汰记录",
+        box=box.ROUNDED,
+        show_header=True,
+        header_style="bold magenta"
+    )
+    table.add_column("轮次", justify="center", width=4)
+    table.add_column("文本数", justify="center", width=6)
+    table.add_column("淘汰模型", width=24)
+    table.add_column("评分", justify="center", width=6)
+    table.add_column("原因", width=24)
+
+    for rnd in report["rounds"]:
+        if not rnd["eliminated"]:
+            table.add_row(str(rnd["round"]), str(rnd["texts"]), f"[dim]({len(rnd['models'])} 个存活)[/dim]", "", "")
+        for e in rnd["eliminated"]:
+            score = f"{e['score']:.1f}" if e["score"] is not None else "N/A"
+            table.add_row(str(rnd["round"]), str(rnd["texts"]), get_model_short_name(e["model"]), score, e["reason"])
+
+    console.print(table)
+    saved = report["translate_requests_saved"]
+    full = report["translate_requests_full"]
+    console.print(
+        f"[dim]锦标赛: 翻译请求 {report['translate_requests']}/{full}，节省 {saved} 次"
+        f"（评估请求节省 {report['eval_requests_saved']} 次）[/dim]"
+    )
+
+
+def _aggregate_results(
+    model: str,
+    results: List[SingleResult],
+    evaluator_models: List[str],
+    target_langs: List[str],
+    total_time: float,
+    dedup: bool = False,
+    fanout: bool = False,
+) -> dict:
+    """由逐条结果计算一个模型的汇总（评分、延迟、tokens、成功率、校验等），details 为结果本身
+
+    单进程测试与分片合并 (merge) 共用，保证两者的汇总口径一致。
+    """
+    # 成功 = 请求成功且译文通过校验（与参与评分的结果一致）；校验失败的单独计数
+    success_count = sum(1 for r in results if r.success and not r.validation_failed)
+    validation_failed = sum(1 for r in results if r.validation_failed)
+    title_scores = [r.score for r in results if r.text_type == "title" and r.score]
+    desc_scores = [r.score for r in results if r.text_type == "description" and r.score]
+    all_scores = [r.score for r in results if r.score]
+    # 延迟和 token 只统计实际请求过的文本（去重回填的不重复计入）
+    ok_results = [r for r in results if r.success and r.dedup_of is None]
+    latencies = [r.latency_ms for r in ok_results]
+
+    # 计算各评估模型的平均分
+    multi_eval_scores = {}
+    for eval_model_short in [get_model_short_name(m) for m in evaluator_models]:
+        scores_for_eval = []
+        for r in results:
+            if r.multi_eval and eval_model_short in r.multi_eval:
+                s = r.multi_eval[eval_model_short].get("score")
+                if s is not None:
+                    scores_for_eval.append(s)
+        if scores_for_eval:
+            multi_eval_scores[eval_model_short] = sum(scores_for_eval) / len(scores_for_eval)
+
+    summary = {
+        "model": model,
+        "model_short": get_model_short_name(model),
+        "title_avg_score": sum(title_scores) / len(title_scores) if title_scores else None,
+        "desc_avg_score": sum(desc_scores) / len(desc_scores) if desc_scores else None,
+        "overall_avg_score": sum(all_scores) / len(all_scores) if all_scores else None,
+        "avg_latency_ms": sum(latencies) / len(latencies) if latencies else 0,
+        "avg_total_tokens": sum(r.total_tokens or 0 for r in ok_results) / len(ok_results) if ok_results else 0,
+        "avg_prompt_tokens": sum(r.prompt_tokens or 0 for r in ok_results) / len(ok_results) if ok_results else 0,
+        "avg_completion_tokens": (
+            sum(r.completion_tokens or 0 for r in ok_results) / len(ok_results) if ok_results else 0
+        ),
+        "success_rate": f"{success_count}/{len(results)}",
+        "validation_failed": validation_failed,
+        "total_time_s": total_time,
+        # 多评估模型分数
+        "multi_eval_scores": multi_eval_scores,
+        # 详细结果
+        "details": results,  # 保存时才逐条转 dict（见 _json_default），不常驻第二份副本
+    }
+    if dedup:
+        unique = sum(1 for r in results if r.dedup_of is None)
+        summary["dedup"] = {
+            "texts": len(results),
+            "unique": unique,
+            "dedup_ratio": 1 - unique / len(results) if results else 0.0,
+        }
+    summary["validation"] = _summarize_validation(
+        [r for r in results if r.dedup_of is None], len(target_langs),
+    )
+    phases = _summarize_phases(ok_results)
+    if phases:
+        summary["phase_timings"] = phases
+    if fanout:
+        summary["fanout"] = _summarize_fanout(results)
+    return summary
+
+
+def _cell_labels(issues) -> Optional[List[str]]:
+    """单文本结果的问题单元格 -> ["lang:reason", ...]（无问题为 None）"""
+    return [f"{issue.lang}:{issue.reason}" for issue in issues] if issues else None
+
+
+def _flag_unresolved(single: SingleResult) -> None:
+    """仍未通过校验的结果标记为 validation_failed（不再评估，也不计入成功率）"""
+    if single.success and single.unresolved_cells and not single.error:
+        single.validation_failed = True
+        single.error = f"译文校验未通过: {', '.join(single.unresolved_cells)}"
+
+
+def _repair_single(single: SingleResult, target_langs: List[str], model: str, **kwargs) -> None:
+    """对单文本结果中未通过校验的语言定向重译，原地更新译文、tokens 与延迟"""
+    from llm_translate.translator import repair_translations
+    from llm_translate.validate import CellIssue
+
+    issues = []
+    for label in single.unresolved_cells:
+        lang, reason = label.split(":", 1)
+        issues.append(CellIssue(lang, 0, reason))
+    current = single.translations or {}
+    repaired = repair_translations(
+        [single.text], {lang: [current.get(lang, "")] for lang in target_langs},
+        issues, "en", target_langs, model, **kwargs,
+    )
+    single.translations = {lang: values[0] for lang, values in repaired.translations.items()}
+    single.unresolved_cells = _cell_labels(repaired.unresolved_cells)
+    single.repair_calls += repaired.repair_calls
+    single.latency_ms += repaired.latency_ms
+    single.prompt_tokens = (single.prompt_tokens or 0) + repaired.prompt_tokens
+    single.completion_tokens = (single.completion_tokens or 0) + repaired.completion_tokens
+    single.total_tokens = (single.total_tokens or 0) + repaired.total_tokens
+
+
+def _summarize_validation(results: List[SingleResult], lang_count: int) -> dict:
+    """汇总译文校验：问题单元格占比、按原因计数、定向重译次数与修复后剩余"""
+    ok = [r for r in results if r.success]
+    cells = len(ok) * lang_count
+    by_reason: dict = {}
+    invalid = unresolved = 0
+    for r in ok:
+        invalid += len(r.invalid_cells or ())
+        unresolved += len(r.unresolved_cells or ())
+        for label in r.invalid_cells or ():
+            reason = label.split(":", 1)[1]
+            by_reason[reason] = by_reason.get(reason, 0) + 1
+    return {
+        "cells": cells,
+        "invalid_cells": invalid,
+        "failure_rate": invalid / cells if cells else 0.0,
+        "invalid_texts": sum(1 for r in ok if r.invalid_cells),
+        "by_reason": by_reason,
+        "repair_calls": sum(r.repair_calls for r in ok),
+        "unresolved_cells": unresolved,
+        "unresolved_rate": unresolved / cells if cells else 0.0,
+    }
+
+
+def _summarize_phases(results: List[SingleResult]) -> dict:
+    """汇总连接阶段耗时：各阶段平均与 p95 (ms)，用于区分网络、网关与模型本身的变慢"""
+    timed = [r.timings for r in results if r.timings]
+    if not timed:
+        return {}
+    summary = {"requests": len(timed)}
+    for phase in ("connect_ms", "tls_ms", "send_ms", "ttfb_ms", "receive_ms"):
+        values = sorted(t[phase] for t in timed if phase in t)
+        if values:
+            summary[phase] = {
+                "avg": sum(values) / len(values),
+                "p95": values[min(len(values) - 1, math.ceil(0.95 * len(values)) - 1)],
+            }
+    return summary
+
+
+def _summarize_fanout(results: List[SingleResult]) -> dict:
+    """汇总 fan-out 与单次调用的延迟 / token 对比"""
+    ok = [r for r in results if r.success]
+    paired = [r for r in ok if r.baseline_latency_ms is not None]
+
+    def avg(values):
+        values = [v for v in values if v is not None]
+        return sum(values) / len(values) if values else None
+
+    summary = {
+        "avg_k": avg(r.fanout for r in ok),
+        "avg_latency_ms": avg(r.latency_ms for r in ok),
+        "avg_total_tokens": avg(r.total_tokens for r in ok),
+    }
+    if paired:
+        fan_latency = avg(r.latency_ms for r in paired)
+        fan_tokens = avg(r.total_tokens for r in paired)
+        base_latency = avg(r.baseline_latency_ms for r in paired)
+        base_tokens = avg(r.baseline_total_tokens for r in paired)
+        summary.update({
+            "paired_count": len(paired),
+            "baseline_avg_latency_ms": base_latency,
+            "baseline_avg_total_tokens": base_tokens,
+            "latency_ratio": fan_latency / base_latency if base_latency else None,
+            "token_ratio": fan_tokens / base_tokens if base_tokens else None,
+        })
+    return summary
+
+
+def print_fanout_tradeoff(results: List[dict]):
+    """打印 fan-out 相对单次调用的延迟 / token 成本权衡"""
+    from rich.table import Table
+    from rich import box
+
+    table = Table(
+        title="\n语言 fan-out vs 单次调用",
+        box=box.ROUNDED,
+        show_header=True,
+        header_style="bold magenta"
+    )
+    table.add_column("模型", style="bold", width=20)
+    table.add_column("平均K", justify="center", width=6)
+    table.add_column("单次延迟", justify="center", width=10)
+    table.add_column("fan-out延迟", justify="center", width=11)
+    table.add_column("延迟比", justify="center", width=8)
+    table.add_column("单次Tokens", justify="center", width=10)
+    table.add_column("fan-out Tokens", justify="center", width=14)
+    table.add_column("Token比", justify="center", width=8)
+
+    for r in results:
+        f = r.get("fanout") or {}
+        if not f.get("paired_count"):
+            continue
+        table.add_row(
+            r["model_short"],
+            f"{f['avg_k']:.1f}",
+            f"{f['baseline_avg_latency_ms']:.0f}ms",
+            f"{f['avg_latency_ms']:.0f}ms",
+            f"{f['latency_ratio']:.2f}x" if f["latency_ratio"] else "-",
+            f"{f['baseline_avg_total_tokens']:.0f}",
+            f"{f['avg_total_tokens']:.0f}",
+            f"{f['token_ratio']:.2f}x" if f["token_ratio"] else "-",
+        )
+
+    console.print(table)
+
+
+def _parse_fanout(value: str):
+    """解析 --fanout 参数：正整数或 auto"""
+    if value == "auto":
+        return value
+    try:
+        k = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fan-out 必须是正整数或 auto: {value}")
+    if k < 1:
+        raise argparse.ArgumentTypeError(f"fan-out 必须是正整数或 auto: {value}")
+    return k
+
+
+def _non_negative_rate(value: str) -> float:
+    """解析到达率参数：非负数（req/s）"""
+    try:
+        rate = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"到达率必须是数字: {value}")
+    if not rate >= 0:
+        raise argparse.ArgumentTypeError(f"到达率不能为负数: {value}")
+    return rate
+
+
+def _parse_shard(value: str):
+    """解析 --shard 参数：i/N"""
+    from llm_translate.shard import parse_shard
+
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _benchmark_variants(args, prompts: List[str], formats: List[str]) -> int:
+    """每个 (翻译模板, 术语表格式) 组合各跑一次基准测试，对比输入/输出 tokens、延迟与评分
+
+    翻译模板决定响应协议（输出 tokens），术语表格式决定术语段落大小（输入 tokens）。
+    """
+    import itertools
+
+    from rich.table import Table
+    from rich import box
+
+    from llm_translate.translator import get_translate_protocol
+
+    base = Path(args.output) if args.output else Path(f"results/benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    # 指标端点与录制带只启动一次，各变体共用
+    _maybe_start_metrics(args)
+    cassette = _maybe_use_cassette(args)
+    runs = []
+    code = 0
+    for prompt, glossary_format in itertools.product(prompts, formats):
+        name = Path(prompt).stem if prompt and Path(prompt).exists() else (prompt or "default")
+        label = "_".join(
+            part for part, varies in ((name, len(prompts) > 1), (glossary_format, len(formats) > 1)) if varies
+        )
+        protocol = get_translate_protocol(prompt)
+        sub = argparse.Namespace(**vars(args))
+        sub.translate_prompt = prompt
+        sub.glossary_format = glossary_format
+        sub.output = str(base.with_name(f"{base.stem}_{label}{base.suffix}"))
+        sub.variant_run = True
+        console.print(
+            f"\n[bold cyan]▶ 翻译模板 {name} (协议: {protocol}) | 术语表格式 {glossary_format}[/bold cyan]"
+        )
+        sub_code = cmd_benchmark(sub)
+        if sub_code:
+            console.print(f"[red]变体 {label or name} 失败 (退出码 {sub_code})，不计入对比[/red]")
+            code = sub_code
+            continue
+        with open(sub.output, encoding="utf-8") as f:
+            summary = json.load(f)
+        runs.append((name, protocol, glossary_format, sub.output, summary))
+    _finish_cassette(cassette)
+    if not runs:
+        return code or 1
+
+    table = Table(title="\n模板 / 术语表格式对比", box=box.ROUNDED, header_style="bold magenta")
+    for col in ("模型", "模板", "协议", "术语表", "评分", "平均延迟", "输入 tokens", "输出 tokens", "校验失败率"):
+        table.add_column(
+            col, justify="left" if col in ("模型", "模板", "协议", "术语表") else "right", no_wrap=col == "模型",
+        )
+    comparison = []
+    for name, protocol, glossary_format, path, summary in runs:
+        for r in summary["results"]:
+            validation = r.get("validation") or {}
+            comparison.append({
+                "model": r["model"],
+                "translate_prompt": name,
+                "protocol": protocol,
+                "glossary_format": glossary_format,
+                "glossary_tokens": summary["config"].get("glossary_tokens"),
+                "overall_avg_score": r.get("overall_avg_score"),
+                "avg_latency_ms": r.get("avg_latency_ms"),
+                "avg_prompt_tokens": r.get("avg_prompt_tokens"),
+                "avg_completion_tokens": r.get("avg_completion_tokens"),
+                "avg_total_tokens": r.get("avg_total_tokens"),
+                "validation_failure_rate": validation.get("failure_rate"),
+                "summary_file": path,
+            })
+    comparison.sort(key=lambda row: (row["model"], row["avg_total_tokens"] or 0))
+    for row in comparison:
+        score = row["overall_avg_score"]
+        failure = row["validation_failure_rate"]
+        table.add_row(
+            get_model_short_name(row["model"]), row["translate_prompt"], row["protocol"], row["glossary_format"],
+            f"{score:.1f}" if score is not None else "N/A",
+            f"{row['avg_latency_ms']:.0f}ms",
+            f"{row['avg_prompt_tokens']:.0f}",
+            f"{row['avg_completion_tokens']:.0f}",
+            f"{failure:.1%}" if failure is not None else "-",
+        )
+    console.print(table)
+
+    output = base.with_name(f"{base.stem}_variants{base.suffix}")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"test_time": time.strftime("%Y-%m-%d %H:%M:%S"), "comparison": comparison}, f,
+                  ensure_ascii=False, indent=2)
+    console.print(f"[green]对比结果已保存到: {output}[/green]")
+    return code
+
+
 def cmd_benchmark(args):
     """基准测试命令"""
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    from llm_translate.concurrency import get_limiter, provider_of
+    from llm_translate.pipeline import Pipeline, Stage
+    from llm_translate.results_io import ResultWriter
+    from llm_translate.sampling import SequentialEvalSampler, bootstrap_ci
+    from llm_translate.dedup import dedup_texts
+    from llm_translate.shard import shard_of
+    from llm_translate.tm import TranslationMemory, translate_with_memory
+    from llm_translate.translator import (
+        MultiTranslateResult,
+        evaluate_translations,
+        get_coalescing_stats,
+        get_translate_protocol,
+        multi_translate,
+    )
+
+    prompts = getattr(args, 'translate_prompt', None)
+    formats = getattr(args, 'glossary_format', None)
+    if isinstance(prompts, list) or isinstance(formats, list):
+        prompts = prompts if isinstance(prompts, list) else [prompts]
+        formats = formats if isinstance(formats, list) else [formats]
+        if len(prompts) > 1 or len(formats) > 1:
+            return _benchmark_variants(args, prompts, formats)
+        args.translate_prompt, args.glossary_format = prompts[0], formats[0]
+
     # 加载测试数据
     data_file = Path(args.data)
     if not data_file.exists():
@@ -294,18 +1094,69 @@ def cmd_benchmark(args):
 
     titles = test_data.get("titles", [])
     descriptions = test_data.get("descriptions", [])
-    all_texts = [(t, "title") for t in titles] + [(d, "description") for d in descriptions]
+    # 原文驻留：数据集中重复的标题共享同一个字符串对象
+    all_texts = [(sys.intern(t), "title") for t in titles] + [(sys.intern(d), "description") for d in descriptions]
 
     models = args.models or AVAILABLE_MODELS
     target_langs = args.targets
 
     glossary = getattr(args, 'glossary', None)
+    glossary_format = getattr(args, 'glossary_format', None) or "table"
+    glossary_tokens = None
+    if glossary and glossary != "fashion_v4":
+        # fashion_v4 按文本匹配术语，段落大小随文本变化，见各模型的 avg_prompt_tokens
+        from llm_translate.glossary import build_glossary_prompt, count_tokens
+        glossary_tokens = count_tokens(build_glossary_prompt(target_langs, glossary, glossary_format))
     concurrency = getattr(args, 'concurrency', 1)
     translate_prompt = getattr(args, 'translate_prompt', None)
     evaluate_prompt = getattr(args, 'evaluate_prompt', None)
     evaluator_models = getattr(args, 'evaluator_model', [EVALUATOR_MODEL])
     if isinstance(evaluator_models, str):
         evaluator_models = [evaluator_models]
+    fanout = getattr(args, 'fanout', None)
+    fanout_compare = getattr(args, 'fanout_compare', False) and fanout is not None
+    adaptive = getattr(args, 'adaptive', None)
+    eval_batch_size = getattr(args, 'eval_batch', 1)
+    eval_batch_tokens = getattr(args, 'eval_batch_tokens', 6000)
+    eval_concurrency = getattr(args, 'eval_concurrency', None)
+    use_pipeline = getattr(args, 'pipeline', False)
+    use_dedup = getattr(args, 'dedup', False)
+    repair = getattr(args, 'repair', False)
+    memory = None
+    if getattr(args, 'tm', None):
+        memory = TranslationMemory(args.tm)
+    tm_threshold = getattr(args, 'tm_threshold', 0.9)
+    tm_cheap_model = getattr(args, 'tm_cheap_model', None)
+    tournament = getattr(args, 'tournament', False)
+    if tournament and args.no_eval:
+        console.print("[red]错误: 锦标赛模式需要评估分数，不能与 --no-eval 同时使用[/red]")
+        return 1
+    shard = getattr(args, 'shard', None)
+    if shard is not None and (tournament or getattr(args, 'sample_eval', False)):
+        # 两者都依赖全部文本上的实时评分，无法在单个分片内决定
+        console.print("[red]错误: 分片模式不支持 --tournament / --sample-eval[/red]")
+        return 1
+    sampler = None
+    sample_seed = getattr(args, 'sample_seed', 0)
+    if getattr(args, 'sample_eval', False) and not args.no_eval:
+        sampler = SequentialEvalSampler(
+            target_width=args.ci_width,
+            min_samples=args.min_eval_samples,
+            seed=sample_seed,
+        )
+    queue_size = getattr(args, 'queue_size', 32)
+    # 流水线模式下每个模型评估阶段的线程数
+    eval_stage_workers = max(concurrency, 1)
+    max_concurrency = getattr(args, 'max_concurrency', 32)
+
+    variant_run = getattr(args, 'variant_run', False)
+    if variant_run:
+        # 多变体对比时由 _benchmark_variants 统一启动指标端点与录制带
+        from llm_translate.cassette import get_cassette
+        cassette = get_cassette()
+    else:
+        _maybe_start_metrics(args)
+        cassette = _maybe_use_cassette(args)
 
     console.print(f"\n[bold blue]{'=' * 60}[/bold blue]")
     console.print("[bold blue]电商翻译全模型基准测试[/bold blue]")
@@ -313,116 +1164,303 @@ def cmd_benchmark(args):
     console.print(f"\n模型数量: {len(models)}")
     console.print(f"测试文本: {len(titles)} 标题 + {len(descriptions)} 描述")
     console.print(f"目标语言: {len(target_langs)} 个")
-    console.print(f"并发度: {concurrency} (每模型)")
+    if shard is not None:
+        console.print(f"分片: {shard[0]}/{shard[1]}（按 (模型, 文本) 哈希划分）")
+    if adaptive:
+        console.print(f"并发度: 自适应 AIMD (按{'模型' if adaptive == 'model' else '供应商'}, 初始 {concurrency}, 上限 {max_concurrency})")
+    else:
+        console.print(f"并发度: {concurrency} (每模型)")
     if not args.no_eval:
         eval_names = [get_model_short_name(m) for m in evaluator_models]
         console.print(f"评估模型: {', '.join(eval_names)} ({len(evaluator_models)}个)")
+        if eval_batch_size > 1:
+            console.print(f"批量评估: 每批最多 {eval_batch_size} 条 / {eval_batch_tokens} tokens")
+        if sampler is not None:
+            console.print(
+                f"抽样评估: 95% 置信区间宽度 ≤ {sampler.target_width} 或排名确定即停止 "
+                f"(至少 {sampler.min_samples} 条)"
+            )
     if glossary:
-        console.print(f"术语表: {glossary}")
+        console.print(
+            f"术语表: {glossary} ({glossary_format}"
+            + (f", {glossary_tokens} tokens)" if glossary_tokens is not None else ")")
+        )
+    if fanout:
+        console.print(f"语言 fan-out: {fanout}" + (" (对比单次调用)" if fanout_compare else ""))
+    if use_dedup:
+        plan = dedup_texts([text for text, _ in all_texts])
+        console.print(f"源文本去重: {plan.total} 条 → {plan.unique} 条唯一 (去重率 {plan.ratio:.1%})")
+    if memory is not None:
+        cheap = f", ≥{tm_threshold} 改用 {get_model_short_name(tm_cheap_model)}" if tm_cheap_model else ""
+        console.print(f"翻译记忆: {args.tm} ({len(memory)} 条{cheap})")
+
+    # 使用毫秒级时间戳避免文件名冲突
+    timestamp = f"{time.strftime('%Y%m%d_%H%M%S')}_{int(time.time() * 1000) % 1000:03d}"
+
+    # 生成输出文件名
+    if args.output:
+        output_file = Path(args.output)
+        details_file = output_file.parent / "details" / output_file.name
+    else:
+        suffix = f"_shard{shard[0]}of{shard[1]}" if shard is not None else ""
+        output_file = Path(f"results/benchmark_{timestamp}{suffix}.json")
+        details_file = Path(f"results/details/benchmark_{timestamp}{suffix}.json")
+
+    # jsonl 格式：明细按 (model, text, lang) 逐行增量写入压缩文件
+    writer = None
+    if getattr(args, 'format', 'json') == "jsonl":
+        writer = ResultWriter(
+            output_file.parent / "runs" / output_file.stem,
+            target_langs,
+            config={"data_file": str(data_file), "models": models, "target_langs": target_langs},
+        )
 
-    results = []
     lock = threading.Lock()
 
-    def test_model(model: str) -> dict:
-        """测试单个模型"""
+    # 各模型累计的结果与耗时（锦标赛模式下跨轮次累加）
+    model_history = {}
+    model_elapsed = {}
+    # 每个模型跨轮次累计的评估调用次数与输入 token（锦标赛模式按轮追加结果）
+    model_eval_totals = {}
+
+    def test_model(model: str, texts: Optional[list] = None, offset: int = 0) -> dict:
+        """测试单个模型（texts 为本次要处理的文本，从 all_texts[offset] 开始，默认全部；结果与之前轮次累加）"""
+        text_ids = None
+        if texts is None and shard is not None:
+            # 分片：只处理哈希落在本分片的 (model, text)
+            text_ids = [i for i, (text, _) in enumerate(all_texts) if shard_of(model, text, shard[1]) == shard[0]]
+            texts = [all_texts[i] for i in text_ids]
+        texts = all_texts if texts is None else texts
+
+        def text_id(idx: int) -> int:
+            """本次处理的第 idx 条在 all_texts 中的下标"""
+            return text_ids[idx] if text_ids is not None else offset + idx
         model_short = get_model_short_name(model)
-        model_results = [None] * len(all_texts)  # 预分配保持顺序
+        model_results = [None] * len(texts)  # 预分配保持顺序
         start_time = time.time()
         completed_count = [0]  # 用列表以便在闭包中修改
 
-        def process_single(idx: int, text: str, text_type: str) -> None:
-            """处理单个文本"""
-            try:
-                result = multi_translate(
-                    texts=text,
-                    source_lang="en",
-                    target_langs=target_langs,
-                    model=model,
-                    glossary=glossary,
-                    translate_prompt=translate_prompt,
+        # 自适应并发：按模型或供应商共享 AIMD 限流器
+        limiter = None
+        if adaptive:
+            limiter_key = model if adaptive == "model" else provider_of(model)
+            limiter = get_limiter(limiter_key, initial=concurrency, max_limit=max_concurrency)
+
+        def translate_text(text: str, text_type: Optional[str] = None) -> MultiTranslateResult:
+            """翻译单个文本（自适应模式下受限流器控制）"""
+            kwargs = dict(
+                texts=text,
+                source_lang="en",
+                target_langs=target_langs,
+                model=model,
+                glossary=glossary,
+                glossary_format=glossary_format,
+                translate_prompt=translate_prompt,
+                fanout=fanout,
+                # 流水线模式下由 validate 阶段修复
+                repair=repair and not use_pipeline,
+            )
+            translate = multi_translate
+            if memory is not None:
+                # 翻译记忆：精确命中直接复用，模糊命中注入参考译文（按模型隔离）
+                translate = functools.partial(
+                    translate_with_memory, memory=memory, cheap_model=tm_cheap_model,
+                    threshold=tm_threshold, scope=model,
                 )
+            if limiter is None:
+                return translate(**kwargs)
+            with limiter.slot():
+                result = translate(**kwargs)
+            # 标题和描述耗时相差很大，各自的延迟基线分开（供应商模式下再按模型区分）
+            limiter.record(
+                result.latency_ms, None if result.success else (result.error_type or "error"), key=(model, text_type),
+            )
+            return result
+
+        eval_counters = {"calls": 0, "prompt_tokens": 0, "skipped": 0}
+        if sampler is not None:
+            sampler.register(model)
 
-                score = None
-                eval_scores = None
-                eval_latency_ms = None
-                eval_prompt_tokens = None
-                eval_completion_tokens = None
-                eval_total_tokens = None
-                multi_eval = {}
-
-                if not args.no_eval and result.success:
-                    translations_dict = result.get_single_translations()
-
-                    # 对每个评估模型进行评估
-                    for eval_idx, eval_model in enumerate(evaluator_models):
-                        try:
-                            eval_result = evaluate_translations(
-                                source_texts=text,
-                                translations=translations_dict,
-                                source_lang="en",
-                                evaluator_model=eval_model,
-                                evaluate_prompt=evaluate_prompt,
-                            )
-
-                            if eval_result.scores:
-                                eval_score = sum(s.overall for s in eval_result.scores.values()) / len(eval_result.scores)
-                                eval_lang_scores = {
-                                    lang: int(s.overall)
-                                    for lang, s in eval_result.scores.items()
-                                }
-
-                                # 存储到多评估结果（包含token信息）
-                                eval_model_short = get_model_short_name(eval_model)
-                                multi_eval[eval_model_short] = {
-                                    "score": eval_score,
-                                    "eval_scores": eval_lang_scores,
-                                    "eval_latency_ms": eval_result.latency_ms,
-                                    "prompt_tokens": eval_result.prompt_tokens,
-                                    "completion_tokens": eval_result.completion_tokens,
-                                    "total_tokens": eval_result.total_tokens,
-                                }
-
-                                # 第一个评估模型的结果作为默认（兼容旧格式）
-                                if eval_idx == 0:
-                                    score = eval_score
-                                    eval_scores = eval_lang_scores
-                                    eval_latency_ms = eval_result.latency_ms
-                                    eval_prompt_tokens = eval_result.prompt_tokens
-                                    eval_completion_tokens = eval_result.completion_tokens
-                                    eval_total_tokens = eval_result.total_tokens
-                        except Exception as eval_err:
-                            eval_model_short = get_model_short_name(eval_model)
-                            multi_eval[eval_model_short] = {
-                                "score": None,
-                                "error": str(eval_err),
-                            }
-
-                model_results[idx] = SingleResult(
+        # 去重：每个唯一文本只翻译、评估一次，完成后回填到重复位置
+        dedup_plan = None
+        if use_dedup:
+            dedup_plan = dedup_texts([text for text, _ in texts])
+            work_order = [(i, texts[i]) for i in dedup_plan.first_indices]
+        else:
+            work_order = list(enumerate(texts))
+        # 抽样评估时按随机顺序处理，使已评估的部分是随机样本
+        if sampler is not None:
+            random.Random(sample_seed).shuffle(work_order)
+
+        def evaluate_with(eval_model: str, is_primary: bool, items: list) -> None:
+            """用一个评估模型对一批 (SingleResult, 译文) 做一次评估调用，并把分数映射回各条结果"""
+            source_texts = [single.text for single, _ in items]
+            langs = list(items[0][1].keys())
+            translations = {lang: [t.get(lang, "") for _, t in items] for lang in langs}
+            kwargs = dict(
+                source_texts=source_texts,
+                translations=translations,
+                source_lang="en",
+                evaluator_model=eval_model,
+                evaluate_prompt=evaluate_prompt,
+            )
+            try:
+                if adaptive:
+                    # 评估模型同样受共享的自适应限流器约束
+                    eval_limiter = get_limiter(
+                        eval_model if adaptive == "model" else provider_of(eval_model),
+                        initial=concurrency, max_limit=max_concurrency,
+                    )
+                    with eval_limiter.slot():
+                        eval_result = evaluate_translations(**kwargs)
+                    eval_limiter.record(
+                        eval_result.latency_ms, eval_result.error_type, key=(eval_model, "eval", len(items)),
+                    )
+                else:
+                    eval_result = evaluate_translations(**kwargs)
+            except Exception as eval_err:
+                for single, _ in items:
+                    _record_evaluation_error(single, eval_model, str(eval_err))
+                return
+
+            with lock:
+                eval_counters["calls"] += 1
+                eval_counters["prompt_tokens"] += eval_result.prompt_tokens
+
+            n = len(items)
+            per_text = [eval_result.scores_for(i) for i in range(n)]
+            if n > 1 and eval_result.scores and any(len(p) != len(eval_result.scores) for p in per_text):
+                # 批量评分条数与文本数不一致：逐条重新评估
+                for item in items:
+                    evaluate_with(eval_model, is_primary, [item])
+                return
+
+            for (single, _), lang_scores in zip(items, per_text):
+                if lang_scores:
+                    _record_evaluation(
+                        single, eval_model, is_primary, lang_scores,
+                        latency_ms=eval_result.latency_ms,
+                        prompt_tokens=eval_result.prompt_tokens // n,
+                        completion_tokens=eval_result.completion_tokens // n,
+                        total_tokens=eval_result.total_tokens // n,
+                        batch_size=n,
+                    )
+                    if is_primary and sampler is not None:
+                        sampler.add(model, single.score)
+
+        pending_evals = []  # 已提交、尚未等待的评估任务
+        # Future 先唤醒 result() 的等待者再执行回调，所以不能只等 Future：
+        # 按批计数，on_done 返回后才算这一批完成
+        evals_outstanding = [0]
+        evals_idle = threading.Condition(lock)
+
+        def evaluate_items(items: list, on_done=None) -> None:
+            """把各评估模型的调用并发提交到共享评估线程池，全部完成后调用 on_done"""
+            remaining = [len(evaluator_models)]
+            with lock:
+                evals_outstanding[0] += 1
+
+            def _one_done(_future):
+                with lock:
+                    remaining[0] -= 1
+                    finished = remaining[0] == 0
+                if not finished:
+                    return
+                try:
+                    if on_done is not None:
+                        on_done()
+                finally:
+                    with evals_idle:
+                        evals_outstanding[0] -= 1
+                        if evals_outstanding[0] == 0:
+                            evals_idle.notify_all()
+
+            futures = [
+                eval_executor.submit(evaluate_with, eval_model, eval_idx == 0, items)
+                for eval_idx, eval_model in enumerate(evaluator_models)
+            ]
+            with lock:
+                pending_evals.extend(futures)
+            for f in futures:
+                f.add_done_callback(_one_done)
+
+        def wait_evals() -> None:
+            """等待所有已提交的评估及其 on_done 回调完成"""
+            with evals_idle:
+                evals_idle.wait_for(lambda: evals_outstanding[0] == 0)
+            # 评估线程内的异常仍然抛出
+            for f in list(pending_evals):
+                f.result()
+
+        def finalize(single: SingleResult) -> None:
+            """单条文本全部完成（含评估）：报告进度并增量写入明细"""
+            report_progress(single)
+            if writer is not None:
+                writer.write(model, single.text_id, single)
+
+        def report_progress(single: SingleResult) -> None:
+            score = single.score
+            with lock:
+                completed_count[0] += 1
+                console.print(f"  [{model_short}] {completed_count[0]}/{len(work_order)} 完成" +
+                              (f", 评分: {score:.0f}" if score else ""))
+
+        # 批量评估：积累多条翻译结果后一次评估
+        eval_batch = None
+        if not args.no_eval and eval_batch_size > 1:
+            def evaluate_batch(items: list) -> None:
+                def write_batch():
+                    # 批次评估完成后写入明细
+                    for single, _ in items:
+                        if writer is not None:
+                            writer.write(model, single.text_id, single)
+
+                evaluate_items(items, on_done=write_batch)
+
+            eval_batch = _EvalBatch(eval_batch_size, eval_batch_tokens, evaluate_batch)
+
+        def build_result(text: str, text_type: str) -> SingleResult:
+            """翻译单个文本并生成结果记录（不含评估）"""
+            try:
+                result = translate_text(text, text_type)
+
+                # 对比模式：同一文本再做一次单次调用，记录延迟和 token 作为基线
+                baseline = None
+                if fanout_compare:
+                    baseline = multi_translate(
+                        texts=text,
+                        source_lang="en",
+                        target_langs=target_langs,
+                        model=model,
+                        glossary=glossary,
+                        glossary_format=glossary_format,
+                        translate_prompt=translate_prompt,
+                    )
+
+                single = SingleResult(
                     text_type=text_type,
                     text=text,  # 保存完整原文
                     success=result.success,
                     latency_ms=result.latency_ms,
-                    score=score,
+                    score=None,
                     error=result.error if not result.success else None,
                     translations=result.get_single_translations() if result.success else None,
-                    eval_scores=eval_scores,
-                    eval_latency_ms=eval_latency_ms,
-                    multi_eval=multi_eval if multi_eval else None,
                     prompt_tokens=result.prompt_tokens,
                     completion_tokens=result.completion_tokens,
                     total_tokens=result.total_tokens,
-                    eval_prompt_tokens=eval_prompt_tokens,
-                    eval_completion_tokens=eval_completion_tokens,
-                    eval_total_tokens=eval_total_tokens,
+                    fanout=result.fanout if fanout else None,
+                    baseline_latency_ms=baseline.latency_ms if baseline and baseline.success else None,
+                    baseline_total_tokens=baseline.total_tokens if baseline and baseline.success else None,
+                    invalid_cells=_cell_labels(result.invalid_cells),
+                    unresolved_cells=_cell_labels(result.unresolved_cells),
+                    repair_calls=result.repair_calls,
+                    timings=result.timings,
                 )
-
-                with lock:
-                    completed_count[0] += 1
-                    console.print(f"  [{model_short}] {completed_count[0]}/{len(all_texts)} 完成" +
-                                  (f", 评分: {score:.0f}" if score else ""))
-
+                if not use_pipeline:
+                    _flag_unresolved(single)
+                return single
             except Exception as e:
-                model_results[idx] = SingleResult(
+                return SingleResult(
                     text_type=text_type,
                     text=text,  # 保存完整原文
                     success=False,
@@ -430,151 +1468,302 @@ def cmd_benchmark(args):
                     score=None,
                     error=str(e),
                 )
-                with lock:
-                    completed_count[0] += 1
-
-        # 使用线程池并发处理
-        if concurrency > 1:
-            with ThreadPoolExecutor(max_workers=concurrency) as executor:
-                futures = []
-                for i, (text, text_type) in enumerate(all_texts):
-                    futures.append(executor.submit(process_single, i, text, text_type))
-                # 等待所有任务完成
-                for f in futures:
-                    f.result()
-        else:
-            # 串行处理
-            for i, (text, text_type) in enumerate(all_texts):
-                process_single(i, text, text_type)
-
-        total_time = time.time() - start_time
-        # 过滤 None 值（并发时的安全检查）
-        valid_results = [r for r in model_results if r is not None]
-        success_count = sum(1 for r in valid_results if r.success)
-        title_scores = [r.score for r in valid_results if r.text_type == "title" and r.score]
-        desc_scores = [r.score for r in valid_results if r.text_type == "description" and r.score]
-        all_scores = [r.score for r in valid_results if r.score]
-        latencies = [r.latency_ms for r in valid_results if r.success]
-
-        # 计算各评估模型的平均分
-        multi_eval_scores = {}
-        for eval_model_short in [get_model_short_name(m) for m in evaluator_models]:
-            scores_for_eval = []
-            for r in valid_results:
-                if r.multi_eval and eval_model_short in r.multi_eval:
-                    s = r.multi_eval[eval_model_short].get("score")
-                    if s is not None:
-                        scores_for_eval.append(s)
-            if scores_for_eval:
-                multi_eval_scores[eval_model_short] = sum(scores_for_eval) / len(scores_for_eval)
 
-        return {
-            "model": model,
-            "model_short": model_short,
-            "title_avg_score": sum(title_scores) / len(title_scores) if title_scores else None,
-            "desc_avg_score": sum(desc_scores) / len(desc_scores) if desc_scores else None,
-            "overall_avg_score": sum(all_scores) / len(all_scores) if all_scores else None,
-            "avg_latency_ms": sum(latencies) / len(latencies) if latencies else 0,
-            "success_rate": f"{success_count}/{len(valid_results)}",
-            "total_time_s": total_time,
-            # 多评估模型分数
-            "multi_eval_scores": multi_eval_scores,
-            # 详细结果
-            "details": [r.to_dict() for r in valid_results],
-        }
-
-    console.print(f"\n[bold cyan]开始并行测试 {len(models)} 个模型[/bold cyan]\n")
-
-    with ThreadPoolExecutor(max_workers=len(models)) as executor:
-        futures = {executor.submit(test_model, m): m for m in models}
-        for future in as_completed(futures):
-            model = futures[future]
-            try:
-                result = future.result()
+        def needs_eval(single: SingleResult) -> bool:
+            if args.no_eval or not single.success or not single.translations or single.error:
+                return False
+            if sampler is not None and not sampler.should_evaluate(model):
+                # 抽样评估：该模型分数已足够确定，跳过评估
                 with lock:
-                    results.append(result)
-                score_str = f"评分 {result['overall_avg_score']:.1f}/100, " if result['overall_avg_score'] else ""
-                console.print(
-                    f"[green]✓ {result['model_short']} 完成: "
-                    f"{score_str}"
-                    f"耗时 {result['total_time_s']:.1f}s[/green]"
-                )
-            except Exception as e:
-                console.print(f"[red]✗ {get_model_short_name(model)} 失败: {e}[/red]")
+                    eval_counters["skipped"] += 1
+                return False
+            return True
 
-    # 打印结果表格
-    results.sort(key=lambda x: x["overall_avg_score"] or 0, reverse=True)
-
-    # 获取评估模型短名称列表
-    eval_model_names = [get_model_short_name(m) for m in evaluator_models]
-    multi_eval_mode = len(evaluator_models) > 1
+        def process_single(idx: int, text: str, text_type: str) -> None:
+            """处理单个文本"""
+            single = build_result(text, text_type)
+            single.text_id = text_id(idx)
+            model_results[idx] = single
+
+            if needs_eval(single):
+                item = (single, single.translations)
+                if eval_batch is not None:
+                    eval_batch.add(item)
+                    report_progress(single)
+                else:
+                    # 评估完成后再报告进度（带评分），不阻塞翻译线程
+                    evaluate_items([item], on_done=lambda: finalize(single))
+            else:
+                finalize(single)
+
+        # 翻译并发（自适应模式下实际并发由限流器决定）
+        workers = max_concurrency if limiter is not None else concurrency
+        pipeline_stats = None
+
+        if use_pipeline:
+            # 流水线：load → translate → validate → evaluate → write，阶段间为有界队列
+            def translate_stage(item):
+                idx, text, text_type = item
+                single = build_result(text, text_type)
+                single.text_id = text_id(idx)
+                return [(idx, single)]
+
+            def validate_stage(item):
+                idx, single = item
+                if single.success and single.unresolved_cells and repair:
+                    _repair_single(
+                        single, target_langs, model,
+                        glossary=glossary, translate_prompt=translate_prompt,
+                        glossary_format=glossary_format,
+                    )
+                _flag_unresolved(single)
+                return [item]
+
+            def eval_and_wait(items: list) -> None:
+                futures = [
+                    eval_executor.submit(evaluate_with, eval_model, eval_idx == 0, items)
+                    for eval_idx, eval_model in enumerate(evaluator_models)
+                ]
+                # 异常记到该批每条结果上，批内条目照常传到 write 阶段
+                for eval_model, f in zip(evaluator_models, futures):
+                    try:
+                        f.result()
+                    except Exception as e:
+                        for single, _ in items:
+                            _record_evaluation_error(single, eval_model, str(e))
+
+            stage_eval_batch = _EvalBatch(eval_batch_size, eval_batch_tokens, eval_and_wait)
+            index_of = {}
+
+            def evaluate_stage(item):
+                idx, single = item
+                if not needs_eval(single) or single.error:
+                    return [item]
+                index_of[id(single)] = idx
+                flushed = stage_eval_batch.add((single, single.translations))
+                return [(index_of.pop(id(s)), s) for s, _ in flushed]
+
+            def evaluate_flush():
+                return [(index_of.pop(id(s)), s) for s, _ in stage_eval_batch.flush()]
+
+            def write_stage(item):
+                idx, single = item
+                model_results[idx] = single
+                finalize(single)
+                return []
+
+            def stage_failed(stage_name):
+                """阶段异常时输出失败结果，使该文本仍计入结果与成功率"""
+                def on_error(item, error):
+                    idx = item[0]
+                    if isinstance(item[1], SingleResult):
+                        single = item[1]
+                        single.success = False
+                    else:
+                        _, text, text_type = item
+                        single = SingleResult(
+                            text_type=text_type, text=text, success=False, latency_ms=0, score=None,
+                        )
+                        single.text_id = text_id(idx)
+                    single.error = f"{stage_name} 阶段异常: {error}"
+                    return [(idx, single)]
+                return on_error
+
+            pipeline = Pipeline(
+                [
+                    Stage("translate", translate_stage, workers=max(workers, 1), on_error=stage_failed("translate")),
+                    Stage("validate", validate_stage, workers=max(workers, 1), on_error=stage_failed("validate")),
+                    Stage(
+                        "evaluate", evaluate_stage, workers=eval_stage_workers, flush=evaluate_flush,
+                        on_error=stage_failed("evaluate"),
+                    ),
+                    Stage("write", write_stage, workers=1),
+                ],
+                queue_size=queue_size,
+            )
+            pipeline_stats = pipeline.run(
+                (i, text, text_type) for i, (text, text_type) in work_order
+            )
+        else:
+            if workers > 1:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = []
+                    for i, (text, text_type) in work_order:
+                        futures.append(executor.submit(process_single, i, text, text_type))
+                    # 等待所有任务完成
+                    for f in futures:
+                        f.result()
+            else:
+                # 串行处理
+                for i, (text, text_type) in work_order:
+                    process_single(i, text, text_type)
+
+            # 评估剩余不足一批的结果
+            if eval_batch is not None:
+                eval_batch.flush()
+            # 等待所有评估（含写入明细的回调）完成
+            wait_evals()
+
+        if dedup_plan is not None:
+            # 回填：重复文本复用首次出现位置的结果（共享译文与评分，不再复制）
+            for i in range(len(texts)):
+                first = dedup_plan.representative(i)
+                if first != i and model_results[first] is not None:
+                    text, text_type = texts[i]
+                    single = dataclasses.replace(
+                        model_results[first], text=text, text_type=text_type,
+                        text_id=text_id(i), dedup_of=text_id(first),
+                    )
+                    model_results[i] = single
+                    if writer is not None:
+                        writer.write(model, single.text_id, single)
+
+        with lock:
+            model_elapsed[model] = model_elapsed.get(model, 0.0) + time.time() - start_time
+            total_time = model_elapsed[model]
+            eval_totals = model_eval_totals.setdefault(model, {"calls": 0, "prompt_tokens": 0})
+            eval_totals["calls"] += eval_counters["calls"]
+            eval_totals["prompt_tokens"] += eval_counters["prompt_tokens"]
+            eval_totals = dict(eval_totals)
+            # 过滤 None 值（并发时的安全检查），并与之前轮次的结果合并
+            valid_results = model_history.get(model, []) + [r for r in model_results if r is not None]
+            model_history[model] = valid_results
+        summary = _aggregate_results(
+            model, valid_results, evaluator_models, target_langs, total_time,
+            dedup=dedup_plan is not None, fanout=bool(fanout),
+        )
+        # 评估调用次数与输入 token（批量评估时约为逐条评估的 1/批大小）
+        summary["eval_calls"] = eval_totals["calls"]
+        summary["eval_prompt_tokens"] = eval_totals["prompt_tokens"]
+        if memory is not None:
+            summary["translation_memory"] = memory.stats(model)
+        if limiter is not None:
+            summary["adaptive_concurrency"] = limiter.stats()
+        if pipeline_stats is not None:
+            summary["pipeline"] = pipeline_stats
+        if sampler is not None:
+            sample = sampler.summary(model)
+            sample["eval_skipped"] = eval_counters["skipped"]
+            # 跳过的文本本需 (评估模型数 / 批大小) 次评估调用
+            sample["eval_calls_saved"] = round(
+                eval_counters["skipped"] * len(evaluator_models) / max(eval_batch_size, 1))
+            summary["sampled_eval"] = sample
+            all_scores = [r.score for r in valid_results if r.score]
+            if all_scores:
+                low, high = bootstrap_ci(all_scores, sampler.confidence, sampler.n_resamples, sample_seed)
+                summary["overall_ci"] = [low, high]
+        return summary
 
-    table = Table(
-        title="\n电商翻译全模型测试结果",
-        box=box.ROUNDED,
-        show_header=True,
-        header_style="bold magenta"
-    )
-    table.add_column("排名", justify="center", width=4)
-    table.add_column("模型", style="bold", width=20)
+    console.print(f"\n[bold cyan]开始并行测试 {len(models)} 个模型[/bold cyan]\n")
 
-    if multi_eval_mode:
-        # 多评估模型：为每个评估模型添加一列
-        for eval_name in eval_model_names:
-            # 简化名称
-            short_name = eval_name.replace("Gemini ", "G").replace("Claude ", "C").replace(" Flash", "F").replace(" Lite", "L").replace(" Pro", "P")
-            table.add_column(short_name, justify="center", width=10)
+    # 所有模型共享的评估线程池：同一条译文的多个评估模型并发调用
+    eval_workers = eval_concurrency or max(concurrency, 1) * len(models) * len(evaluator_models)
+    eval_executor = ThreadPoolExecutor(max_workers=eval_workers, thread_name_prefix="eval")
+
+    def run_models(models_to_run: list, texts: Optional[list] = None, offset: int = 0) -> List[dict]:
+        """并行测试一组模型，返回各模型汇总"""
+        round_results = []
+        with ThreadPoolExecutor(max_workers=len(models_to_run)) as executor:
+            futures = {executor.submit(test_model, m, texts, offset): m for m in models_to_run}
+            for future in as_completed(futures):
+                model = futures[future]
+                try:
+                    result = future.result()
+                    round_results.append(result)
+                    score_str = f"评分 {result['overall_avg_score']:.1f}/100, " if result['overall_avg_score'] else ""
+                    console.print(
+                        f"[green]✓ {result['model_short']} 完成: "
+                        f"{score_str}"
+                        f"耗时 {result['total_time_s']:.1f}s[/green]"
+                    )
+                    if "pipeline" in result:
+                        depths = ", ".join(
+                            f"{name} {st['max_queue_depth']}/{st['avg_queue_depth']:.1f}"
+                            for name, st in result["pipeline"].items() if "max_queue_depth" in st
+                        )
+                        console.print(f"  [dim]队列深度 (最大/平均): {depths}[/dim]")
+                    if "dedup" in result:
+                        dd = result["dedup"]
+                        console.print(
+                            f"  [dim]去重: {dd['texts']} 条 → {dd['unique']} 条唯一 "
+                            f"(去重率 {dd['dedup_ratio']:.1%})[/dim]"
+                        )
+                    val = result.get("validation")
+                    if val and val["invalid_cells"]:
+                        console.print(
+                            f"  [dim]校验: {val['invalid_cells']}/{val['cells']} 个单元格未通过 "
+                            f"({val['failure_rate']:.1%}; "
+                            + ", ".join(f"{k} {v}" for k, v in val["by_reason"].items())
+                            + f")，重译 {val['repair_calls']} 次后剩 {val['unresolved_cells']} 个[/dim]"
+                        )
+                    if "phase_timings" in result:
+                        phases = result["phase_timings"]
+                        console.print("  [dim]连接阶段 (平均/p95): " + " | ".join(
+                            f"{name.removesuffix('_ms')} {st['avg']:.0f}/{st['p95']:.0f}ms"
+                            for name, st in phases.items() if name != "requests"
+                        ) + "[/dim]")
+                    if "translation_memory" in result:
+                        tm = result["translation_memory"]
+                        bands = ", ".join(
+                            f"{name} {band['rate']:.0%}" for name, band in tm["bands"].items() if band["count"]
+                        )
+                        console.print(f"  [dim]翻译记忆: 命中率 {tm['hit_rate']:.1%} ({bands})[/dim]")
+                    if "adaptive_concurrency" in result:
+                        ac = result["adaptive_concurrency"]
+                        console.print(
+                            f"  [dim]并发: 最终 {ac['final_limit']}, 峰值 {ac['max_limit_reached']}, "
+                            f"增加 {ac['increases']} 次, 降低 {ac['decreases']} 次[/dim]"
+                        )
+                except Exception as e:
+                    console.print(f"[red]✗ {get_model_short_name(model)} 失败: {e}[/red]")
+        return round_results
+
+    tournament_report = None
+    if tournament:
+        results, tournament_report = _run_tournament(
+            models, all_texts, run_models,
+            initial=args.tournament_initial,
+            drop_fraction=args.tournament_drop,
+            max_latency_ms=args.max_latency_ms,
+            max_tokens_per_text=args.max_tokens_per_text,
+            evaluator_count=0 if args.no_eval else len(evaluator_models),
+            eval_batch_size=eval_batch_size,
+        )
     else:
-        table.add_column("标题评分", justify="center", width=10)
-        table.add_column("描述评分", justify="center", width=10)
-        table.add_column("总评分", justify="center", width=10)
+        results = run_models(models)
 
-    table.add_column("平均延迟", justify="center", width=10)
-    table.add_column("成功率", justify="center", width=8)
+    eval_executor.shutdown(wait=True)
 
-    def score_fmt(s):
-        if s is None:
-            return "[dim]N/A[/dim]"
-        color = "green" if s >= 90 else "yellow" if s >= 80 else "red"
-        return f"[{color}]{s:.1f}[/]"
+    # 打印结果表格（锦标赛模式下存活轮次多的排在前面）
+    results.sort(key=lambda x: (x.get("tournament_rounds", 0), x["overall_avg_score"] or 0), reverse=True)
 
-    for i, r in enumerate(results, 1):
-        rank = f"🏆{i}" if i == 1 else f"  {i}"
+    print_benchmark_table(results, evaluator_models)
 
-        if multi_eval_mode:
-            # 多评估模型：显示每个评估模型的分数
-            row = [rank, r["model_short"]]
-            for eval_name in eval_model_names:
-                score = r.get("multi_eval_scores", {}).get(eval_name)
-                row.append(score_fmt(score))
-            row.append(f"{r['avg_latency_ms']:.0f}ms")
-            row.append(r["success_rate"])
-            table.add_row(*row)
-        else:
-            table.add_row(
-                rank,
-                r["model_short"],
-                score_fmt(r["title_avg_score"]),
-                score_fmt(r["desc_avg_score"]),
-                f"[bold]{score_fmt(r['overall_avg_score'])}[/bold]",
-                f"{r['avg_latency_ms']:.0f}ms",
-                r["success_rate"],
+    if tournament_report is not None:
+        print_tournament(tournament_report)
+
+    if sampler is not None:
+        saved = sum(r.get("sampled_eval", {}).get("eval_calls_saved", 0) for r in results)
+        made = sum(r.get("eval_calls", 0) for r in results)
+        if saved + made:
+            console.print(
+                f"[dim]抽样评估: 评估调用 {made} 次，节省 {saved} 次 ({saved / (saved + made) * 100:.0f}%)[/dim]"
             )
 
-    console.print(table)
+    if fanout_compare:
+        print_fanout_tradeoff(results)
+
+    # 相同请求合并统计
+    coalescing = get_coalescing_stats()
+    coalesced_total = sum(c["coalesced"] for c in coalescing.values())
+    if coalesced_total:
+        console.print(
+            f"[dim]请求合并: 翻译 {coalescing['translate']['coalesced']} 次, "
+            f"评估 {coalescing['evaluate']['coalesced']} 次（共享进行中的相同请求）[/dim]"
+        )
 
     # 保存结果
     test_time = time.strftime("%Y-%m-%d %H:%M:%S")
-    # 使用毫秒级时间戳避免文件名冲突
-    timestamp = f"{time.strftime('%Y%m%d_%H%M%S')}_{int(time.time() * 1000) % 1000:03d}"
-
-    # 生成输出文件名
-    if args.output:
-        output_file = Path(args.output)
-        details_file = output_file.parent / "details" / output_file.name
-    else:
-        output_file = Path(f"results/benchmark_{timestamp}.json")
-        details_file = Path(f"results/details/benchmark_{timestamp}.json")
 
     # 汇总结果（不含详细数据）
     summary_results = []
@@ -591,12 +1780,39 @@ def cmd_benchmark(args):
             "descriptions_count": len(descriptions),
             "target_langs": target_langs,
             "glossary": glossary,
+            "glossary_format": glossary_format,
+            "glossary_tokens": glossary_tokens,
+            "translate_prompt": translate_prompt,
+            "protocol": get_translate_protocol(translate_prompt),
             "concurrency": concurrency,
+            "adaptive_concurrency": adaptive,
             "eval_enabled": not args.no_eval,
             "evaluator_models": evaluator_models if not args.no_eval else None,
+            "eval_batch": eval_batch_size,
+            "pipeline": use_pipeline,
+            "sampled_eval": {
+                "ci_width": sampler.target_width,
+                "min_samples": sampler.min_samples,
+                "seed": sample_seed,
+            } if sampler is not None else None,
+            "fanout": fanout,
+            "dedup": use_dedup,
+            "repair": repair,
+            "shard": {"index": shard[0], "count": shard[1]} if shard is not None else None,
+            "cassette": {"mode": cassette.mode, "path": str(cassette.path)} if cassette is not None else None,
+            "translation_memory": {
+                "path": args.tm,
+                "threshold": tm_threshold,
+                "cheap_model": tm_cheap_model,
+            } if memory is not None else None,
         },
+        "coalescing": coalescing,
+        "tournament": tournament_report,
         "results": summary_results,
     }
+    if writer is not None:
+        # 相对汇总文件所在目录，汇总与 runs/ 一起拷到其他机器后仍能找到
+        summary_output["details_dir"] = str(writer.run_dir.relative_to(output_file.parent))
 
     # 详细结果（含翻译和评估明细）
     details_output = {
@@ -611,15 +1827,836 @@ def cmd_benchmark(args):
         json.dump(summary_output, f, ensure_ascii=False, indent=2)
 
     # 保存详细结果
+    if writer is not None:
+        writer.config = summary_output["config"]
+        details_file = writer.close(test_time)
+    else:
+        details_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(details_file, "w", encoding="utf-8") as f:
+            json.dump(details_output, f, ensure_ascii=False, indent=2, default=_json_default)
+
+    console.print(f"\n[green]汇总结果: {output_file}[/green]")
+    console.print(f"[green]详细结果: {details_file}[/green]")
+    if not variant_run:
+        _finish_cassette(cassette)
+    return 0
+
+
+def cmd_merge(args):
+    """合并 benchmark --shard 各分片的输出为标准汇总/明细文件"""
+    from llm_translate.shard import load_shard
+
+    shards = []
+    for path in args.paths:
+        if not Path(path).exists():
+            console.print(f"[red]错误: 文件不存在: {path}[/red]")
+            return 1
+        try:
+            shards.append((path, *load_shard(path)))
+        except FileNotFoundError as e:
+            console.print(f"[red]错误: {e}[/red]")
+            return 1
+
+    configs = [summary.get("config", {}) for _, summary, _ in shards]
+    shard_info = [c.get("shard") for c in configs]
+    if any(info is None for info in shard_info):
+        console.print("[red]错误: 输入中有非分片运行的结果（config.shard 为空）[/red]")
+        return 1
+    counts = {info["count"] for info in shard_info}
+    if len(counts) > 1:
+        console.print(f"[red]错误: 分片总数不一致: {sorted(counts)}[/red]")
+        return 1
+    count = counts.pop()
+    indices = sorted(info["index"] for info in shard_info)
+    if len(set(indices)) != len(indices):
+        console.print(f"[red]错误: 分片重复: {indices}[/red]")
+        return 1
+    missing = sorted(set(range(count)) - set(indices))
+    if missing:
+        console.print(f"[yellow]警告: 缺少分片 {missing}，汇总只覆盖已有分片[/yellow]")
+    for key in ("data_file", "target_langs", "glossary", "glossary_format", "translate_prompt"):
+        if len({json.dumps(c.get(key)) for c in configs}) > 1:
+            console.print(f"[yellow]警告: 各分片的 {key} 不一致，以第一个分片为准[/yellow]")
+
+    config = dict(configs[0])
+    target_langs = config.get("target_langs") or []
+    evaluator_models = config.get("evaluator_models") or []
+
+    details: dict = {}
+    per_shard: dict = {}
+    for path, summary, shard_details in shards:
+        index = summary["config"]["shard"]["index"]
+        for model, items in shard_details.items():
+            details.setdefault(model, []).extend(SingleResult.from_dict(d) for d in items)
+        for r in summary.get("results", []):
+            per_shard.setdefault(r["model"], []).append({
+                "shard": index,
+                "source": str(path),
+                "success_rate": r.get("success_rate"),
+                "total_time_s": r.get("total_time_s"),
+                "eval_calls": r.get("eval_calls", 0),
+                "eval_prompt_tokens": r.get("eval_prompt_tokens", 0),
+            })
+
+    results = []
+    for model, items in details.items():
+        items.sort(key=lambda r: r.text_id if r.text_id is not None else -1)
+        model_shards = sorted(per_shard.get(model, []), key=lambda x: x["shard"])
+        # 分片并行执行，模型耗时取最慢的分片
+        total_time = max((x["total_time_s"] or 0 for x in model_shards), default=0.0)
+        summary = _aggregate_results(
+            model, items, evaluator_models, target_langs, total_time,
+            dedup=bool(config.get("dedup")), fanout=bool(config.get("fanout")),
+        )
+        summary["eval_calls"] = sum(x["eval_calls"] for x in model_shards)
+        summary["eval_prompt_tokens"] = sum(x["eval_prompt_tokens"] for x in model_shards)
+        summary["shards"] = model_shards
+        results.append(summary)
+    results.sort(key=lambda x: x["overall_avg_score"] or 0, reverse=True)
+
+    print_benchmark_table(results, evaluator_models)
+
+    config.update({
+        "models_count": len(results),
+        "shard": None,
+        "merged_shards": {"count": count, "indices": indices, "missing": missing},
+    })
+    test_time = max((summary.get("test_time") or "" for _, summary, _ in shards), default=None)
+    if args.output:
+        output_file = Path(args.output)
+    else:
+        output_file = Path(f"results/benchmark_{time.strftime('%Y%m%d_%H%M%S')}_merged.json")
+    details_file = output_file.parent / "details" / output_file.name
+
+    summary_output = {
+        "test_time": test_time,
+        "config": config,
+        "results": [{k: v for k, v in r.items() if k != "details"} for r in results],
+    }
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(summary_output, f, ensure_ascii=False, indent=2)
     details_file.parent.mkdir(parents=True, exist_ok=True)
     with open(details_file, "w", encoding="utf-8") as f:
-        json.dump(details_output, f, ensure_ascii=False, indent=2)
+        json.dump({"test_time": test_time, "config": config, "results": results},
+                  f, ensure_ascii=False, indent=2, default=_json_default)
 
-    console.print(f"\n[green]汇总结果: {output_file}[/green]")
+    console.print(f"\n[green]合并 {len(shards)}/{count} 个分片[/green]")
+    console.print(f"[green]汇总结果: {output_file}[/green]")
     console.print(f"[green]详细结果: {details_file}[/green]")
     return 0
 
 
+def cmd_results(args):
+    """结果库命令：导入与跨运行查询"""
+    from rich.table import Table
+    from rich import box
+
+    from llm_translate import results_db
+
+    conn = results_db.connect(args.db)
+    start = time.perf_counter()
+
+    if args.results_command == "ingest":
+        for path in args.paths:
+            if not Path(path).exists():
+                console.print(f"[red]错误: 文件不存在: {path}[/red]")
+                return 1
+            run_id, count = results_db.ingest(conn, path)
+            console.print(f"[green]✓ {path} → run {run_id} ({count} 行)[/green]")
+        return 0
+
+    if args.results_command == "runs":
+        rows = results_db.list_runs(conn)
+        table = Table(title="已导入的运行", box=box.ROUNDED, header_style="bold cyan")
+        for col in ("ID", "时间", "模型数", "术语表", "提示词", "来源"):
+            table.add_column(col)
+        for r in rows:
+            table.add_row(
+                str(r["run_id"]), r["test_time"] or "-", str(r["models"]),
+                r["glossary"] or "-", r["translate_prompt"] or "-", r["source"],
+            )
+    elif args.results_command == "trend":
+        rows = results_db.trend(conn, args.model, glossary=args.glossary, translate_prompt=args.translate_prompt)
+        table = Table(title=f"{args.model} 跨运行趋势", box=box.ROUNDED, header_style="bold cyan")
+        for col in ("ID", "时间", "术语表", "评分", "平均延迟", "成功率"):
+            table.add_column(col)
+        for r in rows:
+            score = f"{r['overall_avg_score']:.1f}" if r["overall_avg_score"] is not None else "N/A"
+            latency = f"{r['avg_latency_ms']:.0f}ms" if r["avg_latency_ms"] is not None else "N/A"
+            table.add_row(
+                str(r["run_id"]), r["test_time"] or "-", r["glossary"] or "-",
+                score, latency, r["success_rate"] or "-",
+            )
+    else:  # compare
+        rows = results_db.compare(
+            conn, args.model_a, args.model_b, args.lang,
+            run_id=args.run, min_diff=args.min_diff, limit=args.limit,
+        )
+        table = Table(
+            title=f"{args.model_a} 优于 {args.model_b} 的文本 ({args.lang})",
+            box=box.ROUNDED, header_style="bold cyan",
+        )
+        table.add_column("原文", width=30)
+        table.add_column("A", justify="center", no_wrap=True)
+        table.add_column("B", justify="center", no_wrap=True)
+        table.add_column("A 译文", width=30)
+        table.add_column("B 译文", width=30)
+        for r in rows:
+            table.add_row(
+                r["text"], f"{r['score_a']:.0f}", f"{r['score_b']:.0f}",
+                r["translation_a"] or "", r["translation_b"] or "",
+            )
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    console.print(table)
+    console.print(f"[dim]{len(rows)} 条记录 | 查询耗时 {elapsed_ms:.1f}ms[/dim]")
+    return 0
+
+
+def cmd_glossary(args):
+    """术语表命令：各渲染格式下术语段落的 prompt token 数，或打印某格式的渲染结果"""
+    from rich.table import Table
+    from rich import box
+
+    from llm_translate.glossary import (
+        GLOSSARY_FORMATS,
+        build_glossary_prompt,
+        get_glossary,
+        list_glossaries,
+        measure_glossary_formats,
+        token_counter_name,
+    )
+
+    glossary_ids = args.glossaries or list(list_glossaries())
+    unknown = [g for g in glossary_ids if not get_glossary(g)]
+    if unknown:
+        console.print(f"[red]错误: 未知术语表: {', '.join(unknown)}[/red]")
+        return 1
+
+    if args.show:
+        for glossary_id in glossary_ids:
+            print(build_glossary_prompt(args.targets, glossary_id, args.show))
+        return 0
+
+    table = Table(
+        title=f"术语表段落 prompt tokens ({len(args.targets)} 种语言)", box=box.ROUNDED, header_style="bold cyan",
+    )
+    table.add_column("术语表")
+    table.add_column("术语数", justify="right")
+    for fmt in GLOSSARY_FORMATS:
+        table.add_column(fmt, justify="right")
+    table.add_column("最省", justify="right")
+    report = {}
+    for glossary_id in glossary_ids:
+        counts = measure_glossary_formats(glossary_id, args.targets)
+        report[glossary_id] = counts
+        best = min(counts, key=counts.get)
+        saving = 1 - counts[best] / counts["table"] if counts["table"] else 0.0
+        table.add_row(
+            glossary_id, str(len(get_glossary(glossary_id))),
+            *[str(counts[fmt]) for fmt in GLOSSARY_FORMATS],
+            f"{best} (-{saving:.0%})",
+        )
+    console.print(table)
+    console.print(f"[dim]计数方式: {token_counter_name()}（pip install tiktoken 可精确计数）[/dim]")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"target_langs": args.targets, "token_counter": token_counter_name(), "tokens": report},
+                      f, ensure_ascii=False, indent=2)
+        console.print(f"[green]已保存到: {args.output}[/green]")
+    return 0
+
+
+# 启动路径上不应加载的重量级模块
+STARTUP_HEAVY_MODULES = ("httpx", "rich", "dotenv")
+
+
+def _time_command(argv: List[str], runs: int) -> List[float]:
+    """冷启动子进程运行 argv，返回每次耗时（毫秒）"""
+    import subprocess
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def cmd_startup_bench(args):
+    """CLI 启动耗时基准：子进程冷启动多次，中位数超出预算或加载了重量级模块时返回 1"""
+    import statistics
+    import subprocess
+
+    from rich.table import Table
+    from rich import box
+
+    python = sys.executable
+    cases = [
+        ("python -c pass", [python, "-c", "pass"]),
+        ("llm-translate models", [python, "-m", "llm_translate.cli", "models"]),
+        ("llm-translate --help", [python, "-m", "llm_translate.cli", "--help"]),
+    ]
+
+    table = Table(title="CLI 启动耗时", box=box.ROUNDED, header_style="bold cyan")
+    table.add_column("命令")
+    table.add_column("中位数", justify="right")
+    table.add_column("P90", justify="right")
+    table.add_column("最小", justify="right")
+    table.add_column("扣除解释器", justify="right")
+
+    _time_command(cases[1][1], 1)  # 预热：字节码缓存、文件系统缓存
+    interpreter_ms = None
+    failed = []
+    report = {}
+    for name, argv in cases:
+        timings = sorted(_time_command(argv, args.runs))
+        median = statistics.median(timings)
+        p90 = timings[min(len(timings) - 1, int(len(timings) * 0.9))]
+        if interpreter_ms is None:
+            interpreter_ms = median
+            overhead = "-"
+        else:
+            overhead = f"{median - interpreter_ms:.0f}ms"
+            if median > args.budget_ms:
+                failed.append(f"{name} 中位数 {median:.0f}ms > 预算 {args.budget_ms:.0f}ms")
+        report[name] = {"median_ms": median, "p90_ms": p90, "min_ms": timings[0]}
+        table.add_row(name, f"{median:.0f}ms", f"{p90:.0f}ms", f"{timings[0]:.0f}ms", overhead)
+
+    # 导入 CLI 模块后不应出现的重量级依赖
+    probe = (
+        "import sys, llm_translate.cli; "
+        f"print(','.join(m for m in {STARTUP_HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    loaded = subprocess.run([python, "-c", probe], capture_output=True, text=True).stdout.strip()
+    if loaded:
+        failed.append(f"导入 llm_translate.cli 时加载了: {loaded}")
+
+    console.print(table)
+    console.print(f"[dim]预算: {args.budget_ms:.0f}ms (中位数, {args.runs} 次)[/dim]")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"budget_ms": args.budget_ms, "results": report, "heavy_modules": loaded or None}, f, indent=2)
+    if failed:
+        for msg in failed:
+            console.print(f"[red]✗ {msg}[/red]")
+        return 1
+    console.print("[green]✓ 启动耗时在预算内[/green]")
+    return 0
+
+
+def cmd_serve(args):
+    """翻译服务命令"""
+    from rich.panel import Panel
+    from llm_translate.config import API_KEY
+
+    from llm_translate.server import create_server
+
+    if not API_KEY:
+        console.print("[red]错误: 未设置 API_KEY，请在 .env 文件中配置[/red]")
+        return 1
+
+    if args.metrics:
+        from llm_translate.metrics import enable_metrics
+        enable_metrics()
+
+    server, batcher = create_server(
+        host=args.host,
+        port=args.port,
+        model=args.model,
+        target_langs=args.targets,
+        glossary=args.glossary,
+        translate_prompt=args.translate_prompt,
+        window_ms=args.window_ms,
+        max_batch_size=args.max_batch_size,
+        max_batch_tokens=args.max_batch_tokens,
+        max_workers=args.concurrency,
+    )
+
+    console.print(Panel.fit("[bold blue]翻译服务 - 动态合批[/bold blue]", border_style="blue"))
+    console.print(f"监听: http://{args.host}:{args.port}/translate")
+    console.print(f"默认模型: {args.model}")
+    console.print(f"目标语言: {', '.join(args.targets)}")
+    console.print(f"合批窗口: {args.window_ms:.0f}ms | 批大小上限: {args.max_batch_size} | Token 预算: {args.max_batch_tokens}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+
+    stats = batcher.stats()
+    console.print(
+        f"\n[dim]批次: {stats['batches']} | 请求: {stats['requests']} | "
+        f"平均批大小: {stats['avg_batch_size']:.1f} | "
+        f"平均排队延迟: {stats['avg_queue_delay_ms']:.0f}ms (最大 {stats['max_queue_delay_ms']:.0f}ms)[/dim]"
+    )
+    return 0
+
+
+def cmd_loadtest(args):
+    """开环压测命令：按目标到达率发请求，输出延迟-吞吐曲线"""
+    from rich.panel import Panel
+    from rich.table import Table
+    from rich import box
+
+    from llm_translate.config import API_KEY
+    from llm_translate.loadtest import arrival_times, run_open_loop, samples_to_dicts, summarize, translate_sender
+
+    if not API_KEY and not args.replay:
+        console.print("[red]错误: 未设置 API_KEY，请在 .env 文件中配置[/red]")
+        return 1
+    if args.schedule == "step" and not args.rates:
+        console.print("[red]错误: step 需要 --rates（如 --rates 1 2 4 8）[/red]")
+        return 1
+
+    with open(args.data, "r", encoding="utf-8") as f:
+        test_data = json.load(f)
+    texts = test_data.get("titles", []) + test_data.get("descriptions", [])
+    if not texts:
+        console.print(f"[red]错误: 测试数据为空: {args.data}[/red]")
+        return 1
+
+    try:
+        times, windows = arrival_times(
+            args.schedule, args.rate, args.duration, rates=args.rates, step_duration=args.step_duration,
+            max_rate=args.max_rate, windows=args.windows, seed=args.seed,
+        )
+    except ValueError as e:
+        console.print(f"[red]错误: {e}[/red]")
+        return 1
+
+    _maybe_start_metrics(args)
+    cassette = _maybe_use_cassette(args)
+
+    console.print(Panel.fit("[bold blue]开环压测[/bold blue]", border_style="blue"))
+    console.print(f"负载曲线: {args.schedule} | 请求数: {len(times)} | 时长: {windows[-1].end:.0f}s | 每请求文本: {args.texts_per_request}")
+    console.print(f"目标语言: {', '.join(args.targets)} | 并发上限: {args.max_in_flight}")
+
+    def fmt(value):
+        return f"{value:.0f}ms" if value is not None else "-"
+
+    report = {}
+    for model in args.models:
+        console.print(f"\n[cyan]压测 {get_model_short_name(model)}...[/cyan]")
+        send = translate_sender(
+            texts, model, args.targets, args.texts_per_request,
+            glossary=args.glossary, translate_prompt=args.translate_prompt,
+            glossary_format=args.glossary_format,
+        )
+        samples = run_open_loop(send, times, args.max_in_flight)
+        summary = summarize(samples, windows)
+        if args.save_samples:
+            summary["samples"] = samples_to_dicts(samples)
+        report[model] = summary
+
+        table = Table(title=f"{get_model_short_name(model)} 延迟-吞吐曲线", box=box.ROUNDED, header_style="bold cyan")
+        for col in ("窗口", "offered", "完成/s", "错误率", "p50", "p95", "p99", "排队"):
+            table.add_column(col, justify="right")
+        for point in summary["curve"]:
+            table.add_row(
+                f"{point['start_s']:.0f}-{point['end_s']:.0f}s",
+                f"{point['offered_rps']:.2f}",
+                f"{point['completed_rps']:.2f}",
+                f"{point['error_rate']:.1%}",
+                fmt(point["latency_p50_ms"]),
+                fmt(point["latency_p95_ms"]),
+                fmt(point["latency_p99_ms"]),
+                fmt(point["avg_dispatch_lag_ms"]),
+            )
+        console.print(table)
+        saturation = summary["saturation"]
+        if saturation:
+            sustained = saturation["max_sustained_rps"]
+            console.print(
+                f"[yellow]饱和: offered {saturation['offered_rps']:.2f} req/s ({', '.join(saturation['reasons'])})"
+                f"{f'，最大可持续 {sustained:.2f} req/s' if sustained is not None else ''}[/yellow]"
+            )
+        else:
+            console.print("[green]未达到饱和[/green]")
+
+    output_file = Path(args.output or f"results/loadtest_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump({
+            "config": {
+                "data_file": args.data,
+                "schedule": args.schedule,
+                "rate": args.rate,
+                "rates": args.rates,
+                "max_rate": args.max_rate,
+                "duration": args.duration,
+                "step_duration": args.step_duration,
+                "texts_per_request": args.texts_per_request,
+                "target_langs": args.targets,
+                "max_in_flight": args.max_in_flight,
+                "seed": args.seed,
+            },
+            "models": report,
+        }, f, ensure_ascii=False, indent=2)
+    console.print(f"\n[green]结果已保存到: {output_file}[/green]")
+    _finish_cassette(cassette)
+    return 0
+
+
+def _batch_provider(args):
+    from llm_translate.batch import get_provider
+
+    if args.provider == "local":
+        return get_provider("local", root=args.local_root, concurrency=args.concurrency)
+    return get_provider("gateway")
+
+
+def _print_batch_job(job) -> None:
+    counts = job.request_counts
+    line = f"{job.id}: {job.status} | 请求 {counts.get('completed', 0)}/{counts.get('total', '?')} 完成"
+    if counts.get("failed"):
+        line += f", {counts['failed']} 失败"
+    console.print(f"[dim]{line}[/dim]")
+
+
+def _fetch_batch(args, provider, job_dir: Path, job) -> int:
+    """下载结果、映射回 MultiTranslateResult 并写出/打印汇总"""
+    from llm_translate.batch import load_meta, parse_batch_output
+    from llm_translate.validate import issue_counts
+
+    meta, requests = load_meta(job_dir)
+    output_path, error_path = provider.download(job, job_dir)
+    end = job.completed_at or time.time()
+    latency_ms = (end - (job.created_at or meta["submitted_at"])) * 1000
+    results = parse_batch_output(requests, output_path, error_path, latency_ms)
+
+    texts = sum(len(r.source_texts) for r in results)
+    ok = [r for r in results if r.success]
+    issues = [issue for r in ok for issue in (r.invalid_cells or [])]
+    summary = {
+        "batch_id": job.id,
+        "provider": meta["provider"],
+        "status": job.status,
+        "requests": len(results),
+        "successful_requests": len(ok),
+        "texts": texts,
+        "prompt_tokens": sum(r.prompt_tokens for r in results),
+        "completion_tokens": sum(r.completion_tokens for r in results),
+        "end_to_end_ms": latency_ms,
+        "invalid_cells": len(issues),
+        "invalid_reasons": issue_counts(issues),
+    }
+    console.print(
+        f"[green]请求 {len(ok)}/{len(results)} 成功[/green] | 文本 {texts} | "
+        f"Tokens {summary['prompt_tokens']}+{summary['completion_tokens']} | "
+        f"端到端 {latency_ms / 1000:.1f}s | 校验未通过 {len(issues)} 个单元格"
+    )
+    for r in results:
+        if not r.success:
+            console.print(f"[red]✗ {r.error}[/red]")
+
+    output = args.output or str(job_dir / "results.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(
+            {"summary": summary, "results": [r.to_dict() for r in results]},
+            f, ensure_ascii=False, indent=2, default=_json_default,
+        )
+    console.print(f"[green]结果已保存到: {output}[/green]")
+    return 0 if len(ok) == len(results) else 1
+
+
+def cmd_batch(args):
+    """批处理命令：以 OpenAI batch 格式提交翻译任务、查询状态、取回结果"""
+    from llm_translate.batch import (
+        INPUT_FILE,
+        build_batch_requests,
+        save_meta,
+        wait_for_batch,
+        write_batch_input,
+    )
+    from llm_translate.config import API_KEY
+
+    if not API_KEY and not getattr(args, "replay", None):
+        console.print("[red]错误: 未设置 API_KEY，请在 .env 文件中配置[/red]")
+        return 1
+
+    cassette = _maybe_use_cassette(args)
+    provider = _batch_provider(args)
+    work_dir = Path(args.dir)
+
+    if args.batch_command == "submit":
+        if args.data:
+            with open(args.data, "r", encoding="utf-8") as f:
+                test_data = json.load(f)
+            texts = test_data.get("titles", []) + test_data.get("descriptions", [])
+        elif args.file:
+            texts = [line.strip() for line in Path(args.file).read_text(encoding="utf-8").splitlines() if line.strip()]
+        else:
+            texts = args.texts
+        if not texts:
+            console.print("[red]错误: 请提供要翻译的文本[/red]")
+            return 1
+
+        requests = build_batch_requests(
+            texts, args.source, args.targets, args.model, args.chunk_size,
+            glossary=args.glossary, translate_prompt=args.translate_prompt,
+            glossary_format=args.glossary_format,
+        )
+        input_path = write_batch_input(requests, work_dir / "pending_input.jsonl")
+        job = provider.submit(input_path, metadata={"model": args.model})
+        job_dir = work_dir / job.id
+        save_meta(job_dir, job, provider.name, requests)
+        input_path.replace(job_dir / INPUT_FILE)
+        console.print(
+            f"[green]✓ 已提交批处理任务 {job.id}[/green] ({provider.name}) | "
+            f"{len(texts)} 条文本 → {len(requests)} 个请求 | 目录: {job_dir}"
+        )
+        if not args.wait:
+            console.print(f"[dim]查询: llm-translate batch status {job.id} | 取回: llm-translate batch fetch {job.id}[/dim]")
+            _finish_cassette(cassette)
+            return 0
+    else:
+        job_dir = work_dir / args.batch_id
+        if not job_dir.exists():
+            console.print(f"[red]错误: 找不到批处理任务目录: {job_dir}[/red]")
+            return 1
+        job = provider.poll(args.batch_id)
+        if args.batch_command == "status":
+            _print_batch_job(job)
+            return 0
+
+    try:
+        job = wait_for_batch(provider, job.id, args.poll_interval, args.timeout, on_poll=_print_batch_job)
+    except TimeoutError as e:
+        console.print(f"[yellow]{e}[/yellow]")
+        return 1
+    code = _fetch_batch(args, provider, job_dir, job)
+    _finish_cassette(cassette)
+    return code
+
+
+def _queue_payloads(args) -> List[dict]:
+    """queue add 的输入 -> 任务 payload 列表（每条文本一个任务）"""
+    if args.data:
+        with open(args.data, "r", encoding="utf-8") as f:
+            test_data = json.load(f)
+        items = [(f"title:{i}", t) for i, t in enumerate(test_data.get("titles", []))]
+        items += [(f"description:{i}", d) for i, d in enumerate(test_data.get("descriptions", []))]
+    elif args.file:
+        lines = Path(args.file).read_text(encoding="utf-8").splitlines()
+        items = [(f"line:{i + 1}", line.strip()) for i, line in enumerate(lines) if line.strip()]
+    else:
+        items = [(f"arg:{i}", t) for i, t in enumerate(args.texts)]
+    return [
+        {
+            "ref": ref,
+            "text": text,
+            "model": args.model,
+            "langs": args.targets,
+            "source_lang": args.source,
+            "glossary": args.glossary,
+            "translate_prompt": args.translate_prompt,
+        }
+        for ref, text in items
+    ]
+
+
+def cmd_queue(args):
+    """任务队列命令：加入任务、查看状态、处理死信、导出结果"""
+    from rich.table import Table
+    from rich import box
+
+    from llm_translate.jobqueue import open_queue
+
+    queue = open_queue(args.queue)
+
+    if args.queue_command == "add":
+        payloads = _queue_payloads(args)
+        if not payloads:
+            console.print("[red]错误: 请提供要翻译的文本[/red]")
+            return 1
+        count = queue.enqueue(payloads, max_attempts=args.max_attempts)
+        console.print(f"[green]✓ 已加入 {count} 个任务 → {args.queue}[/green]")
+    elif args.queue_command == "dead":
+        rows = queue.dead_letters(args.limit)
+        table = Table(title="死信任务", box=box.ROUNDED, header_style="bold cyan")
+        table.add_column("ID", justify="right", no_wrap=True)
+        table.add_column("原文", width=30)
+        table.add_column("尝试", justify="center", no_wrap=True)
+        table.add_column("最后错误", width=30)
+        for r in rows:
+            table.add_row(str(r["id"]), json.loads(r["payload"])["text"], str(r["attempts"]), r["last_error"] or "-")
+        console.print(table)
+    elif args.queue_command == "requeue":
+        console.print(f"[green]✓ {queue.requeue_dead()} 个死信任务已重新排队[/green]")
+    elif args.queue_command == "export":
+        count = 0
+        with open(args.output, "w", encoding="utf-8") as f:
+            for r in queue.results():
+                record = {"job_id": r["id"], **json.loads(r["payload"]), **json.loads(r["result"] or "{}")}
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+        console.print(f"[green]✓ 已导出 {count} 条结果到: {args.output}[/green]")
+
+    stats = queue.stats()
+    console.print(
+        f"[dim]待处理 {stats['pending']} | 租用中 {stats['leased']} | "
+        f"完成 {stats['done']} | 死信 {stats['dead']}[/dim]"
+    )
+    queue.close()
+    return 0
+
+
+def _process_jobs(queue, jobs, owner: str, args) -> dict:
+    """翻译一批已领取的同组任务并逐个确认，返回 {done, retried, dead, lost}"""
+    from llm_translate.translator import multi_translate
+
+    counts = {"done": 0, "retried": 0, "dead": 0, "lost": 0}
+    payload = jobs[0].payload
+
+    # 心跳：批次耗时接近可见性超时时续租，避免仍在处理的任务被其他 worker 重复领取
+    finished = threading.Event()
+    job_ids = [job.id for job in jobs]
+
+    def heartbeat():
+        while not finished.wait(args.visibility_timeout / 3):
+            queue.extend(job_ids, owner, args.visibility_timeout)
+        queue.close()  # 关闭心跳线程自己的连接
+
+    beat = threading.Thread(target=heartbeat, daemon=True)
+    beat.start()
+    try:
+        result = multi_translate(
+            texts=[job.payload["text"] for job in jobs],
+            source_lang=payload.get("source_lang") or "en",
+            target_langs=payload.get("langs"),
+            model=payload["model"],
+            glossary=payload.get("glossary"),
+            translate_prompt=payload.get("translate_prompt"),
+            repair=not args.no_repair,
+        )
+        error = result.error
+    except Exception as e:
+        result, error = None, f"{type(e).__name__}: {e}"
+    finally:
+        finished.set()
+        beat.join()
+
+    unresolved = {}
+    if result is not None:
+        for cell in result.unresolved_cells or []:
+            unresolved.setdefault(cell.index, []).append(f"{cell.lang}:{cell.reason}")
+
+    records = []
+    for i, job in enumerate(jobs):
+        if result is not None and result.success and i not in unresolved:
+            record = {
+                "translations": {lang: values[i] for lang, values in result.translations.items()},
+                "model": result.model,
+                "latency_ms": result.latency_ms,
+                "attempts": job.attempts,
+            }
+            if queue.ack(job.id, owner, record):
+                counts["done"] += 1
+                records.append({"job_id": job.id, **job.payload, **record})
+            else:
+                counts["lost"] += 1  # 租约已过期并被他人领取
+            continue
+        reason = error or "校验未通过: " + ", ".join(unresolved.get(i, []))
+        # 指数退避：第 n 次失败后等待 retry_delay * 2^(n-1) 秒
+        status = queue.nack(job.id, owner, reason, retry_delay=args.retry_delay * 2 ** (job.attempts - 1))
+        counts["retried" if status == "pending" else status] += 1
+
+    if records and args.output:
+        lines = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        with _worker_output_lock, open(args.output, "a", encoding="utf-8") as f:
+            f.write(lines)
+    return counts
+
+
+_worker_output_lock = threading.Lock()
+
+
+def cmd_worker(args):
+    """worker 命令：循环领取任务批次，翻译后写回结果"""
+    from rich.panel import Panel
+    from llm_translate.config import API_KEY
+    from llm_translate.jobqueue import open_queue, worker_id
+
+    if not API_KEY:
+        console.print("[red]错误: 未设置 API_KEY，请在 .env 文件中配置[/red]")
+        return 1
+
+    _maybe_start_metrics(args)
+    queue = open_queue(args.queue)
+
+    console.print(Panel.fit("[bold blue]翻译 Worker - 任务队列[/bold blue]", border_style="blue"))
+    console.print(f"队列: {args.queue}")
+    console.print(
+        f"批大小: {args.batch_size} | 线程: {args.concurrency} | "
+        f"可见性超时: {args.visibility_timeout:.0f}s"
+    )
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    totals = {"batches": 0, "done": 0, "retried": 0, "dead": 0, "lost": 0}
+    start = time.perf_counter()
+
+    def loop():
+        owner = worker_id()
+        while not stop.is_set():
+            if args.max_jobs and totals["done"] + totals["dead"] >= args.max_jobs:
+                break
+            jobs = queue.lease(owner, args.batch_size, args.visibility_timeout)
+            if not jobs:
+                if args.drain:
+                    stats = queue.stats()
+                    if stats["pending"] == 0 and stats["leased"] == 0:
+                        break
+                stop.wait(args.poll_interval)
+                continue
+            batch_start = time.perf_counter()
+            counts = _process_jobs(queue, jobs, owner, args)
+            with lock:
+                totals["batches"] += 1
+                for key, value in counts.items():
+                    totals[key] += value
+            line = f"批次 {len(jobs)} 条 ({jobs[0].payload['model']}) → 完成 {counts['done']}"
+            if counts["retried"]:
+                line += f" | 重试 {counts['retried']}"
+            if counts["dead"]:
+                line += f" | 死信 {counts['dead']}"
+            console.print(f"[dim]{line} | {(time.perf_counter() - batch_start) * 1000:.0f}ms[/dim]")
+        queue.close()
+
+    threads = [threading.Thread(target=loop) for _ in range(max(args.concurrency, 1))]
+    for t in threads:
+        t.start()
+    try:
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(0.5)
+    except KeyboardInterrupt:
+        # 处理中的批次完成后退出；被中断的租约到期后由其他 worker 接手
+        stop.set()
+        for t in threads:
+            t.join()
+
+    elapsed = time.perf_counter() - start
+    stats = queue.stats()
+    queue.close()
+    console.print(
+        f"\n[green]完成 {totals['done']} 个任务[/green] | 批次 {totals['batches']} | "
+        f"重试 {totals['retried']} | 死信 {totals['dead']} | 租约丢失 {totals['lost']} | "
+        f"{totals['done'] / elapsed:.1f} 条/秒"
+    )
+    console.print(
+        f"[dim]队列: 待处理 {stats['pending']} | 租用中 {stats['leased']} | "
+        f"完成 {stats['done']} | 死信 {stats['dead']}[/dim]"
+    )
+    return 0
+
+
 def main():
     """主入口"""
     parser = argparse.ArgumentParser(
@@ -627,6 +2664,8 @@ def main():
         description="LLM 多语言翻译基准测试工具",
     )
     subparsers = parser.add_subparsers(dest="command", help="可用命令")
+    # 同 glossary.GLOSSARY_FORMATS（构建参数时不导入术语表模块）
+    glossary_formats = ["table", "tsv", "lists", "grouped"]
 
     # translate 命令
     p_translate = subparsers.add_parser("translate", help="翻译文本")
@@ -641,11 +2680,20 @@ def main():
     p_translate.add_argument("-s", "--source", default="en", help="源语言代码")
     p_translate.add_argument("-m", "--model", default="gemini-2.5-flash-lite", help="使用的模型")
     p_translate.add_argument("-g", "--glossary", help="术语表 (fashion_v4, fashion_hard, fashion_core, fashion_full, ecommerce)")
+    p_translate.add_argument(
+        "--glossary-format", choices=glossary_formats, default="table",
+        help="术语表渲染格式 (默认: table；各格式的 token 数见 llm-translate glossary)",
+    )
     p_translate.add_argument("-o", "--output", help="保存结果到 JSON 文件")
     p_translate.add_argument("-e", "--eval", action="store_true", help="使用 Opus 4.5 评估质量")
     p_translate.add_argument("-tp", "--translate-prompt", help="翻译提示词模板 (名称或文件路径)")
     p_translate.add_argument("-ep", "--evaluate-prompt", help="评估提示词模板 (名称或文件路径)")
     p_translate.add_argument("-em", "--evaluator-model", default=EVALUATOR_MODEL, help="评估模型 (默认: Opus 4.5)")
+    p_translate.add_argument("--metrics-port", type=int, help="启用 Prometheus 指标端点 (如 9100)")
+    p_translate.add_argument("--fanout", type=_parse_fanout, help="把目标语言拆成 K 个并行请求 (整数或 auto)")
+    p_translate.add_argument("--dedup", action="store_true", help="相同文本去重后只翻译唯一文本（仅 Unicode NFC，大小写/空白不同的文本各自翻译）")
+    p_translate.add_argument("--repair", action="store_true", help="校验未通过的单元格（占位符、HTML、缺失、未翻译）定向重译一次")
+    _add_cassette_args(p_translate)
     p_translate.set_defaults(func=cmd_translate)
 
     # benchmark 命令
@@ -673,25 +2721,277 @@ def main():
         default=1,
         help="每个模型的并发度 (默认: 1，即串行)"
     )
+    p_benchmark.add_argument(
+        "--adaptive",
+        nargs="?",
+        const="model",
+        choices=["model", "provider"],
+        help="自适应并发 (AIMD)，按模型或供应商调整；-c 作为初始并发"
+    )
+    p_benchmark.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=32,
+        help="自适应并发的上限 (默认: 32)"
+    )
     p_benchmark.add_argument(
         "-g", "--glossary",
         help="术语表 (fashion_v4, fashion_hard, fashion_core, fashion_full, ecommerce)，fashion_v4 支持智能匹配"
     )
+    p_benchmark.add_argument(
+        "--glossary-format", nargs="+", choices=glossary_formats, default=["table"],
+        help="术语表渲染格式 (默认: table)；给出多个时各跑一次并对比输入 tokens/评分",
+    )
     p_benchmark.add_argument(
         "-o", "--output",
         default=None,
         help="输出文件 (默认: results/benchmark_YYYYMMDD_HHMMSS.json)"
     )
-    p_benchmark.add_argument("-tp", "--translate-prompt", help="翻译提示词模板 (名称或文件路径)")
+    p_benchmark.add_argument(
+        "--format",
+        choices=["json", "jsonl"],
+        default="json",
+        help="明细格式: json (单个 JSON 文件) 或 jsonl (按模型分文件、逐行增量写入的 gzip JSONL，默认: json)"
+    )
+    p_benchmark.add_argument(
+        "-tp", "--translate-prompt", nargs="+",
+        help="翻译提示词模板 (名称或文件路径)；给出多个时各跑一次并对比各响应协议的输出 tokens/延迟/评分",
+    )
     p_benchmark.add_argument("-ep", "--evaluate-prompt", help="评估提示词模板 (名称或文件路径)")
     p_benchmark.add_argument("-em", "--evaluator-model", nargs="+", default=[EVALUATOR_MODEL], help="评估模型，支持多个 (默认: Opus 4.5)")
+    p_benchmark.add_argument(
+        "--eval-batch",
+        type=int,
+        default=1,
+        help="批量评估：每次评估调用最多合并的文本数 (默认: 1，即逐条评估)"
+    )
+    p_benchmark.add_argument(
+        "--eval-batch-tokens",
+        type=int,
+        default=6000,
+        help="批量评估：每批原文+译文的 token 预算 (默认: 6000)"
+    )
+    p_benchmark.add_argument(
+        "--eval-concurrency",
+        type=int,
+        help="评估调用的总并发 (默认: 并发度 × 模型数 × 评估模型数)"
+    )
+    p_benchmark.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="流水线模式：翻译/校验/评估/写入分阶段并发，阶段间用有界队列连接"
+    )
+    p_benchmark.add_argument(
+        "--queue-size",
+        type=int,
+        default=32,
+        help="流水线各阶段队列容量 (默认: 32)"
+    )
+    p_benchmark.add_argument(
+        "--sample-eval",
+        action="store_true",
+        help="抽样评估：按随机顺序评估，置信区间足够窄或排名确定后停止评估该模型"
+    )
+    p_benchmark.add_argument("--ci-width", type=float, default=2.0, help="抽样评估的置信区间宽度目标 (默认: 2.0 分)")
+    p_benchmark.add_argument("--min-eval-samples", type=int, default=20, help="抽样评估的最少评估条数 (默认: 20)")
+    p_benchmark.add_argument("--sample-seed", type=int, default=0, help="抽样评估的随机种子 (默认: 0)")
+    p_benchmark.add_argument(
+        "--tournament",
+        action="store_true",
+        help="锦标赛模式：小样本起步，每轮淘汰末尾模型并让存活者的文本量翻倍"
+    )
+    p_benchmark.add_argument("--tournament-initial", type=int, default=50, help="锦标赛第一轮文本数 (默认: 50)")
+    p_benchmark.add_argument("--tournament-drop", type=float, default=0.5, help="每轮按评分淘汰的比例 (默认: 0.5)")
+    p_benchmark.add_argument("--max-latency-ms", type=float, help="锦标赛约束：平均延迟超过该值即淘汰")
+    p_benchmark.add_argument("--max-tokens-per-text", type=float, help="锦标赛约束：平均每条 Tokens 超过该值即淘汰")
+    p_benchmark.add_argument("--metrics-port", type=int, help="启用 Prometheus 指标端点 (如 9100)")
+    p_benchmark.add_argument(
+        "--dedup",
+        action="store_true",
+        help="源文本去重：相同的文本每个模型只翻译、评估一次，结果回填到所有出现位置"
+    )
+    p_benchmark.add_argument(
+        "--repair",
+        action="store_true",
+        help="校验未通过的单元格定向重译一次（额外的模型调用；不开启时仍会校验并统计失败率）"
+    )
+    p_benchmark.add_argument(
+        "--tm",
+        metavar="PATH",
+        help="翻译记忆文件 (JSONL)：精确命中直接复用历史译文，相似文本注入参考译文，新译文写回"
+    )
+    p_benchmark.add_argument("--tm-threshold", type=float, default=0.9, help="相似度达到该值时改用 --tm-cheap-model (默认: 0.9)")
+    p_benchmark.add_argument("--tm-cheap-model", help="高相似度文本使用的便宜模型（不指定则仍用被测模型）")
+    p_benchmark.add_argument("--fanout", type=_parse_fanout, help="把目标语言拆成 K 个并行请求 (整数或 auto)")
+    p_benchmark.add_argument("--fanout-compare", action="store_true", help="同时运行单次调用，报告 fan-out 的延迟/Token 权衡")
+    p_benchmark.add_argument(
+        "--shard",
+        type=_parse_shard,
+        metavar="i/N",
+        help="只运行第 i 个分片（i 从 0 开始，共 N 片），按 (模型, 文本) 哈希划分；用 merge 命令合并"
+    )
+    _add_cassette_args(p_benchmark)
     p_benchmark.set_defaults(func=cmd_benchmark)
 
+    # serve 命令
+    p_serve = subparsers.add_parser("serve", help="启动 HTTP 翻译服务（动态合批）")
+    p_serve.add_argument("--host", default="0.0.0.0", help="监听地址")
+    p_serve.add_argument("--port", type=int, default=8000, help="监听端口 (默认: 8000)")
+    p_serve.add_argument("-m", "--model", default="gemini-2.5-flash-lite", help="默认模型")
+    p_serve.add_argument(
+        "-t", "--targets",
+        nargs="+",
+        default=DEFAULT_TARGET_LANGS,
+        help="默认目标语言代码列表"
+    )
+    p_serve.add_argument("-g", "--glossary", help="默认术语表")
+    p_serve.add_argument("-tp", "--translate-prompt", help="翻译提示词模板 (名称或文件路径)")
+    p_serve.add_argument("--window-ms", type=float, default=50.0, help="合批等待窗口毫秒数 (默认: 50)")
+    p_serve.add_argument("--max-batch-size", type=int, default=32, help="单批最多文本数 (默认: 32)")
+    p_serve.add_argument("--max-batch-tokens", type=int, default=2000, help="单批源文本 token 预算 (默认: 2000)")
+    p_serve.add_argument("-c", "--concurrency", type=int, default=8, help="同时执行的批次数 (默认: 8)")
+    p_serve.add_argument("--metrics", action="store_true", help="在 /metrics 暴露 Prometheus 指标")
+    p_serve.set_defaults(func=cmd_serve)
+
+    # results 命令
+    # merge 命令
+    p_merge = subparsers.add_parser("merge", help="合并 benchmark --shard 各分片的结果")
+    p_merge.add_argument("paths", nargs="+", help="各分片的汇总结果文件")
+    p_merge.add_argument("-o", "--output", help="合并后的汇总文件 (明细写入同目录 details/)")
+    p_merge.set_defaults(func=cmd_merge)
+
+    p_results = subparsers.add_parser("results", help="结果库：导入基准测试结果并跨运行查询")
+    p_results.add_argument("--db", default="results/results.db", help="结果库路径 (默认: results/results.db)")
+    results_sub = p_results.add_subparsers(dest="results_command", required=True)
+    p_ingest = results_sub.add_parser("ingest", help="导入汇总/详细结果 JSON 或 jsonl 结果目录")
+    p_ingest.add_argument("paths", nargs="+", help="结果文件或目录")
+    results_sub.add_parser("runs", help="列出已导入的运行")
+    p_trend = results_sub.add_parser("trend", help="某模型在各次运行中的评分/延迟变化")
+    p_trend.add_argument("model", help="模型名或短名")
+    p_trend.add_argument("-g", "--glossary", help="只看使用该术语表的运行")
+    p_trend.add_argument("-tp", "--translate-prompt", help="只看使用该翻译提示词的运行")
+    p_compare = results_sub.add_parser("compare", help="同一文本同一语言下模型 A 优于 B 的文本")
+    p_compare.add_argument("model_a", help="模型 A")
+    p_compare.add_argument("model_b", help="模型 B")
+    p_compare.add_argument("-l", "--lang", required=True, help="语言代码 (如 de)")
+    p_compare.add_argument("--run", type=int, help="只比较某次运行")
+    p_compare.add_argument("--min-diff", type=float, default=0.0, help="最小分差 (默认: 0)")
+    p_compare.add_argument("--limit", type=int, default=20, help="最多显示条数 (默认: 20)")
+    p_results.set_defaults(func=cmd_results)
+
+    # loadtest 命令
+    p_loadtest = subparsers.add_parser("loadtest", help="开环压测：按目标到达率发请求，输出延迟-吞吐曲线与饱和点")
+    p_loadtest.add_argument("-d", "--data", default="data/ecommerce.json", help="测试数据文件")
+    p_loadtest.add_argument("-m", "--models", nargs="+", default=["gemini-2.5-flash-lite"], help="要压测的模型（依次运行）")
+    p_loadtest.add_argument("-t", "--targets", nargs="+", default=DEFAULT_TARGET_LANGS, help="目标语言代码列表")
+    p_loadtest.add_argument("--schedule", choices=["constant", "poisson", "step", "ramp"], default="poisson",
+                            help="负载曲线 (默认: poisson)")
+    p_loadtest.add_argument("--rate", type=_non_negative_rate, default=1.0, help="到达率 req/s (>0)；ramp 的起始速率，可为 0 (默认: 1)")
+    p_loadtest.add_argument("--max-rate", type=_non_negative_rate, help="ramp 的终止速率")
+    p_loadtest.add_argument("--rates", type=_non_negative_rate, nargs="+", help="step 的各级速率，如 1 2 4 8")
+    p_loadtest.add_argument("--duration", type=float, default=60.0, help="constant/poisson/ramp 的时长秒数 (默认: 60)")
+    p_loadtest.add_argument("--step-duration", type=float, default=30.0, help="step 每级的秒数 (默认: 30)")
+    p_loadtest.add_argument("--windows", type=int, default=10, help="constant/poisson/ramp 的统计窗口数 (默认: 10)")
+    p_loadtest.add_argument("--texts-per-request", type=int, default=1, help="每个请求翻译的文本数 (默认: 1)")
+    p_loadtest.add_argument("--max-in-flight", type=int, default=256, help="同时进行的请求上限，超出在本地排队 (默认: 256)")
+    p_loadtest.add_argument("-g", "--glossary", help="术语表")
+    p_loadtest.add_argument("--glossary-format", choices=glossary_formats, default="table", help="术语表渲染格式")
+    p_loadtest.add_argument("-tp", "--translate-prompt", help="翻译提示词模板 (名称或文件路径)")
+    p_loadtest.add_argument("--seed", type=int, help="poisson 到达的随机种子")
+    p_loadtest.add_argument("--save-samples", action="store_true", help="在结果中保存每个请求的测量")
+    p_loadtest.add_argument("-o", "--output", help="结果 JSON (默认: results/loadtest_<时间>.json)")
+    p_loadtest.add_argument("--metrics-port", type=int, help="启用 Prometheus 指标端点 (如 9100)")
+    _add_cassette_args(p_loadtest)
+    p_loadtest.set_defaults(func=cmd_loadtest)
+
+    # batch 命令
+    p_batch = subparsers.add_parser("batch", help="批处理任务：以 OpenAI batch 格式异步提交翻译（网关或本地替身）")
+    p_batch.add_argument("--provider", choices=["gateway", "local"], default="gateway",
+                         help="gateway: 网关 /v1/batches；local: 本地文件替身，逐条执行请求 (默认: gateway)")
+    p_batch.add_argument("--dir", default="results/batches", help="任务目录（输入、元数据、结果）(默认: results/batches)")
+    p_batch.add_argument("--local-root", default="results/batch_local", help="本地替身的存储目录 (默认: results/batch_local)")
+    p_batch.add_argument("-c", "--concurrency", type=int, default=4, help="本地替身执行请求的并发数 (默认: 4)")
+    p_batch.add_argument("--poll-interval", type=float, default=30.0, help="轮询间隔秒数 (默认: 30)")
+    p_batch.add_argument("--timeout", type=float, help="等待完成的最长秒数")
+    p_batch.add_argument("-o", "--output", help="结果 JSON（默认写入任务目录 results.json）")
+    _add_cassette_args(p_batch)
+    batch_sub = p_batch.add_subparsers(dest="batch_command", required=True)
+    p_submit = batch_sub.add_parser("submit", help="构建输入 JSONL 并提交")
+    p_submit.add_argument("texts", nargs="*", help="要翻译的文本")
+    p_submit.add_argument("-f", "--file", help="从文本文件读取（每行一条）")
+    p_submit.add_argument("-d", "--data", help="从测试数据 JSON 读取 (titles/descriptions)")
+    p_submit.add_argument("-t", "--targets", nargs="+", default=DEFAULT_TARGET_LANGS, help="目标语言代码列表")
+    p_submit.add_argument("-s", "--source", default="en", help="源语言代码")
+    p_submit.add_argument("-m", "--model", default="gemini-2.5-flash-lite", help="使用的模型")
+    p_submit.add_argument("-g", "--glossary", help="术语表")
+    p_submit.add_argument("--glossary-format", choices=glossary_formats, default="table", help="术语表渲染格式")
+    p_submit.add_argument("-tp", "--translate-prompt", help="翻译提示词模板 (名称或文件路径)")
+    p_submit.add_argument("--chunk-size", type=int, default=20, help="每个请求包含的文本数 (默认: 20)")
+    p_submit.add_argument("--wait", action="store_true", help="提交后等待完成并取回结果")
+    p_status = batch_sub.add_parser("status", help="查询任务状态")
+    p_status.add_argument("batch_id", help="任务 ID")
+    p_fetch = batch_sub.add_parser("fetch", help="等待完成并取回结果，映射回每组文本的翻译结果")
+    p_fetch.add_argument("batch_id", help="任务 ID")
+    p_batch.set_defaults(func=cmd_batch)
+
+    # queue / worker 命令
+    p_queue = subparsers.add_parser("queue", help="任务队列：加入翻译任务、查看状态、处理死信、导出结果")
+    p_queue.add_argument("--queue", default="results/jobs.db", help="队列数据库路径 (默认: results/jobs.db)")
+    queue_sub = p_queue.add_subparsers(dest="queue_command", required=True)
+    p_add = queue_sub.add_parser("add", help="加入任务（每条文本一个任务）")
+    p_add.add_argument("texts", nargs="*", help="要翻译的文本")
+    p_add.add_argument("-f", "--file", help="从文本文件读取（每行一条）")
+    p_add.add_argument("-d", "--data", help="从测试数据 JSON 读取 (titles/descriptions)")
+    p_add.add_argument("-t", "--targets", nargs="+", default=DEFAULT_TARGET_LANGS, help="目标语言代码列表")
+    p_add.add_argument("-s", "--source", default="en", help="源语言代码")
+    p_add.add_argument("-m", "--model", default="gemini-2.5-flash-lite", help="使用的模型")
+    p_add.add_argument("-g", "--glossary", help="术语表")
+    p_add.add_argument("-tp", "--translate-prompt", help="翻译提示词模板 (名称或文件路径)")
+    p_add.add_argument("--max-attempts", type=int, default=3, help="最大尝试次数，超过后进入死信 (默认: 3)")
+    queue_sub.add_parser("stats", help="各状态任务数")
+    p_dead = queue_sub.add_parser("dead", help="列出死信任务")
+    p_dead.add_argument("--limit", type=int, default=20, help="最多显示条数 (默认: 20)")
+    queue_sub.add_parser("requeue", help="死信任务重新排队")
+    p_export = queue_sub.add_parser("export", help="导出已完成任务的结果 (JSONL)")
+    p_export.add_argument("-o", "--output", required=True, help="输出 JSONL 文件")
+    p_queue.set_defaults(func=cmd_queue)
+
+    p_worker = subparsers.add_parser("worker", help="从任务队列领取批次翻译（可多进程/多机器共享同一队列）")
+    p_worker.add_argument("--queue", default="results/jobs.db", help="队列数据库路径 (默认: results/jobs.db)")
+    p_worker.add_argument("-b", "--batch-size", type=int, default=20, help="每次领取的任务数，合并为一次调用 (默认: 20)")
+    p_worker.add_argument("-c", "--concurrency", type=int, default=1, help="线程数，每个线程独立领取批次 (默认: 1)")
+    p_worker.add_argument("--visibility-timeout", type=float, default=60.0,
+                          help="租约秒数，处理中自动续租；worker 崩溃后超时的任务由其他 worker 接手 (默认: 60)")
+    p_worker.add_argument("--retry-delay", type=float, default=5.0, help="失败重试的基础退避秒数，逐次翻倍 (默认: 5)")
+    p_worker.add_argument("--poll-interval", type=float, default=1.0, help="队列为空时的轮询间隔秒数 (默认: 1)")
+    p_worker.add_argument("--drain", action="store_true", help="队列中没有待处理/租用中的任务时退出")
+    p_worker.add_argument("--max-jobs", type=int, help="处理约这么多个任务后退出")
+    p_worker.add_argument("--no-repair", action="store_true", help="不对校验未通过的单元格定向重译（直接按失败重试）")
+    p_worker.add_argument("-o", "--output", help="完成的结果同时追加写入 JSONL 文件")
+    p_worker.add_argument("--metrics-port", type=int, help="启用 Prometheus 指标端点 (如 9100)")
+    p_worker.set_defaults(func=cmd_worker)
+
+    # startup-bench 命令
+    p_startup = subparsers.add_parser("startup-bench", help="测量 CLI 启动耗时（models / --help），超出预算返回非零")
+    p_startup.add_argument("--runs", type=int, default=20, help="每个命令的运行次数 (默认: 20)")
+    p_startup.add_argument("--budget-ms", type=float, default=100.0, help="启动耗时预算，按中位数判断 (默认: 100)")
+    p_startup.add_argument("-o", "--output", help="保存结果到 JSON 文件")
+    p_startup.set_defaults(func=cmd_startup_bench)
+
     # models 命令
+    # glossary 命令
+    p_glossary = subparsers.add_parser("glossary", help="术语表：比较各渲染格式的 prompt token 数")
+    p_glossary.add_argument("glossaries", nargs="*", help="术语表 ID（默认全部）")
+    p_glossary.add_argument("-t", "--targets", nargs="+", default=DEFAULT_TARGET_LANGS, help="目标语言代码列表")
+    p_glossary.add_argument("--show", choices=glossary_formats, help="打印该格式渲染出的术语表段落")
+    p_glossary.add_argument("-o", "--output", help="保存 token 数到 JSON 文件")
+    p_glossary.set_defaults(func=cmd_glossary)
+
     p_models = subparsers.add_parser("models", help="列出可用模型")
     def cmd_models(args):
+        # 纯文本输出，不加载 rich
         for m in AVAILABLE_MODELS:
-            console.print(f"  {m}")
+            print(f"  {m}")
         return 0
     p_models.set_defaults(func=cmd_models)
 
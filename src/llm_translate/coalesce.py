@@ -0,0 +1,77 @@
+"""
+请求合并模块 - 相同请求的 single-flight
+
+并发发起的相同请求（缓存键一致）只真正执行一次，
+其余调用方共享同一个进行中的 Future，得到同一个结果。
+"""
+
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+from llm_translate import metrics
+
+
+def request_key(*parts: Any) -> str:
+    """由请求参数生成规范化的缓存键（sha256）"""
+    canonical = json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """同一时刻相同 key 只执行一次
+
+    Args:
+        name: 名称，用于统计和指标标签
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._executed = 0
+        self._coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """执行 fn；若相同 key 的调用正在进行，则等待并复用其结果"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self._executed += 1
+            else:
+                self._coalesced += 1
+
+        metrics.record_cache(f"coalesce_{self.name}", hit=not leader)
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self) -> dict:
+        """返回 {executed, coalesced, in_flight}"""
+        with self._lock:
+            return {
+                "executed": self._executed,
+                "coalesced": self._coalesced,
+                "in_flight": len(self._calls),
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._executed = 0
+            self._coalesced = 0
@@ -0,0 +1,198 @@
+"""
+自适应并发控制 - 按模型/供应商的 AIMD 限流器
+
+- 加性增 (Additive Increase): 每完成一轮（limit 个）健康请求，并发上限 +1
+- 乘性减 (Multiplicative Decrease): 遇到 429、超时、延迟突增或错误率过高时，上限 ×0.5
+
+延迟突增按请求类别分别判断：每个类别（如 模型 + 文本类型）各自维护延迟基线，
+长描述的正常耗时不会被当作短标题的突增，供应商模式下快慢不同的模型也互不影响。
+
+记录并发上限随时间的变化，benchmark 输出中用来观察各模型可持续的吞吐。
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Hashable, List, Optional, Tuple
+
+# 视为过载信号的错误类型（见 metrics.classify_error）
+OVERLOAD_ERRORS = {"rate_limited", "timeout"}
+
+
+def provider_of(model: str) -> str:
+    """模型所属的供应商（LiteLLM 前缀或模型族）"""
+    if "/" in model:
+        return model.split("/")[0]
+    return model.split("-")[0]
+
+
+class AdaptiveLimiter:
+    """AIMD 并发限流器
+
+    Args:
+        name: 限流器名称（模型或供应商）
+        initial: 初始并发上限
+        min_limit: 并发下限
+        max_limit: 并发上限
+        increase: 每轮健康请求后的加性增量
+        decrease: 过载时的乘性系数
+        latency_tolerance: 延迟超过基线多少倍视为突增
+        error_rate_threshold: 最近窗口内错误率超过该值时降低并发
+        error_window: 计算错误率的最近请求数
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = 2,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        increase: int = 1,
+        decrease: float = 0.5,
+        latency_tolerance: float = 2.0,
+        error_rate_threshold: float = 0.2,
+        error_window: int = 20,
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.error_rate_threshold = error_rate_threshold
+        self._cond = threading.Condition()
+        self._limit = max(min_limit, min(initial, max_limit))
+        self._in_flight = 0
+        self._healthy_in_round = 0
+        self._baselines_ms: Dict[Hashable, float] = {}
+        self._recent_errors = deque(maxlen=error_window)
+        # 降低后需要完成一轮请求才允许再次降低，避免同一批在途请求重复惩罚
+        self._cooldown = 0
+        self._start = time.perf_counter()
+        self._timeline: List[Tuple[float, int]] = [(0.0, self._limit)]
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def acquire(self) -> None:
+        """等待直到在途请求数低于当前上限"""
+        with self._cond:
+            while self._in_flight >= self._limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """占用一个并发槽位"""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def record(self, latency_ms: float, error_type: Optional[str] = None, key: Hashable = None) -> None:
+        """记录一次请求结果并调整并发上限
+
+        Args:
+            latency_ms: 请求延迟
+            error_type: 错误类型，None 表示成功
+            key: 请求类别（如 (模型, 文本类型)），延迟只和同类别的基线比较
+        """
+        with self._cond:
+            failed = error_type is not None
+            self._recent_errors.append(failed)
+            if self._cooldown > 0:
+                self._cooldown -= 1
+
+            spike = False
+            if not failed:
+                baseline = self._baselines_ms.get(key)
+                if baseline is None:
+                    self._baselines_ms[key] = latency_ms
+                else:
+                    spike = latency_ms > baseline * self.latency_tolerance
+                    # 基线缓慢跟随健康延迟，偏向较低值
+                    if not spike:
+                        self._baselines_ms[key] = 0.9 * baseline + 0.1 * min(latency_ms, baseline * 1.2)
+
+            error_rate = sum(self._recent_errors) / len(self._recent_errors)
+            overloaded = (
+                error_type in OVERLOAD_ERRORS
+                or spike
+                or (len(self._recent_errors) >= 5 and error_rate > self.error_rate_threshold)
+            )
+
+            if overloaded:
+                self._healthy_in_round = 0
+                if self._cooldown == 0:
+                    # 已在下限时上限不变，不计为一次降低
+                    if self._set_limit(int(self._limit * self.decrease)):
+                        self.decreases += 1
+                    self._cooldown = self._limit
+            elif not failed:
+                self._healthy_in_round += 1
+                if self._healthy_in_round >= self._limit:
+                    self._healthy_in_round = 0
+                    if self._limit < self.max_limit:
+                        self._set_limit(self._limit + self.increase)
+                        self.increases += 1
+
+    def _set_limit(self, value: int) -> bool:
+        """设置并发上限，返回上限是否真的改变"""
+        value = max(self.min_limit, min(value, self.max_limit))
+        if value == self._limit:
+            return False
+        self._limit = value
+        self._timeline.append((round(time.perf_counter() - self._start, 3), value))
+        self._cond.notify_all()
+        return True
+
+    def _avg_limit(self) -> float:
+        """按每个上限持续的时间加权的平均上限"""
+        now = time.perf_counter() - self._start
+        ends = [t for t, _ in self._timeline[1:]] + [max(now, self._timeline[-1][0])]
+        weighted = sum((end - t) * v for (t, v), end in zip(self._timeline, ends))
+        duration = ends[-1] - self._timeline[0][0]
+        return weighted / duration if duration > 0 else float(self._limit)
+
+    def stats(self) -> dict:
+        """并发上限变化记录与统计"""
+        with self._cond:
+            limits = [v for _, v in self._timeline]
+            return {
+                "name": self.name,
+                "final_limit": self._limit,
+                "max_limit_reached": max(limits),
+                "avg_limit": self._avg_limit(),
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "baselines_ms": {
+                    "/".join(map(str, k)) if isinstance(k, tuple) else str(k): v
+                    for k, v in self._baselines_ms.items()
+                },
+                "timeline": [list(p) for p in self._timeline],
+            }
+
+
+# 限流器注册表
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(key: str, **kwargs) -> AdaptiveLimiter:
+    """获取（或创建）指定 key 的限流器，kwargs 仅在首次创建时生效"""
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = AdaptiveLimiter(key, **kwargs)
+            _limiters[key] = limiter
+        return limiter
@@ -1,13 +1,27 @@
 """项目配置"""
 
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+# API 配置（首次访问 API_BASE_URL / API_KEY 时才读取 .env，见模块 __getattr__）
+_ENV_DEFAULTS = {
+    "API_BASE_URL": "https://litellm.test.bloomeverybody.work",
+    "API_KEY": "",
+}
+_env_loaded = False
+
+
+def __getattr__(name: str):
+    global _env_loaded
+    if name not in _ENV_DEFAULTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if not _env_loaded:
+        from dotenv import load_dotenv
 
-# API 配置
-API_BASE_URL = os.getenv("API_BASE_URL", "https://litellm.test.bloomeverybody.work")
-API_KEY = os.getenv("API_KEY", "")
+        load_dotenv()
+        _env_loaded = True
+    value = os.getenv(name, _ENV_DEFAULTS[name])
+    globals()[name] = value
+    return value
 
 # 欧盟主要语言
 EU_LANGUAGES = {
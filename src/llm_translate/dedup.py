@@ -0,0 +1,99 @@
+"""
+源文本去重模块 - 相同文本去重，翻译结果按原下标回填
+
+商品标题大量重复。同一 (model, langs, glossary) 下每个唯一文本只翻译一次，
+再把结果按原顺序分发回每个出现位置。
+
+去重键只做 Unicode NFC（同一字符的不同编码视为相同）：大小写、换行等差异会反映在译文中，
+不能复用另一条文本的译文。normalize_text 的宽松规范化只用于相似判断（未翻译检测、翻译记忆）。
+"""
+
+import unicodedata
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def normalize_text(text: str) -> str:
+    """宽松规范化：Unicode NFKC、合并空白、忽略大小写（用于相似判断，不用于复用译文）"""
+    return " ".join(unicodedata.normalize("NFKC", text).split()).casefold()
+
+
+def dedup_key(text: str) -> str:
+    """去重键：只做 Unicode NFC，大小写和空白不同的文本各自翻译"""
+    return unicodedata.normalize("NFC", text)
+
+
+@dataclass(slots=True)
+class DedupPlan:
+    """去重结果
+
+    Attributes:
+        unique_texts: 唯一文本（取首次出现的原文作为代表）
+        index_map: 原下标 -> unique_texts 下标
+        first_indices: 每个唯一文本首次出现的原下标
+    """
+    unique_texts: List[str]
+    index_map: List[int]
+    first_indices: List[int]
+
+    @property
+    def total(self) -> int:
+        return len(self.index_map)
+
+    @property
+    def unique(self) -> int:
+        return len(self.unique_texts)
+
+    @property
+    def ratio(self) -> float:
+        """去重率：省去的文本占比"""
+        return 1 - self.unique / self.total if self.total else 0.0
+
+    def representative(self, index: int) -> int:
+        """原下标 index 对应的首次出现下标"""
+        return self.first_indices[self.index_map[index]]
+
+    def fan_back(self, values: Sequence[T]) -> List[T]:
+        """把按 unique_texts 顺序的结果回填为原顺序
+
+        values 比 unique_texts 短（模型漏译）时，结果在第一个缺失位置截断，
+        与未去重时“列表偏短即缺失”的语义一致。
+        """
+        result = []
+        for unique_idx in self.index_map:
+            if unique_idx >= len(values):
+                break
+            result.append(values[unique_idx])
+        return result
+
+    def stats(self) -> dict:
+        return {"texts": self.total, "unique": self.unique, "dedup_ratio": self.ratio}
+
+
+def dedup_texts(texts: Sequence[str], key: Optional[Callable[[str], str]] = None) -> DedupPlan:
+    """去重
+
+    Args:
+        texts: 原始文本（保持顺序）
+        key: 去重键函数，默认 dedup_key
+
+    Returns:
+        DedupPlan
+    """
+    key = key or dedup_key
+    seen = {}
+    unique_texts: List[str] = []
+    first_indices: List[int] = []
+    index_map: List[int] = []
+    for i, text in enumerate(texts):
+        k = key(text)
+        unique_idx = seen.get(k)
+        if unique_idx is None:
+            unique_idx = len(unique_texts)
+            seen[k] = unique_idx
+            unique_texts.append(text)
+            first_indices.append(i)
+        index_map.append(unique_idx)
+    return DedupPlan(unique_texts=unique_texts, index_map=index_map, first_indices=first_indices)
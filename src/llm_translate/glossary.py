@@ -8,7 +8,7 @@
 支持多个领域的术语表，可通过选项选择：
 - fashion_hard: 难翻译术语表 (13条，约+400 tokens) - 基于数据科学筛选
 - fashion_core: 服装核心版 (80条高频术语，约+2200 tokens)
-- fashion_full: 服装完整版 (180+条术语，约+5000 tokens)
+- fashion_full: 服装完整版 (180+条术语，约+5000 tokens；紧凑格式见 render_glossary)
 - fashion_v4: 完整运营术语表 (210条，支持智能匹配)
 - ecommerce: 电商通用术语
 """
@@ -333,6 +333,7 @@ GLOSSARY_REGISTRY["fashion_mini"] = GLOSSARY_REGISTRY["fashion_core"]
 
 def list_glossaries() -> dict:
     """列出所有可用的术语表"""
+    _register_v4_glossary()
     return {
         key: {
             "name": info["name"],
@@ -347,18 +348,150 @@ def list_glossaries() -> dict:
 
 def get_glossary(glossary_id: str) -> Optional[dict]:
     """获取指定术语表"""
+    if glossary_id == "fashion_v4":
+        _register_v4_glossary()
     if glossary_id in GLOSSARY_REGISTRY:
         return GLOSSARY_REGISTRY[glossary_id]["terms"]
     return None
 
 
-def build_glossary_prompt(target_langs: list[str], glossary_id: str = "fashion_core") -> str:
+# ============================================================
+# 术语表渲染格式
+# table 为原始 markdown 表格；其余格式省略与英文原词相同的译文（术语表约 1/9 的单元格如此），
+# 各语言译文都与原词相同的术语合并为一行 "Keep in English"，不丢失术语约束
+# ============================================================
+GLOSSARY_FORMATS = ("table", "tsv", "lists", "grouped")
+DEFAULT_GLOSSARY_FORMAT = "table"
+
+
+def _split_kept(terms: Dict[str, Dict[str, str]], target_langs: List[str]) -> tuple:
+    """拆出需要翻译的术语 {term: {lang: 译文}}（只含与原词不同的语言）与保持英文的术语"""
+    translated: Dict[str, Dict[str, str]] = {}
+    kept: List[str] = []
+    for term, translations in terms.items():
+        cells = {
+            lang: translations[lang]
+            for lang in target_langs
+            if translations.get(lang) and translations[lang] != term
+        }
+        if cells:
+            translated[term] = cells
+        else:
+            kept.append(term)
+    return translated, kept
+
+
+def _kept_line(kept: List[str]) -> List[str]:
+    return [f"Keep in English: {', '.join(kept)}"] if kept else []
+
+
+def _render_table(terms, target_langs) -> List[str]:
+    header = "| English | " + " | ".join([lang.upper() for lang in target_langs]) + " |"
+    separator = "|" + "|".join(["---"] * (len(target_langs) + 1)) + "|"
+    rows = [
+        "| " + " | ".join([term] + [translations.get(lang, term) for lang in target_langs]) + " |"
+        for term, translations in terms.items()
+    ]
+    return [header, separator] + rows
+
+
+def _render_tsv(terms, target_langs) -> List[str]:
+    translated, kept = _split_kept(terms, target_langs)
+    lines = ["Tab-separated; an empty cell means keep the English term.", "\t".join(["en"] + target_langs)]
+    lines += [
+        "\t".join([term] + [cells.get(lang, "") for lang in target_langs])
+        for term, cells in translated.items()
+    ]
+    return lines + _kept_line(kept)
+
+
+def _render_lists(terms, target_langs) -> List[str]:
+    translated, kept = _split_kept(terms, target_langs)
+    lines = ["Per language; terms not listed for a language keep the English form."]
+    for lang in target_langs:
+        pairs = [f"{term}={cells[lang]}" for term, cells in translated.items() if lang in cells]
+        if pairs:
+            lines.append(f"{lang}: " + "; ".join(pairs))
+    return lines + _kept_line(kept)
+
+
+def _render_grouped(terms, target_langs) -> List[str]:
+    translated, kept = _split_kept(terms, target_langs)
+    lines = ["Per term; languages sharing a translation are grouped, languages not listed keep the English form."]
+    for term, cells in translated.items():
+        groups: Dict[str, List[str]] = {}
+        for lang, value in cells.items():
+            groups.setdefault(value, []).append(lang)
+        if len(groups) == 1 and len(cells) == len(target_langs):
+            lines.append(f"{term}: all {next(iter(groups))}")
+        else:
+            lines.append(f"{term}: " + "; ".join(f"{','.join(langs)} {value}" for value, langs in groups.items()))
+    return lines + _kept_line(kept)
+
+
+_RENDERERS = {
+    "table": _render_table,
+    "tsv": _render_tsv,
+    "lists": _render_lists,
+    "grouped": _render_grouped,
+}
+
+
+def render_glossary(
+    terms: Dict[str, Dict[str, str]],
+    target_langs: List[str],
+    fmt: str = DEFAULT_GLOSSARY_FORMAT,
+) -> str:
+    """按指定格式渲染术语 {term: {lang: 译文}}（缺失的语言视为保持英文原词）"""
+    if fmt not in _RENDERERS:
+        raise ValueError(f"未知术语表格式: {fmt}（可选: {', '.join(GLOSSARY_FORMATS)}）")
+    return "\n".join(_RENDERERS[fmt](terms, target_langs))
+
+
+_token_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """prompt token 数：安装了 tiktoken 时用 o200k_base 精确计数，否则按 estimate_tokens 估算"""
+    global _token_encoding
+    if _token_encoding is None:
+        try:
+            import tiktoken
+            _token_encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:  # 未安装或无法下载词表
+            _token_encoding = False
+    if _token_encoding:
+        return len(_token_encoding.encode(text))
+    from llm_translate.translator import estimate_tokens
+    return estimate_tokens(text)
+
+
+def token_counter_name() -> str:
+    """count_tokens 使用的计数方式（用于报告）"""
+    count_tokens("")
+    return "tiktoken o200k_base" if _token_encoding else "估算 (~4 字符/token)"
+
+
+def measure_glossary_formats(glossary_id: str, target_langs: List[str]) -> Dict[str, int]:
+    """术语表段落在各格式下的 prompt token 数 {format: tokens}"""
+    return {
+        fmt: count_tokens(build_glossary_prompt(target_langs, glossary_id, fmt))
+        for fmt in GLOSSARY_FORMATS
+    }
+
+
+def build_glossary_prompt(
+    target_langs: list[str],
+    glossary_id: str = "fashion_core",
+    fmt: str = DEFAULT_GLOSSARY_FORMAT,
+) -> str:
     """
     构建术语表提示词片段
 
     Args:
         target_langs: 目标语言代码列表
         glossary_id: 术语表ID (fashion_core, fashion_full, ecommerce)
+        fmt: 渲染格式 (table, tsv, lists, grouped)，见 render_glossary
 
     Returns:
         格式化的术语表字符串
@@ -367,24 +500,11 @@ def build_glossary_prompt(target_langs: list[str], glossary_id: str = "fashion_c
     if not glossary:
         return ""
 
-    # 构建表头
-    header = "| English | " + " | ".join([lang.upper() for lang in target_langs]) + " |"
-    separator = "|" + "|".join(["---"] * (len(target_langs) + 1)) + "|"
-
-    rows = []
-    for term, translations in glossary.items():
-        row_values = [term]
-        for lang in target_langs:
-            row_values.append(translations.get(lang, term))
-        rows.append("| " + " | ".join(row_values) + " |")
-
-    table = "\n".join([header, separator] + rows)
-
     glossary_info = GLOSSARY_REGISTRY.get(glossary_id, {})
     glossary_name = glossary_info.get("name", glossary_id)
 
     return f"""## {glossary_name} Terminology Reference
-{table}
+{render_glossary(glossary, target_langs, fmt)}
 """
 
 
@@ -542,7 +662,8 @@ def match_glossary_terms(texts: List[str], glossary_id: str = "fashion_v4") -> D
 def build_matched_glossary_prompt(
     texts: List[str],
     target_langs: List[str],
-    glossary_id: str = "fashion_v4"
+    glossary_id: str = "fashion_v4",
+    fmt: str = DEFAULT_GLOSSARY_FORMAT,
 ) -> str:
     """
     构建只包含匹配术语的提示词片段
@@ -551,6 +672,7 @@ def build_matched_glossary_prompt(
         texts: 待翻译的文本列表
         target_langs: 目标语言代码列表
         glossary_id: 术语表ID
+        fmt: 渲染格式 (table, tsv, lists, grouped)
 
     Returns:
         格式化的术语表字符串（只包含匹配到的术语）
@@ -561,18 +683,7 @@ def build_matched_glossary_prompt(
     if not matched:
         return ""
 
-    # 构建表头
-    header = "| English | " + " | ".join([lang.upper() for lang in target_langs]) + " |"
-    separator = "|" + "|".join(["---"] * (len(target_langs) + 1)) + "|"
-
-    rows = []
-    for term, translations in sorted(matched.items()):
-        row_values = [term]
-        for lang in target_langs:
-            row_values.append(translations.get(lang, term))
-        rows.append("| " + " | ".join(row_values) + " |")
-
-    table = "\n".join([header, separator] + rows)
+    table = render_glossary(dict(sorted(matched.items())), target_langs, fmt)
 
     return f"""## Terminology Reference ({len(matched)} terms matched)
 {table}
@@ -581,16 +692,14 @@ def build_matched_glossary_prompt(
 
 # 注册 V4 术语表
 def _register_v4_glossary():
-    """延迟注册 V4 术语表"""
+    """延迟注册 V4 术语表（首次查询术语表时调用，导入本模块时不读取 JSON）"""
+    if "fashion_v4" in GLOSSARY_REGISTRY:
+        return
     v4_glossary = _load_glossary_v4()
-    if v4_glossary and "fashion_v4" not in GLOSSARY_REGISTRY:
+    if v4_glossary:
         GLOSSARY_REGISTRY["fashion_v4"] = {
             "name": "Fashion V4 (Smart Match)",
             "description": "完整运营术语表，210条术语，支持智能匹配",
             "terms": v4_glossary,
             "token_estimate": 6000,  # 完整时的估计
         }
-
-
-# 自动注册
-_register_v4_glossary()
@@ -0,0 +1,258 @@
+"""
+任务队列模块 - 多个 worker 进程从共享队列拉取翻译任务
+
+JobQueue 定义队列接口（enqueue / lease / ack / nack / stats），可替换为其他后端；
+内置 SQLiteJobQueue 以单个 SQLite 文件实现（WAL 模式，多进程共享）：
+
+- lease   原子地领取一批同组任务（相同 model/langs/glossary/prompt，可合并为一次 multi_translate），
+          设置可见性超时；worker 崩溃后租约过期，任务自动被其他 worker 重新领取
+- ack     完成并保存结果（只接受当前租约持有者的确认，过期后迟到的确认被忽略）
+- nack    失败：未超过最大尝试次数则延迟后重试，否则进入死信 (dead)
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_QUEUE = "results/jobs.db"
+DEFAULT_MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    group_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, available_at, id);
+CREATE INDEX IF NOT EXISTS idx_jobs_group ON jobs (status, group_key, available_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs (status, lease_expires);
+"""
+
+# 任务中决定能否合批的字段
+GROUP_FIELDS = ("model", "langs", "glossary", "translate_prompt", "source_lang")
+
+
+@dataclass(slots=True)
+class Job:
+    """一个已领取的任务"""
+    id: int
+    payload: dict
+    attempts: int
+    max_attempts: int
+
+
+def group_key(payload: dict) -> str:
+    """合批键：这些字段相同的任务可以一次 multi_translate 翻译"""
+    return json.dumps([payload.get(f) for f in GROUP_FIELDS], ensure_ascii=False)
+
+
+def worker_id() -> str:
+    """当前 worker 的标识（主机:进程:线程）"""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+class JobQueue:
+    """任务队列接口"""
+
+    def enqueue(self, payloads: Iterable[dict], max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+        """加入任务，返回加入的条数"""
+        raise NotImplementedError
+
+    def lease(self, owner: str, max_jobs: int, visibility_timeout: float) -> List[Job]:
+        """领取最多 max_jobs 个同组任务，visibility_timeout 秒内未确认则可被他人重新领取"""
+        raise NotImplementedError
+
+    def ack(self, job_id: int, owner: str, result: Optional[dict] = None) -> bool:
+        """确认完成；租约已不属于 owner 时返回 False"""
+        raise NotImplementedError
+
+    def nack(self, job_id: int, owner: str, error: str, retry_delay: float = 0.0) -> str:
+        """报告失败，返回任务的新状态 (pending / dead)"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        """各状态的任务数"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteJobQueue(JobQueue):
+    """SQLite 实现（每个线程一个连接，可多进程共享同一文件）
+
+    Args:
+        path: 数据库文件
+        busy_timeout: 等待其他进程释放写锁的秒数
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE, busy_timeout: float = 30.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # 手动管理事务：领取任务需要 BEGIN IMMEDIATE 以免两个 worker 领到同一任务
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, payloads: Iterable[dict], max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+        now = time.time()
+        rows = [
+            (group_key(p), json.dumps(p, ensure_ascii=False), max_attempts, now, now, now)
+            for p in payloads
+        ]
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO jobs (group_key, payload, max_attempts, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def lease(self, owner: str, max_jobs: int, visibility_timeout: float) -> List[Job]:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 租约过期且已用完尝试次数的任务进入死信，不再被领取
+            conn.execute(
+                "UPDATE jobs SET status = 'dead', lease_owner = NULL, updated_at = ?, "
+                "last_error = COALESCE(last_error, '租约超时') "
+                "WHERE status = 'leased' AND lease_expires <= ? AND attempts >= max_attempts",
+                (now, now),
+            )
+            first = conn.execute(
+                "SELECT group_key FROM jobs WHERE "
+                "(status = 'pending' AND available_at <= ?) OR (status = 'leased' AND lease_expires <= ?) "
+                "ORDER BY id LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if first is None:
+                conn.execute("COMMIT")
+                return []
+            rows = conn.execute(
+                "SELECT id, payload, attempts, max_attempts FROM jobs WHERE group_key = ? AND "
+                "((status = 'pending' AND available_at <= ?) OR (status = 'leased' AND lease_expires <= ?)) "
+                "ORDER BY id LIMIT ?",
+                (first["group_key"], now, now, max_jobs),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                [(owner, now + visibility_timeout, now, r["id"]) for r in rows],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [
+            Job(id=r["id"], payload=json.loads(r["payload"]), attempts=r["attempts"] + 1,
+                max_attempts=r["max_attempts"])
+            for r in rows
+        ]
+
+    def extend(self, job_ids: List[int], owner: str, visibility_timeout: float) -> int:
+        """延长租约（长批次的心跳），返回仍由 owner 持有的任务数"""
+        now = time.time()
+        cur = self._conn().executemany(
+            "UPDATE jobs SET lease_expires = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            [(now + visibility_timeout, now, job_id, owner) for job_id in job_ids],
+        )
+        return cur.rowcount
+
+    def ack(self, job_id: int, owner: str, result: Optional[dict] = None) -> bool:
+        cur = self._conn().execute(
+            "UPDATE jobs SET status = 'done', result = ?, lease_owner = NULL, last_error = NULL, updated_at = ? "
+            "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (json.dumps(result, ensure_ascii=False) if result is not None else None, time.time(), job_id, owner),
+        )
+        return cur.rowcount == 1
+
+    def nack(self, job_id: int, owner: str, error: str, retry_delay: float = 0.0) -> str:
+        now = time.time()
+        conn = self._conn()
+        cur = conn.execute(
+            "UPDATE jobs SET "
+            "status = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'pending' END, "
+            "available_at = ?, lease_owner = NULL, last_error = ?, updated_at = ? "
+            "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (now + retry_delay, error, now, job_id, owner),
+        )
+        if cur.rowcount != 1:
+            return "lost"
+        return conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()["status"]
+
+    def stats(self) -> Dict[str, int]:
+        counts = {"pending": 0, "leased": 0, "done": 0, "dead": 0}
+        for row in self._conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+            counts[row["status"]] = row["n"]
+        return counts
+
+    def dead_letters(self, limit: int = 20) -> List[sqlite3.Row]:
+        """死信任务（最近的在前）"""
+        return self._conn().execute(
+            "SELECT id, payload, attempts, last_error FROM jobs WHERE status = 'dead' "
+            "ORDER BY updated_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+
+    def requeue_dead(self) -> int:
+        """死信任务重置为待处理（尝试次数清零）"""
+        now = time.time()
+        cur = self._conn().execute(
+            "UPDATE jobs SET status = 'pending', attempts = 0, available_at = ?, updated_at = ? "
+            "WHERE status = 'dead'",
+            (now, now),
+        )
+        return cur.rowcount
+
+    def results(self) -> Iterable[sqlite3.Row]:
+        """已完成任务的结果（按 id 顺序）"""
+        return self._conn().execute(
+            "SELECT id, payload, result FROM jobs WHERE status = 'done' ORDER BY id"
+        )
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def open_queue(path: str = DEFAULT_QUEUE) -> JobQueue:
+    """按路径打开队列（目前只有 SQLite 后端；sqlite:// 前缀可省略）"""
+    if path.startswith("sqlite://"):
+        path = path[len("sqlite://"):]
+    return SQLiteJobQueue(path)
@@ -0,0 +1,277 @@
+"""
+开环压测模块 - 按目标到达率发送翻译请求，测量延迟随负载的变化
+
+benchmark 是闭环的（N 个并发各自等响应后才发下一个），请求速率随延迟自动下降，掩盖了排队效应。
+这里按预先生成的到达时刻发请求，不论之前的请求是否返回：
+
+- constant  固定间隔，速率 rate
+- poisson   指数分布间隔（泊松过程），平均速率 rate
+- step      依次以 rates 中每个速率运行 step_duration 秒
+- ramp      速率在 duration 内从 rate 线性升到 max_rate
+
+延迟从“计划到达时刻”算起（包含本地排队），避免协调遗漏 (coordinated omission)。
+结果按时间窗口（step 每级一个，其余把时长等分）汇总为延迟-吞吐曲线，并标出饱和点。
+"""
+
+import itertools
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, List, Optional, Tuple
+
+SCHEDULES = ("constant", "poisson", "step", "ramp")
+
+# 饱和判定：错误率、p95 相对首个窗口的倍数
+SATURATION_ERROR_RATE = 0.05
+SATURATION_P95_FACTOR = 3.0
+
+
+@dataclass(slots=True)
+class Window:
+    """一段恒定（或线性变化）负载的时间窗口"""
+    start: float
+    end: float
+    offered_rps: float
+
+
+@dataclass(slots=True)
+class Sample:
+    """一个请求的测量结果"""
+    scheduled: float  # 计划到达时刻（相对压测开始，秒）
+    dispatch_lag_ms: float  # 实际发出比计划晚多少（本地排队）
+    latency_ms: float  # 计划到达 -> 完成
+    service_ms: float  # 请求本身的耗时
+    success: bool
+    error_type: Optional[str] = None
+    completion_tokens: int = 0
+
+
+def arrival_times(
+    schedule: str,
+    rate: float,
+    duration: float,
+    rates: Optional[List[float]] = None,
+    step_duration: float = 30.0,
+    max_rate: Optional[float] = None,
+    windows: int = 10,
+    seed: Optional[int] = None,
+) -> Tuple[List[float], List[Window]]:
+    """生成到达时刻（秒，相对开始）与对应的负载窗口
+
+    step 每级一个窗口；其余曲线把 duration 等分为 windows 个窗口（ramp 取窗口中点的速率）。
+    """
+    if schedule not in SCHEDULES:
+        raise ValueError(f"未知负载曲线: {schedule}")
+    if rate < 0 or (max_rate is not None and max_rate < 0) or any(r < 0 for r in rates or ()):
+        raise ValueError("到达率不能为负数")
+    # ramp 可以从 0 开始爬升；其余曲线（及平坦的 ramp）按 1/rate 计算间隔
+    if rate == 0 and not (schedule == "ramp" and max_rate) and not (schedule == "step" and rates):
+        raise ValueError("到达率必须大于 0")
+    rng = random.Random(seed)
+    times: List[float] = []
+
+    if schedule == "step":
+        rates = rates or [rate]
+        steps = []
+        for i, r in enumerate(rates):
+            start = i * step_duration
+            steps.append(Window(start, start + step_duration, r))
+            n = int(round(r * step_duration))
+            times.extend(start + (k + 0.5) / r for k in range(n))
+        return times, steps
+
+    if schedule == "ramp":
+        max_rate = max_rate if max_rate is not None else rate
+        # 累积到达数 N(t) = rate*t + (max_rate-rate)*t²/(2*duration)，第 k 个请求在 N(t)=k 处
+        slope = (max_rate - rate) / duration
+        k = 0
+        while True:
+            target = k + 0.5
+            if slope:
+                discriminant = rate * rate + 2 * slope * target
+                if discriminant < 0:
+                    # 降到 0 的 ramp：总到达数 N(duration) 不足 target
+                    break
+                t = (-rate + math.sqrt(discriminant)) / slope
+            else:
+                t = target / rate
+            if t >= duration:
+                break
+            times.append(t)
+            k += 1
+        return times, [
+            Window(start, end, rate + slope * (start + end) / 2)
+            for start, end in _equal_spans(duration, windows)
+        ]
+
+    if schedule == "constant":
+        times = [(k + 0.5) / rate for k in range(int(round(rate * duration)))]
+    else:  # poisson
+        t = rng.expovariate(rate)
+        while t < duration:
+            times.append(t)
+            t += rng.expovariate(rate)
+    return times, [Window(start, end, rate) for start, end in _equal_spans(duration, windows)]
+
+
+def _equal_spans(duration: float, count: int) -> List[Tuple[float, float]]:
+    count = max(count, 1)
+    return [(duration * i / count, duration * (i + 1) / count) for i in range(count)]
+
+
+def run_open_loop(
+    send: Callable[[int], Tuple[bool, Optional[str], float, int]],
+    times: List[float],
+    max_in_flight: int = 256,
+) -> List[Sample]:
+    """按到达时刻发请求（不等待之前的请求返回）
+
+    Args:
+        send: 发送第 i 个请求，返回 (成功, 错误类型, 请求耗时ms, completion tokens)
+        times: 到达时刻（秒，相对开始，升序）
+        max_in_flight: 同时进行的请求上限（达到上限后新到达在本地排队，计入 dispatch_lag）
+    """
+    samples: List[Optional[Sample]] = [None] * len(times)
+    start = time.perf_counter()
+
+    def task(i: int) -> None:
+        dispatched = time.perf_counter() - start
+        try:
+            success, error_type, service_ms, completion_tokens = send(i)
+        except Exception as e:
+            success, error_type, service_ms, completion_tokens = False, type(e).__name__, 0.0, 0
+        finished = time.perf_counter() - start
+        samples[i] = Sample(
+            scheduled=times[i],
+            dispatch_lag_ms=max(0.0, dispatched - times[i]) * 1000,
+            latency_ms=(finished - times[i]) * 1000,
+            service_ms=service_ms,
+            success=success,
+            error_type=error_type,
+            completion_tokens=completion_tokens,
+        )
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        for i, t in enumerate(times):
+            delay = t - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(task, i)
+    return samples
+
+
+def _percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, max(0, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def summarize(samples: List[Sample], windows: List[Window]) -> dict:
+    """按窗口汇总为延迟-吞吐曲线，并找出饱和点"""
+    curve = []
+    for window in windows:
+        in_window = [s for s in samples if window.start <= s.scheduled < window.end]
+        span = window.end - window.start
+        ok = sorted(s.latency_ms for s in in_window if s.success)
+        # 按完成时刻计的吞吐：负载超过服务能力时低于 offered，差额在排队
+        finished = sum(
+            1 for s in samples
+            if s.success and window.start <= s.scheduled + s.latency_ms / 1000 < window.end
+        )
+        errors = [s for s in in_window if not s.success]
+        error_types = {}
+        for s in errors:
+            error_types[s.error_type or "error"] = error_types.get(s.error_type or "error", 0) + 1
+        curve.append({
+            "start_s": window.start,
+            "end_s": window.end,
+            "offered_rps": window.offered_rps,
+            "sent_rps": len(in_window) / span,
+            "goodput_rps": len(ok) / span,
+            "completed_rps": finished / span,
+            "requests": len(in_window),
+            "error_rate": len(errors) / len(in_window) if in_window else 0.0,
+            "error_types": error_types,
+            "latency_p50_ms": _percentile(ok, 50),
+            "latency_p90_ms": _percentile(ok, 90),
+            "latency_p95_ms": _percentile(ok, 95),
+            "latency_p99_ms": _percentile(ok, 99),
+            "avg_service_ms": (sum(s.service_ms for s in in_window if s.success) / len(ok)) if ok else None,
+            "avg_dispatch_lag_ms": (sum(s.dispatch_lag_ms for s in in_window) / len(in_window)) if in_window else None,
+            "completion_tokens_per_s": sum(s.completion_tokens for s in in_window) / span,
+        })
+
+    saturation = None
+    baseline_p95 = next((p["latency_p95_ms"] for p in curve if p["latency_p95_ms"] is not None), None)
+    for i, point in enumerate(curve):
+        reasons = []
+        if point["error_rate"] > SATURATION_ERROR_RATE:
+            reasons.append("errors")
+        if (baseline_p95 and point["latency_p95_ms"] is not None
+                and point["latency_p95_ms"] > SATURATION_P95_FACTOR * baseline_p95):
+            reasons.append("latency")
+        if reasons:
+            saturation = {
+                "window": i,
+                "offered_rps": point["offered_rps"],
+                "reasons": reasons,
+                "max_sustained_rps": curve[i - 1]["offered_rps"] if i > 0 else None,
+            }
+            break
+
+    ok_all = sorted(s.latency_ms for s in samples if s.success)
+    return {
+        "curve": curve,
+        "saturation": saturation,
+        "totals": {
+            "requests": len(samples),
+            "success": len(ok_all),
+            "error_rate": (len(samples) - len(ok_all)) / len(samples) if samples else 0.0,
+            "latency_p50_ms": _percentile(ok_all, 50),
+            "latency_p99_ms": _percentile(ok_all, 99),
+        },
+    }
+
+
+def translate_sender(
+    texts: List[str],
+    model: str,
+    target_langs: List[str],
+    texts_per_request: int = 1,
+    source_lang: str = "en",
+    glossary: Optional[str] = None,
+    translate_prompt: Optional[str] = None,
+    glossary_format: str = "table",
+) -> Callable[[int], Tuple[bool, Optional[str], float, int]]:
+    """构建发送函数：第 i 个请求翻译数据集中循环取出的 texts_per_request 条文本
+
+    直接发起请求（不经过 single-flight 合并），每次到达都是一次真实调用。
+    """
+    from llm_translate.translator import _build_translate_prompt, _run_translate, get_translate_protocol
+
+    pool = itertools.cycle(texts)
+    lock = threading.Lock()
+    protocol = get_translate_protocol(translate_prompt)
+
+    def send(i: int):
+        with lock:
+            chunk = [next(pool) for _ in range(texts_per_request)]
+        system_prompt, user_prompt, _ = _build_translate_prompt(
+            chunk, source_lang, target_langs, glossary=glossary, prompt_template=translate_prompt,
+            glossary_format=glossary_format,
+        )
+        result = _run_translate(
+            chunk, source_lang, model, system_prompt, user_prompt, 0.3, 4096,
+            target_langs=target_langs, protocol=protocol,
+        )
+        return result.success, result.error_type, result.latency_ms, result.completion_tokens
+
+    return send
+
+
+def samples_to_dicts(samples: List[Sample]) -> List[dict]:
+    return [asdict(s) for s in samples]
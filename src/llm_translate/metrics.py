@@ -0,0 +1,382 @@
+"""
+指标模块 - 可选的 Prometheus 风格指标注册表与文本格式 HTTP 暴露端点
+
+默认关闭，调用 enable_metrics() 后 multi_translate / evaluate_translations
+才会上报指标；未启用时所有 record_* 函数都是空操作。
+
+暴露的指标：
+- llm_translate_requests_total{kind,model,status}: 请求计数
+- llm_translate_request_latency_seconds{kind,model}: 请求延迟直方图
+- llm_translate_in_flight_requests{kind,model}: 进行中的请求数
+- llm_translate_tokens_total{kind,model,type}: Token 计数 (prompt/completion/cached)
+- llm_translate_cache_requests_total{cache,result}: 缓存查询计数 (hit/miss)
+- llm_translate_cache_tokens_total{cache,result}: 按 token 计的缓存命中量 (hit/miss)
+- llm_translate_cache_hit_ratio{cache}: 缓存命中率
+- llm_translate_retries_total{kind,model,reason}: 重试计数
+"""
+
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# 延迟直方图默认分桶（秒）
+DEFAULT_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape_label(value: str) -> str:
+    """转义标签值（反斜杠、双引号、换行）"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape_label(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """指标基类"""
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def get(self, **labels) -> float:
+        """读取当前值（主要用于报告）"""
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(v)}"
+            for key, v in items
+        ]
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值"""
+    metric_type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """累积分桶直方图"""
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # {labels: [各桶计数..., sum, count]}
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [0.0] * (len(self.buckets) + 2)
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def get(self, **labels) -> float:
+        """返回观测次数"""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series[-1] if series else 0.0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = []
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {_format_value(count)}"
+                )
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """生成 Prometheus 文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+
+def _register_standard_metrics(registry: MetricsRegistry) -> None:
+    """注册翻译/评估使用的标准指标"""
+    registry.counter(
+        "llm_translate_requests_total", "LLM 请求数", ("kind", "model", "status"))
+    registry.histogram(
+        "llm_translate_request_latency_seconds", "LLM 请求延迟（秒）", ("kind", "model"))
+    registry.histogram(
+        "llm_translate_request_phase_seconds", "LLM 请求各连接阶段耗时（秒）", ("kind", "model", "phase"))
+    registry.gauge(
+        "llm_translate_in_flight_requests", "进行中的 LLM 请求数", ("kind", "model"))
+    registry.counter(
+        "llm_translate_tokens_total", "Token 消耗 (prompt/completion/cached)", ("kind", "model", "type"))
+    registry.counter(
+        "llm_translate_cache_requests_total", "缓存查询次数", ("cache", "result"))
+    registry.counter(
+        "llm_translate_cache_tokens_total", "按 token 计的缓存命中量", ("cache", "result"))
+    registry.gauge(
+        "llm_translate_cache_hit_ratio", "缓存命中率", ("cache",))
+    registry.counter(
+        "llm_translate_retries_total", "重试次数", ("kind", "model", "reason"))
+
+
+# 全局注册表（None 表示未启用）
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def enable_metrics() -> MetricsRegistry:
+    """启用指标采集，返回全局注册表（重复调用返回同一个）"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            registry = MetricsRegistry()
+            _register_standard_metrics(registry)
+            _registry = registry
+        return _registry
+
+
+def get_registry() -> Optional[MetricsRegistry]:
+    """获取全局注册表，未启用时返回 None"""
+    return _registry
+
+
+def cached_tokens_from_usage(usage: dict) -> int:
+    """从 usage 中提取缓存命中的 prompt tokens（兼容 OpenAI / Anthropic 字段）"""
+    if not usage:
+        return 0
+    details = usage.get("prompt_tokens_details") or {}
+    cached = details.get("cached_tokens") if isinstance(details, dict) else None
+    if cached is None:
+        cached = usage.get("cache_read_input_tokens")
+    return int(cached or 0)
+
+
+def classify_error(error: BaseException) -> str:
+    """将异常归类为请求状态标签"""
+    import json
+
+    if isinstance(error, json.JSONDecodeError):
+        return "parse_error"
+    name = type(error).__name__
+    if "Timeout" in name:
+        return "timeout"
+    response = getattr(error, "response", None)
+    status_code = getattr(response, "status_code", None)
+    if status_code == 429:
+        return "rate_limited"
+    if status_code is not None:
+        return "http_error"
+    return "error"
+
+
+@contextmanager
+def track_in_flight(kind: str, model: str):
+    """在上下文内将进行中请求数 +1"""
+    registry = _registry
+    if registry is None:
+        yield
+        return
+    gauge = registry.get("llm_translate_in_flight_requests")
+    gauge.inc(kind=kind, model=model)
+    try:
+        yield
+    finally:
+        gauge.dec(kind=kind, model=model)
+
+
+def record_request(
+    kind: str,
+    model: str,
+    status: str,
+    latency_ms: float,
+    usage: Optional[dict] = None,
+) -> None:
+    """记录一次 LLM 请求（计数、延迟、Token）"""
+    registry = _registry
+    if registry is None:
+        return
+    registry.get("llm_translate_requests_total").inc(kind=kind, model=model, status=status)
+    registry.get("llm_translate_request_latency_seconds").observe(
+        latency_ms / 1000, kind=kind, model=model)
+    if usage:
+        tokens = registry.get("llm_translate_tokens_total")
+        cached = cached_tokens_from_usage(usage)
+        tokens.inc(usage.get("prompt_tokens", 0) or 0, kind=kind, model=model, type="prompt")
+        tokens.inc(usage.get("completion_tokens", 0) or 0, kind=kind, model=model, type="completion")
+        tokens.inc(cached, kind=kind, model=model, type="cached")
+        record_cache_ratio("prompt_tokens", cached, usage.get("prompt_tokens", 0) or 0)
+
+
+def record_phases(kind: str, model: str, timings: Optional[dict]) -> None:
+    """记录一次请求的连接阶段耗时 {connect_ms, tls_ms, send_ms, ttfb_ms, receive_ms}"""
+    registry = _registry
+    if registry is None or not timings:
+        return
+    histogram = registry.get("llm_translate_request_phase_seconds")
+    for phase, ms in timings.items():
+        histogram.observe(ms / 1000, kind=kind, model=model, phase=phase.removesuffix("_ms"))
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """记录一次缓存查询，并更新该缓存的命中率"""
+    registry = _registry
+    if registry is None:
+        return
+    lookups = registry.get("llm_translate_cache_requests_total")
+    lookups.inc(cache=cache, result="hit" if hit else "miss")
+    hits = lookups.get(cache=cache, result="hit")
+    total = hits + lookups.get(cache=cache, result="miss")
+    registry.get("llm_translate_cache_hit_ratio").set(hits / total if total else 0.0, cache=cache)
+
+
+def record_cache_ratio(cache: str, hits: float, total: float) -> None:
+    """按 token 数累计命中（如缓存 token 数 / prompt token 数），与查询次数分开计数"""
+    registry = _registry
+    if registry is None or total <= 0:
+        return
+    lookups = registry.get("llm_translate_cache_tokens_total")
+    lookups.inc(hits, cache=cache, result="hit")
+    lookups.inc(total - hits, cache=cache, result="miss")
+    all_hits = lookups.get(cache=cache, result="hit")
+    all_total = all_hits + lookups.get(cache=cache, result="miss")
+    registry.get("llm_translate_cache_hit_ratio").set(all_hits / all_total, cache=cache)
+
+
+def record_retry(kind: str, model: str, reason: str) -> None:
+    """记录一次重试"""
+    registry = _registry
+    if registry is None:
+        return
+    registry.get("llm_translate_retries_total").inc(kind=kind, model=model, reason=reason)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """/metrics 端点"""
+
+    def do_GET(self):
+        registry = _registry
+        if self.path.split("?")[0] not in ("/metrics", "/") or registry is None:
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 抓取请求很频繁，不打印访问日志
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """启用指标并在后台线程启动 HTTP 暴露端点"""
+    enable_metrics()
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,164 @@
+"""
+流水线模块 - 由有界队列连接的多阶段并发处理
+
+每个阶段有自己的线程数，阶段之间用有界队列连接：
+下游处理不过来时上游自动阻塞（背压），各阶段互不等待。
+运行期间定时采样各阶段输入队列深度，用于定位瓶颈。
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional
+
+# 阶段结束标记
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """流水线阶段
+
+    Args:
+        name: 阶段名称
+        fn: 处理函数，接收一个输入，返回 0..n 个输出（可迭代）
+        workers: 该阶段的线程数
+        flush: 可选，所有输入处理完后调用一次，返回剩余输出（如未满的批次）
+        on_error: 可选，fn 抛出异常时以 (输入, 异常) 调用，返回代替的输出（如失败记录），
+                  使出错的输入仍传到下游被计入，而不是悄悄丢弃
+    """
+    name: str
+    fn: Callable[[Any], Iterable[Any]]
+    workers: int = 1
+    flush: Optional[Callable[[], Iterable[Any]]] = None
+    on_error: Optional[Callable[[Any, Exception], Iterable[Any]]] = None
+
+
+class _StageRunner:
+    """单个阶段的运行状态"""
+
+    def __init__(self, stage: Stage, inbox: "queue.Queue", outbox: Optional["queue.Queue"], downstream_workers: int):
+        self.stage = stage
+        self.inbox = inbox
+        self.outbox = outbox
+        self.downstream_workers = downstream_workers
+        self.processed = 0
+        self.errors = 0
+        self.busy_s = 0.0
+        self._lock = threading.Lock()
+        self._alive = stage.workers
+        self.depth_samples: List[int] = []
+
+    def _emit(self, outputs: Optional[Iterable[Any]]) -> None:
+        if outputs is None or self.outbox is None:
+            return
+        for out in outputs:
+            self.outbox.put(out)
+
+    def work(self) -> None:
+        while True:
+            item = self.inbox.get()
+            if item is _DONE:
+                break
+            start = time.perf_counter()
+            try:
+                self._emit(self.stage.fn(item))
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                if self.stage.on_error is not None:
+                    self._emit(self.stage.on_error(item, e))
+            finally:
+                with self._lock:
+                    self.processed += 1
+                    self.busy_s += time.perf_counter() - start
+
+        with self._lock:
+            self._alive -= 1
+            last = self._alive == 0
+        if last:
+            # 最后一个线程负责 flush 并通知下游结束
+            if self.stage.flush is not None:
+                try:
+                    self._emit(self.stage.flush())
+                except Exception:
+                    with self._lock:
+                        self.errors += 1
+            if self.outbox is not None:
+                for _ in range(self.downstream_workers):
+                    self.outbox.put(_DONE)
+
+    def stats(self, elapsed_s: float) -> dict:
+        samples = self.depth_samples or [0]
+        return {
+            "workers": self.stage.workers,
+            "processed": self.processed,
+            "errors": self.errors,
+            "max_queue_depth": max(samples),
+            "avg_queue_depth": sum(samples) / len(samples),
+            "utilization": self.busy_s / (elapsed_s * self.stage.workers) if elapsed_s > 0 else 0.0,
+        }
+
+
+class Pipeline:
+    """多阶段流水线
+
+    Args:
+        stages: 阶段列表（按顺序）
+        queue_size: 每个阶段输入队列的容量
+        sample_interval: 队列深度采样间隔（秒）
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 32, sample_interval: float = 0.1):
+        if not stages:
+            raise ValueError("流水线至少需要一个阶段")
+        self.sample_interval = sample_interval
+        queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self._runners: List[_StageRunner] = []
+        for i, stage in enumerate(stages):
+            outbox = queues[i + 1] if i + 1 < len(stages) else None
+            downstream = stages[i + 1].workers if i + 1 < len(stages) else 0
+            self._runners.append(_StageRunner(stage, queues[i], outbox, downstream))
+        self.source_count = 0
+        self.elapsed_s = 0.0
+
+    def run(self, source: Iterable[Any]) -> dict:
+        """从 source 读取输入（load 阶段），运行到所有阶段结束，返回统计"""
+        start = time.perf_counter()
+        threads = []
+        for runner in self._runners:
+            for n in range(runner.stage.workers):
+                t = threading.Thread(target=runner.work, name=f"{runner.stage.name}-{n}", daemon=True)
+                t.start()
+                threads.append(t)
+
+        stop_sampling = threading.Event()
+        sampler = threading.Thread(target=self._sample, args=(stop_sampling,), daemon=True)
+        sampler.start()
+
+        first = self._runners[0]
+        for item in source:
+            first.inbox.put(item)
+            self.source_count += 1
+        for _ in range(first.stage.workers):
+            first.inbox.put(_DONE)
+
+        for t in threads:
+            t.join()
+        stop_sampling.set()
+        sampler.join()
+        self.elapsed_s = time.perf_counter() - start
+        return self.stats()
+
+    def _sample(self, stop: threading.Event) -> None:
+        while not stop.wait(self.sample_interval):
+            for runner in self._runners:
+                runner.depth_samples.append(runner.inbox.qsize())
+
+    def stats(self) -> dict:
+        """各阶段统计 {stage: {workers, processed, errors, max_queue_depth, avg_queue_depth, utilization}}"""
+        result = {"load": {"workers": 1, "processed": self.source_count}}
+        for runner in self._runners:
+            result[runner.stage.name] = runner.stats(self.elapsed_s)
+        return result
@@ -0,0 +1,120 @@
+"""
+响应协议模块 - 翻译输出格式（提示词模板 + 解析器）
+
+模板第一行可以声明协议，例如 ``#protocol: lines``（加载时去掉，不发给模型）；没有声明的模板为 json。
+
+- json   {"de":["...","..."],"fr":[...]}，见 prompts/translate_default.txt
+- lines  按语言分段，每段 "@de" 开头，之后每行 "序号<TAB>译文"（prompts/translate_lines.txt）
+- rows   每个文本一行 "序号<TAB>译文1<TAB>译文2..."，语言顺序同输入 langs（prompts/translate_rows.txt）
+
+lines / rows 省去了 JSON 的引号、逗号和方括号，大批量时输出 token 更少。译文内的换行写作 \\n。
+解析器容错：忽略代码块围栏和空行，按序号对齐（缺失的单元格为 None，交给 validate 模块标记和定向重译），
+没有序号时按出现顺序。
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+PROTOCOLS = ("json", "lines", "rows")
+DIRECTIVE = "#protocol:"
+
+_HEADER_RE = re.compile(r"^@\s*([A-Za-z]{2,3}(?:[-_][A-Za-z0-9]+)?)\s*:?$")
+_INDEXED_RE = re.compile(r"^(\d+)(?:\t|[.:)\]|]\s+)(.*)$")
+_ROW_RE = re.compile(r"^(\d+)\t(.*)$")
+
+
+class ProtocolError(ValueError):
+    """响应不符合协议格式"""
+
+
+def split_directive(template: str) -> Tuple[str, str]:
+    """拆出模板首行的协议声明，返回 (协议名, 其余模板)"""
+    first, sep, rest = template.partition("\n")
+    if not first.strip().lower().startswith(DIRECTIVE):
+        return "json", template
+    name = first.strip()[len(DIRECTIVE):].strip().lower()
+    if name not in PROTOCOLS:
+        raise ValueError(f"未知响应协议: {name}（可选: {', '.join(PROTOCOLS)}）")
+    return name, rest
+
+
+def _unescape(text: str) -> str:
+    return text.replace("\\n", "\n").strip()
+
+
+def _content_lines(content: str) -> List[str]:
+    """去掉代码块围栏与空行"""
+    return [
+        line.rstrip("\r")
+        for line in content.strip().split("\n")
+        if line.strip() and not line.lstrip().startswith("```")
+    ]
+
+
+def _place(entries: List[Tuple[Optional[int], str]], count: int) -> list:
+    """有序号时按序号放入长度为 count 的数组（缺失为 None），否则按出现顺序"""
+    if entries and all(index is not None for index, _ in entries):
+        values: list = [None] * count
+        for index, text in entries:
+            if 1 <= index <= count and values[index - 1] is None:
+                values[index - 1] = text
+        return values
+    return [text for _, text in entries]
+
+
+def parse_lines(content: str, target_langs: List[str], count: int) -> Dict[str, list]:
+    """解析 lines 协议"""
+    blocks: Dict[str, List[Tuple[Optional[int], str]]] = {}
+    current = None
+    for line in _content_lines(content):
+        header = _HEADER_RE.match(line.strip())
+        if header:
+            current = blocks.setdefault(header.group(1), [])
+            continue
+        if current is None:
+            continue
+        indexed = _INDEXED_RE.match(line.strip())
+        if indexed:
+            current.append((int(indexed.group(1)), _unescape(indexed.group(2))))
+        else:
+            current.append((None, _unescape(line)))
+    if not blocks:
+        raise ProtocolError("响应中没有 @语言 分段")
+    return {lang: _place(entries, count) for lang, entries in blocks.items()}
+
+
+def parse_rows(content: str, target_langs: List[str], count: int) -> Dict[str, list]:
+    """解析 rows 协议（列数与语言数不符的行整行丢弃，避免错位）"""
+    translations: Dict[str, list] = {lang: [None] * count for lang in target_langs}
+    parsed = 0
+    for line in _content_lines(content):
+        row = _ROW_RE.match(line.strip(" "))
+        if row is None:
+            continue
+        index = int(row.group(1))
+        cells = row.group(2).split("\t")
+        if len(cells) != len(target_langs):
+            continue
+        parsed += 1
+        if 1 <= index <= count:
+            for lang, cell in zip(target_langs, cells):
+                if translations[lang][index - 1] is None:
+                    translations[lang][index - 1] = _unescape(cell)
+    if not parsed:
+        raise ProtocolError("响应中没有 序号<TAB>译文... 格式的行")
+    return translations
+
+
+_PARSERS = {
+    "lines": parse_lines,
+    "rows": parse_rows,
+}
+
+
+def parse_response(protocol: str, content: str, target_langs: List[str], count: int) -> Dict[str, list]:
+    """按协议解析翻译响应（json 协议由 translator._parse_translations 处理）
+
+    Raises:
+        ProtocolError: 响应完全不符合协议
+    """
+    return _PARSERS[protocol](content, target_langs, count)
@@ -0,0 +1,292 @@
+"""
+结果库 - 把多次基准测试结果导入 SQLite，建索引后做跨运行查询
+
+表结构：
+- runs        每次运行（时间、数据文件、术语表、提示词、配置）
+- model_runs  每次运行中每个模型的汇总（评分、延迟、成功率）
+- texts       原文（按 sha256 去重）
+- rows        每个 (run, model, text, lang) 一行：译文、分数、延迟、tokens
+
+查询全部走索引，不再解析 JSON。
+"""
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from llm_translate.config import get_model_short_name
+from llm_translate.results_io import load_rows, read_manifest, resolve_details_dir
+
+DEFAULT_DB = "results/results.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    source TEXT UNIQUE NOT NULL,
+    test_time TEXT,
+    data_file TEXT,
+    glossary TEXT,
+    translate_prompt TEXT,
+    target_langs TEXT,
+    config TEXT
+);
+CREATE TABLE IF NOT EXISTS model_runs (
+    run_id INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    model_short TEXT,
+    overall_avg_score REAL,
+    title_avg_score REAL,
+    desc_avg_score REAL,
+    avg_latency_ms REAL,
+    success_rate TEXT,
+    total_time_s REAL,
+    PRIMARY KEY (run_id, model)
+);
+CREATE TABLE IF NOT EXISTS texts (
+    text_hash TEXT PRIMARY KEY,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rows (
+    run_id INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    text_hash TEXT NOT NULL,
+    text_id INTEGER,
+    text_type TEXT,
+    lang TEXT NOT NULL,
+    translation TEXT,
+    success INTEGER,
+    latency_ms REAL,
+    total_tokens INTEGER,
+    score REAL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_glossary ON runs (glossary);
+CREATE INDEX IF NOT EXISTS idx_runs_prompt ON runs (translate_prompt);
+CREATE INDEX IF NOT EXISTS idx_model_runs_model ON model_runs (model, run_id);
+CREATE INDEX IF NOT EXISTS idx_rows_run_model ON rows (run_id, model);
+CREATE INDEX IF NOT EXISTS idx_rows_model_lang_text ON rows (model, lang, text_hash, score);
+CREATE INDEX IF NOT EXISTS idx_rows_text ON rows (text_hash, lang);
+"""
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def connect(path: str = DEFAULT_DB) -> sqlite3.Connection:
+    """打开（必要时创建）结果库"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _load_run(path: Path) -> Tuple[dict, Iterator[dict]]:
+    """读取一次运行，返回 (汇总 JSON, 明细行迭代器)
+
+    支持：汇总文件（自动找 details/ 同名文件或 details_dir）、详细结果文件、jsonl 结果目录。
+    """
+    if path.is_dir():
+        manifest = read_manifest(path)
+        summary = {"test_time": manifest.get("test_time"), "config": manifest.get("config", {}), "results": []}
+        return summary, load_rows(path)
+
+    with open(path, encoding="utf-8") as f:
+        summary = json.load(f)
+
+    run_dir = resolve_details_dir(path, summary.get("details_dir"))
+    if run_dir is not None:
+        return summary, load_rows(run_dir)
+
+    details = summary
+    if not any("details" in r for r in summary.get("results", [])):
+        details_file = path.parent / "details" / path.name
+        if details_file.exists():
+            with open(details_file, encoding="utf-8") as f:
+                details = json.load(f)
+    target_langs = summary.get("config", {}).get("target_langs") or []
+    return summary, _rows_from_details(details, target_langs)
+
+
+def _rows_from_details(details: dict, target_langs: List[str]) -> Iterator[dict]:
+    """把详细结果 JSON 展开为 (model, text, lang) 行"""
+    for r in details.get("results", []):
+        for text_id, single in enumerate(r.get("details") or []):
+            translations = single.get("translations") or {}
+            eval_scores = single.get("eval_scores") or {}
+            for lang in target_langs or list(translations):
+                yield {
+                    "model": r["model"],
+                    "text_id": text_id,
+                    "text_type": single.get("text_type"),
+                    "text": single.get("text"),
+                    "lang": lang,
+                    "translation": translations.get(lang),
+                    "success": single.get("success"),
+                    "latency_ms": single.get("latency_ms"),
+                    "total_tokens": single.get("total_tokens"),
+                    "score": eval_scores.get(lang),
+                }
+
+
+def ingest(conn: sqlite3.Connection, path) -> Tuple[int, int]:
+    """导入一次运行（同一来源重复导入会覆盖），返回 (run_id, 明细行数)"""
+    path = Path(path)
+    summary, rows = _load_run(path)
+    config = summary.get("config", {})
+    source = str(path.resolve())
+
+    with conn:
+        old = conn.execute("SELECT run_id FROM runs WHERE source = ?", (source,)).fetchone()
+        if old is not None:
+            for table in ("rows", "model_runs", "runs"):
+                conn.execute(f"DELETE FROM {table} WHERE run_id = ?", (old["run_id"],))
+
+        cur = conn.execute(
+            "INSERT INTO runs (source, test_time, data_file, glossary, translate_prompt, target_langs, config) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                source,
+                summary.get("test_time"),
+                config.get("data_file"),
+                config.get("glossary"),
+                config.get("translate_prompt"),
+                json.dumps(config.get("target_langs")),
+                json.dumps(config, ensure_ascii=False),
+            ),
+        )
+        run_id = cur.lastrowid
+
+        for r in summary.get("results", []):
+            conn.execute(
+                "INSERT OR REPLACE INTO model_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    r["model"],
+                    r.get("model_short") or get_model_short_name(r["model"]),
+                    r.get("overall_avg_score"),
+                    r.get("title_avg_score"),
+                    r.get("desc_avg_score"),
+                    r.get("avg_latency_ms"),
+                    r.get("success_rate"),
+                    r.get("total_time_s"),
+                ),
+            )
+
+        count = 0
+        seen_texts = set()
+        batch = []
+        for row in rows:
+            h = text_hash(row["text"] or "")
+            if h not in seen_texts:
+                seen_texts.add(h)
+                conn.execute("INSERT OR IGNORE INTO texts VALUES (?, ?)", (h, row["text"] or ""))
+            batch.append((
+                run_id, row["model"], h, row.get("text_id"), row.get("text_type"), row["lang"],
+                row.get("translation"), int(bool(row.get("success"))), row.get("latency_ms"),
+                row.get("total_tokens"), row.get("score"),
+            ))
+            if len(batch) >= 1000:
+                conn.executemany("INSERT INTO rows VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+                count += len(batch)
+                batch.clear()
+        if batch:
+            conn.executemany("INSERT INTO rows VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            count += len(batch)
+
+        # 只有明细没有汇总（jsonl 目录）时，由明细计算模型汇总
+        if not summary.get("results"):
+            conn.execute(
+                "INSERT OR REPLACE INTO model_runs (run_id, model, overall_avg_score, avg_latency_ms) "
+                "SELECT run_id, model, AVG(score), AVG(latency_ms) FROM rows WHERE run_id = ? GROUP BY model",
+                (run_id,),
+            )
+            for (model,) in conn.execute("SELECT model FROM model_runs WHERE run_id = ?", (run_id,)).fetchall():
+                conn.execute(
+                    "UPDATE model_runs SET model_short = ? WHERE run_id = ? AND model = ?",
+                    (get_model_short_name(model), run_id, model),
+                )
+    return run_id, count
+
+
+def list_runs(conn: sqlite3.Connection) -> List[sqlite3.Row]:
+    """所有已导入的运行"""
+    return conn.execute(
+        "SELECT r.run_id, r.test_time, r.glossary, r.translate_prompt, r.source, "
+        "COUNT(m.model) AS models "
+        "FROM runs r LEFT JOIN model_runs m ON m.run_id = r.run_id "
+        "GROUP BY r.run_id ORDER BY r.test_time, r.run_id"
+    ).fetchall()
+
+
+def _model_filter(models: Iterable[str]) -> Tuple[str, list]:
+    """模型过滤条件（完整名或短名）"""
+    models = list(models)
+    marks = ", ".join("?" for _ in models)
+    return f"(m.model IN ({marks}) OR m.model_short IN ({marks}))", models + models
+
+
+def trend(
+    conn: sqlite3.Connection,
+    model: str,
+    glossary: Optional[str] = None,
+    translate_prompt: Optional[str] = None,
+) -> List[sqlite3.Row]:
+    """某模型在各次运行中的评分/延迟变化"""
+    where, params = _model_filter([model])
+    if glossary is not None:
+        where += " AND r.glossary = ?"
+        params.append(glossary)
+    if translate_prompt is not None:
+        where += " AND r.translate_prompt = ?"
+        params.append(translate_prompt)
+    return conn.execute(
+        "SELECT r.run_id, r.test_time, r.glossary, r.translate_prompt, m.model, "
+        "m.overall_avg_score, m.avg_latency_ms, m.success_rate "
+        f"FROM model_runs m JOIN runs r ON r.run_id = m.run_id WHERE {where} "
+        "ORDER BY r.test_time, r.run_id",
+        params,
+    ).fetchall()
+
+
+def resolve_model(conn: sqlite3.Connection, name: str) -> str:
+    """短名转完整模型名（库中找不到时原样返回）"""
+    row = conn.execute(
+        "SELECT model FROM model_runs WHERE model = ? OR model_short = ? LIMIT 1", (name, name)
+    ).fetchone()
+    return row["model"] if row else name
+
+
+def compare(
+    conn: sqlite3.Connection,
+    model_a: str,
+    model_b: str,
+    lang: str,
+    run_id: Optional[int] = None,
+    min_diff: float = 0.0,
+    limit: int = 20,
+) -> List[sqlite3.Row]:
+    """同一文本、同一语言下 A 比 B 分数高的文本（多次运行取平均），按差值降序"""
+    model_a = resolve_model(conn, model_a)
+    model_b = resolve_model(conn, model_b)
+    run_filter = ""
+    params: list = [model_b, lang, model_a, lang]
+    if run_id is not None:
+        run_filter = " AND a.run_id = ? AND b.run_id = ?"
+        params += [run_id, run_id]
+    params += [min_diff, limit]
+    return conn.execute(
+        "SELECT t.text, AVG(a.score) AS score_a, AVG(b.score) AS score_b, "
+        "AVG(a.score) - AVG(b.score) AS diff, "
+        "(SELECT translation FROM rows WHERE model = a.model AND lang = a.lang AND text_hash = a.text_hash "
+        " ORDER BY run_id DESC LIMIT 1) AS translation_a, "
+        "(SELECT translation FROM rows WHERE model = b.model AND lang = b.lang AND text_hash = b.text_hash "
+        " ORDER BY run_id DESC LIMIT 1) AS translation_b "
+        "FROM rows a JOIN rows b ON b.text_hash = a.text_hash AND b.model = ? AND b.lang = ? "
+        "JOIN texts t ON t.text_hash = a.text_hash "
+        f"WHERE a.model = ? AND a.lang = ? AND a.score IS NOT NULL AND b.score IS NOT NULL{run_filter} "
+        "GROUP BY a.text_hash HAVING diff > ? ORDER BY diff DESC LIMIT ?",
+        params,
+    ).fetchall()
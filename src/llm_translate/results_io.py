@@ -0,0 +1,266 @@
+"""
+结果存储格式 - 按行压缩的 JSONL（每个模型一个文件）与快速加载
+
+目录结构::
+
+    results/runs/benchmark_YYYYMMDD_HHMMSS/
+        manifest.json          配置、模型列表、文件名、行数、列名
+        gpt-4o.jsonl.gz        每行一个 (model, text, lang)
+        ...
+
+结果在每条文本完成后立即追加写入，不必等整个测试结束；
+加载时按 manifest 只打开所选模型的文件，并只保留所选列。
+"""
+
+import gzip
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from llm_translate.config import get_model_short_name
+
+MANIFEST = "manifest.json"
+
+# 每行的固定列（评估分数列为 "eval:<评估模型短名>"，按实际评估模型动态增加）
+COLUMNS = [
+    "model",
+    "text_id",
+    "text_type",
+    "text",
+    "lang",
+    "translation",
+    "success",
+    "error",
+    "latency_ms",
+    "prompt_tokens",
+    "completion_tokens",
+    "total_tokens",
+    "score",
+    "text_score",
+    "dedup_of",
+] + [
+    # 文本级字段（每个语言行重复一份，分片合并时据此还原完整明细）
+    "eval_latency_ms",
+    "eval_prompt_tokens",
+    "eval_completion_tokens",
+    "eval_total_tokens",
+    "fanout",
+    "baseline_latency_ms",
+    "baseline_total_tokens",
+    "invalid_cells",
+    "unresolved_cells",
+    "repair_calls",
+    "validation_failed",
+    "timings",
+]
+
+TEXT_FIELDS = COLUMNS[COLUMNS.index("eval_latency_ms"):]
+
+# 累积多少行后刷新一次压缩流（每行都刷新会显著降低压缩率）
+FLUSH_EVERY = 100
+
+
+def _file_name(model: str) -> str:
+    """模型名转为文件名"""
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", model) + ".jsonl.gz"
+
+
+def explode_result(model: str, text_id: int, single, target_langs: List[str]) -> List[dict]:
+    """把一条文本的结果（SingleResult 或其 to_dict()）展开为每个语言一行"""
+    if isinstance(single, dict):
+        get = single.get
+    else:
+        def get(name):
+            return getattr(single, name, None)
+
+    translations = get("translations") or {}
+    eval_scores = get("eval_scores") or {}
+    multi_eval = get("multi_eval") or {}
+    rows = []
+    for lang in target_langs:
+        row = {
+            "model": model,
+            "text_id": text_id,
+            "text_type": get("text_type"),
+            "text": get("text"),
+            "lang": lang,
+            "translation": translations.get(lang),
+            "success": get("success"),
+            "error": get("error"),
+            "latency_ms": get("latency_ms"),
+            "prompt_tokens": get("prompt_tokens"),
+            "completion_tokens": get("completion_tokens"),
+            "total_tokens": get("total_tokens"),
+            "score": eval_scores.get(lang),
+            "text_score": get("score"),
+            "dedup_of": get("dedup_of"),
+        }
+        for field in TEXT_FIELDS:
+            row[field] = get(field)
+        for evaluator, entry in multi_eval.items():
+            row[f"eval:{evaluator}"] = (entry.get("eval_scores") or {}).get(lang)
+        rows.append(row)
+    return rows
+
+
+class ResultWriter:
+    """增量写入一次基准测试的结果（线程安全）
+
+    Args:
+        run_dir: 输出目录
+        target_langs: 目标语言（决定每条文本展开的行）
+        config: 写入 manifest 的测试配置
+    """
+
+    def __init__(self, run_dir, target_langs: List[str], config: Optional[dict] = None):
+        self.run_dir = Path(run_dir)
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self.target_langs = list(target_langs)
+        self.config = config or {}
+        self._lock = threading.Lock()
+        self._files: Dict[str, gzip.GzipFile] = {}
+        self._rows: Dict[str, int] = {}
+        self._unflushed: Dict[str, int] = {}
+        self._columns = list(COLUMNS)
+        self.test_time: Optional[str] = None
+        self._write_manifest(complete=False)
+
+    def write(self, model: str, text_id: int, single) -> None:
+        """追加一条文本的结果"""
+        rows = explode_result(model, text_id, single, self.target_langs)
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows).encode("utf-8")
+        with self._lock:
+            f = self._files.get(model)
+            if f is None:
+                f = gzip.open(self.run_dir / _file_name(model), "ab")
+                self._files[model] = f
+                self._rows.setdefault(model, 0)
+                self._unflushed[model] = 0
+            f.write(data)
+            self._rows[model] += len(rows)
+            self._unflushed[model] += len(rows)
+            if self._unflushed[model] >= FLUSH_EVERY:
+                f.flush()
+                self._unflushed[model] = 0
+            for row in rows:
+                for col in row:
+                    if col not in self._columns:
+                        self._columns.append(col)
+
+    def close(self, test_time: Optional[str] = None) -> Path:
+        """关闭所有文件并写入最终 manifest，返回目录路径"""
+        with self._lock:
+            self.test_time = test_time
+            for f in self._files.values():
+                f.close()
+            self._files.clear()
+            self._write_manifest(complete=True)
+        return self.run_dir
+
+    def _write_manifest(self, complete: bool) -> None:
+        manifest = {
+            "format": "jsonl.gz",
+            "complete": complete,
+            "test_time": self.test_time,
+            "config": self.config,
+            "target_langs": self.target_langs,
+            "columns": self._columns,
+            "models": {
+                model: {"file": _file_name(model), "rows": rows}
+                for model, rows in self._rows.items()
+            },
+        }
+        with open(self.run_dir / MANIFEST, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def resolve_details_dir(summary_path, details_dir: Optional[str]) -> Optional[Path]:
+    """汇总文件中 details_dir 对应的结果目录
+
+    details_dir 相对于汇总文件所在目录（旧版本写的是相对当前目录的路径，也兼容）；
+    都找不到时按默认布局 runs/<汇总文件名> 查找，便于合并从其他节点拷来的分片。
+    """
+    summary_path = Path(summary_path)
+    candidates = []
+    if details_dir:
+        candidates += [summary_path.parent / details_dir, Path(details_dir)]
+    candidates.append(summary_path.parent / "runs" / summary_path.stem)
+    for candidate in candidates:
+        if (candidate / MANIFEST).exists():
+            return candidate
+    return None
+
+
+def read_manifest(run_dir) -> dict:
+    """读取 manifest；未正常结束的运行会按目录下的文件补全模型列表"""
+    run_dir = Path(run_dir)
+    with open(run_dir / MANIFEST, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if not manifest.get("complete"):
+        known = {info["file"] for info in manifest["models"].values()}
+        for path in sorted(run_dir.glob("*.jsonl.gz")):
+            if path.name not in known:
+                manifest["models"][path.name[: -len(".jsonl.gz")]] = {"file": path.name, "rows": None}
+    return manifest
+
+
+def load_rows(
+    run_dir,
+    columns: Optional[Iterable[str]] = None,
+    models: Optional[Iterable[str]] = None,
+) -> Iterator[dict]:
+    """逐行读取结果
+
+    Args:
+        run_dir: 结果目录
+        columns: 只保留这些列（默认全部）
+        models: 只读取这些模型的文件（完整模型名或短名，默认全部）
+
+    Yields:
+        每个 (model, text, lang) 一行
+    """
+    run_dir = Path(run_dir)
+    manifest = read_manifest(run_dir)
+    selected = _select_models(manifest, models)
+    cols = list(columns) if columns is not None else None
+
+    for model in selected:
+        path = run_dir / manifest["models"][model]["file"]
+        try:
+            f = gzip.open(path, "rt", encoding="utf-8")
+        except FileNotFoundError:
+            continue
+        with f:
+            try:
+                for line in f:
+                    row = json.loads(line)
+                    if cols is not None:
+                        row = {c: row.get(c) for c in cols}
+                    yield row
+            except EOFError:
+                # 运行中断时最后一个压缩块可能不完整，已读出的行仍然有效
+                pass
+
+
+def load_columns(
+    run_dir,
+    columns: Iterable[str],
+    models: Optional[Iterable[str]] = None,
+) -> Dict[str, list]:
+    """按列读取结果，返回 {列名: [值, ...]}"""
+    cols = list(columns)
+    table: Dict[str, list] = {c: [] for c in cols}
+    for row in load_rows(run_dir, cols, models):
+        for c in cols:
+            table[c].append(row[c])
+    return table
+
+
+def _select_models(manifest: dict, models: Optional[Iterable[str]]) -> List[str]:
+    available = list(manifest["models"])
+    if models is None:
+        return available
+    wanted = set(models)
+    return [m for m in available if m in wanted or get_model_short_name(m) in wanted]
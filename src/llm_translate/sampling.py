@@ -0,0 +1,128 @@
+"""
+抽样评估模块 - bootstrap 置信区间与提前停止
+
+评估是基准测试中最贵、最慢的部分。抽样模式下按随机顺序评估，
+每个模型的平均分置信区间足够窄、或其排名已与其他模型明显分开时，
+停止继续评估该模型（翻译照常进行）。
+"""
+
+import random
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def bootstrap_ci(
+    values: Sequence[float],
+    confidence: float = 0.95,
+    n_resamples: int = 1000,
+    seed: Optional[int] = None,
+) -> Tuple[float, float]:
+    """均值的 bootstrap 百分位置信区间
+
+    Args:
+        values: 样本
+        confidence: 置信水平
+        n_resamples: 重抽样次数
+        seed: 随机种子（便于复现）
+
+    Returns:
+        (下限, 上限)；样本少于 2 个时上下限等于均值
+    """
+    n = len(values)
+    if n == 0:
+        return (0.0, 0.0)
+    if n == 1:
+        return (float(values[0]), float(values[0]))
+    rng = random.Random(seed)
+    means = []
+    for _ in range(n_resamples):
+        total = 0.0
+        for _ in range(n):
+            total += values[rng.randrange(n)]
+        means.append(total / n)
+    means.sort()
+    alpha = (1 - confidence) / 2
+    low = means[int(alpha * (n_resamples - 1))]
+    high = means[int((1 - alpha) * (n_resamples - 1))]
+    return (low, high)
+
+
+class SequentialEvalSampler:
+    """多模型共享的抽样评估控制器
+
+    Args:
+        target_width: 置信区间宽度目标（分），小于该值即停止
+        min_samples: 至少评估多少条才开始判断
+        confidence: 置信水平
+        check_every: 每新增多少个样本重新计算一次区间
+        n_resamples: bootstrap 重抽样次数
+        seed: 随机种子
+    """
+
+    def __init__(
+        self,
+        target_width: float = 2.0,
+        min_samples: int = 20,
+        confidence: float = 0.95,
+        check_every: int = 5,
+        n_resamples: int = 1000,
+        seed: int = 0,
+    ):
+        self.target_width = target_width
+        self.min_samples = min_samples
+        self.confidence = confidence
+        self.check_every = check_every
+        self.n_resamples = n_resamples
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._scores: Dict[str, List[float]] = {}
+        self._ci: Dict[str, Tuple[float, float]] = {}
+        self._stopped: Dict[str, str] = {}  # model -> 停止原因
+
+    def register(self, model: str) -> None:
+        with self._lock:
+            self._scores.setdefault(model, [])
+
+    def should_evaluate(self, model: str) -> bool:
+        """该模型是否还需要继续评估"""
+        with self._lock:
+            return model not in self._stopped
+
+    def add(self, model: str, score: float) -> None:
+        """加入一个评估分数，必要时更新置信区间并判断是否停止"""
+        with self._lock:
+            scores = self._scores.setdefault(model, [])
+            scores.append(score)
+            n = len(scores)
+            if model in self._stopped or n < self.min_samples or n % self.check_every:
+                return
+            self._ci[model] = bootstrap_ci(scores, self.confidence, self.n_resamples, self.seed)
+            low, high = self._ci[model]
+            if high - low <= self.target_width:
+                self._stopped[model] = "ci_width"
+            elif self._rank_settled(model):
+                self._stopped[model] = "rank_settled"
+
+    def _rank_settled(self, model: str) -> bool:
+        """该模型区间与其他所有模型的区间都不重叠（需持有锁）"""
+        others = [m for m in self._scores if m != model]
+        if not others or any(m not in self._ci for m in others):
+            return False
+        low, high = self._ci[model]
+        return all(high < self._ci[m][0] or low > self._ci[m][1] for m in others)
+
+    def summary(self, model: str) -> dict:
+        """{n, mean, ci_low, ci_high, stopped, reason}"""
+        with self._lock:
+            scores = list(self._scores.get(model, []))
+            reason = self._stopped.get(model)
+        low, high = bootstrap_ci(scores, self.confidence, self.n_resamples, self.seed)
+        return {
+            "n": len(scores),
+            "mean": sum(scores) / len(scores) if scores else None,
+            "ci_low": low if scores else None,
+            "ci_high": high if scores else None,
+            "confidence": self.confidence,
+            "stopped": reason is not None,
+            "reason": reason,
+        }
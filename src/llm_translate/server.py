@@ -0,0 +1,348 @@
+"""
+HTTP 翻译服务 - 动态请求合批
+
+单条翻译请求会在一个短时间窗口内（或直到 token 预算装满）暂存，
+按 (model, langs, glossary, prompt) 合并为一次 multi_translate 调用，
+再按下标把结果分发给各个等待中的调用方。分发前校验合并结果：
+某个语言的数组缺行或多行（下标可能整体错位）时，该语言对所有调用方都按失败处理。
+
+接口：
+- POST /translate  {"text": "...", "model": "...", "langs": [...], "glossary": "...", "translate_prompt": "..."}
+- GET  /stats      合批统计（批大小分布、排队延迟）
+- GET  /metrics    Prometheus 指标（启用时）
+- GET  /health     健康检查
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from llm_translate import metrics
+from llm_translate.config import DEFAULT_TARGET_LANGS
+from llm_translate.translator import estimate_tokens, get_coalescing_stats, multi_translate
+from llm_translate.validate import validate_translations
+
+# 合批键: (model, langs, glossary, translate_prompt, source_lang)
+BatchKey = Tuple[str, Tuple[str, ...], Optional[str], Optional[str], str]
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+QUEUE_DELAY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# 数组缺行/多行时下标可能整体错位，该语言的所有调用方都不能按下标取结果
+MISALIGNED_REASONS = ("missing", "length")
+
+
+@dataclass
+class _PendingRequest:
+    """等待合批的单条请求"""
+    text: str
+    future: Future
+    enqueued_at: float
+
+
+@dataclass
+class _PendingBatch:
+    """某个合批键下正在积累的批次"""
+    requests: List[_PendingRequest] = field(default_factory=list)
+    tokens: int = 0
+    opened_at: float = 0.0
+
+
+class DynamicBatcher:
+    """动态合批器
+
+    Args:
+        window_ms: 第一条请求进入后最多等待的时间
+        max_batch_size: 单批最多文本数
+        max_batch_tokens: 单批源文本 token 预算（估算值）
+        max_workers: 同时执行的批次数
+        translate_fn: 翻译函数，默认 multi_translate
+    """
+
+    def __init__(
+        self,
+        window_ms: float = 50.0,
+        max_batch_size: int = 32,
+        max_batch_tokens: int = 2000,
+        max_workers: int = 8,
+        translate_fn: Callable = multi_translate,
+    ):
+        self.window_s = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.translate_fn = translate_fn
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch")
+        self._cond = threading.Condition()
+        self._pending: Dict[BatchKey, _PendingBatch] = {}
+        self._closed = False
+        # 统计
+        self._batch_sizes: Dict[int, int] = {}
+        self._batches = 0
+        self._requests = 0
+        self._queue_delay_total_ms = 0.0
+        self._queue_delay_max_ms = 0.0
+        self._flusher = threading.Thread(target=self._flush_loop, name="batch-flusher", daemon=True)
+        self._flusher.start()
+
+    def submit(
+        self,
+        text: str,
+        model: str,
+        target_langs: List[str],
+        glossary: Optional[str] = None,
+        translate_prompt: Optional[str] = None,
+        source_lang: str = "en",
+    ) -> Future:
+        """提交单条文本，返回在批次完成后得到结果的 Future"""
+        key: BatchKey = (model, tuple(target_langs), glossary, translate_prompt, source_lang)
+        future: Future = Future()
+        now = time.perf_counter()
+        tokens = estimate_tokens(text)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("batcher 已关闭")
+            batch = self._pending.get(key)
+            # 预算放不下就先把当前批次发出去
+            if batch and batch.requests and batch.tokens + tokens > self.max_batch_tokens:
+                self._dispatch(key, self._pending.pop(key))
+                batch = None
+            if batch is None:
+                batch = _PendingBatch(opened_at=now)
+                self._pending[key] = batch
+            batch.requests.append(_PendingRequest(text=text, future=future, enqueued_at=now))
+            batch.tokens += tokens
+            if len(batch.requests) >= self.max_batch_size or batch.tokens >= self.max_batch_tokens:
+                self._dispatch(key, self._pending.pop(key))
+            else:
+                self._cond.notify()
+        return future
+
+    def _flush_loop(self) -> None:
+        """后台线程：把超过时间窗口的批次发出去"""
+        with self._cond:
+            while not self._closed:
+                now = time.perf_counter()
+                next_deadline = None
+                for key in list(self._pending):
+                    deadline = self._pending[key].opened_at + self.window_s
+                    if deadline <= now:
+                        self._dispatch(key, self._pending.pop(key))
+                    elif next_deadline is None or deadline < next_deadline:
+                        next_deadline = deadline
+                timeout = None if next_deadline is None else max(next_deadline - now, 0)
+                self._cond.wait(timeout)
+
+    def _dispatch(self, key: BatchKey, batch: _PendingBatch) -> None:
+        """在持有锁时调用：记录统计并把批次交给线程池"""
+        now = time.perf_counter()
+        size = len(batch.requests)
+        self._batches += 1
+        self._requests += size
+        self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+        registry = metrics.get_registry()
+        for req in batch.requests:
+            delay_ms = (now - req.enqueued_at) * 1000
+            self._queue_delay_total_ms += delay_ms
+            self._queue_delay_max_ms = max(self._queue_delay_max_ms, delay_ms)
+            if registry is not None:
+                registry.histogram(
+                    "llm_translate_batch_queue_delay_seconds", "合批排队延迟（秒）",
+                    ("model",), QUEUE_DELAY_BUCKETS,
+                ).observe(delay_ms / 1000, model=key[0])
+        if registry is not None:
+            registry.histogram(
+                "llm_translate_batch_size", "合批后的批大小", ("model",), BATCH_SIZE_BUCKETS,
+            ).observe(size, model=key[0])
+        self._executor.submit(self._run_batch, key, batch.requests, now)
+
+    def _run_batch(self, key: BatchKey, requests: List[_PendingRequest], dispatched_at: float) -> None:
+        """执行一次合并后的 multi_translate，并按下标分发结果"""
+        model, langs, glossary, translate_prompt, source_lang = key
+        try:
+            result = self.translate_fn(
+                texts=[r.text for r in requests],
+                source_lang=source_lang,
+                target_langs=list(langs),
+                model=model,
+                glossary=glossary,
+                translate_prompt=translate_prompt,
+            )
+        except Exception as e:
+            for req in requests:
+                req.future.set_exception(e)
+            return
+
+        # 分发前校验合并结果：错位的语言整体作废，空译文只作废对应单元格
+        issues = result.unresolved_cells
+        if result.success and issues is None:
+            issues = validate_translations([r.text for r in requests], result.translations, langs)
+        misaligned = {i.lang for i in issues or () if i.reason in MISALIGNED_REASONS}
+        bad_cells = {(i.lang, i.index) for i in issues or () if i.reason == "empty"}
+
+        for idx, req in enumerate(requests):
+            translations = {}
+            missing = []
+            for lang in langs:
+                values = result.translations.get(lang, [])
+                if lang not in misaligned and (lang, idx) not in bad_cells and idx < len(values):
+                    translations[lang] = values[idx]
+                else:
+                    missing.append(lang)
+            error = result.error
+            if result.success and missing:
+                error = f"缺少语言结果: {', '.join(missing)}"
+            req.future.set_result({
+                "text": req.text,
+                "translations": translations,
+                "model": model,
+                "success": result.success and not missing,
+                "error": error,
+                "latency_ms": result.latency_ms,
+                "queue_delay_ms": (dispatched_at - req.enqueued_at) * 1000,
+                "batch_size": len(requests),
+            })
+
+    def stats(self) -> dict:
+        """合批统计"""
+        with self._cond:
+            return {
+                "batches": self._batches,
+                "requests": self._requests,
+                "avg_batch_size": self._requests / self._batches if self._batches else 0,
+                "batch_size_distribution": dict(sorted(self._batch_sizes.items())),
+                "avg_queue_delay_ms": self._queue_delay_total_ms / self._requests if self._requests else 0,
+                "max_queue_delay_ms": self._queue_delay_max_ms,
+                "pending": sum(len(b.requests) for b in self._pending.values()),
+                "coalescing": get_coalescing_stats(),
+            }
+
+    def close(self) -> None:
+        """发出所有剩余批次并停止"""
+        with self._cond:
+            self._closed = True
+            for key in list(self._pending):
+                self._dispatch(key, self._pending.pop(key))
+            self._cond.notify_all()
+        self._executor.shutdown(wait=True)
+
+
+def _make_handler(
+    batcher: DynamicBatcher,
+    default_model: str,
+    default_langs: List[str],
+    default_glossary: Optional[str],
+    default_prompt: Optional[str],
+    request_timeout: float,
+):
+    """构建绑定到 batcher 的请求处理类"""
+
+    class TranslateHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path == "/stats":
+                self._send_json(200, batcher.stats())
+            elif path == "/health":
+                self._send_json(200, {"status": "ok"})
+            elif path == "/metrics" and metrics.get_registry() is not None:
+                body = metrics.get_registry().render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", metrics.CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path.split("?")[0] != "/translate":
+                self._send_json(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                data = json.loads(self.rfile.read(length) or b"{}")
+            except (ValueError, json.JSONDecodeError) as e:
+                self._send_json(400, {"error": f"请求体不是有效 JSON: {e}"})
+                return
+            text = data.get("text")
+            if not isinstance(text, str) or not text:
+                self._send_json(400, {"error": "缺少 text 字段"})
+                return
+
+            langs = data.get("langs") or default_langs
+            if not isinstance(langs, list) or not all(isinstance(lang, str) and lang for lang in langs):
+                self._send_json(400, {"error": "langs 必须是语言代码字符串列表"})
+                return
+            options = {
+                "model": data.get("model") or default_model,
+                "glossary": data.get("glossary", default_glossary),
+                "translate_prompt": data.get("translate_prompt", default_prompt),
+                "source_lang": data.get("source_lang", "en"),
+            }
+            # 这些字段组成合批键，必须是字符串（glossary / translate_prompt 可为 null）
+            for name, value in options.items():
+                if not (isinstance(value, str) or (value is None and name in ("glossary", "translate_prompt"))):
+                    self._send_json(400, {"error": f"{name} 必须是字符串"})
+                    return
+
+            try:
+                future = batcher.submit(text=text, target_langs=langs, **options)
+            except RuntimeError as e:
+                # 服务正在关闭
+                self._send_json(503, {"error": str(e)})
+                return
+            try:
+                result = future.result(timeout=request_timeout)
+            except Exception as e:
+                self._send_json(502, {"error": str(e)})
+                return
+            self._send_json(200 if result["success"] else 502, result)
+
+        def log_message(self, format, *args):
+            pass
+
+    return TranslateHandler
+
+
+def create_server(
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    model: str = "gemini-2.5-flash-lite",
+    target_langs: Optional[List[str]] = None,
+    glossary: Optional[str] = None,
+    translate_prompt: Optional[str] = None,
+    window_ms: float = 50.0,
+    max_batch_size: int = 32,
+    max_batch_tokens: int = 2000,
+    max_workers: int = 8,
+    request_timeout: float = 300.0,
+) -> Tuple[ThreadingHTTPServer, DynamicBatcher]:
+    """创建翻译服务（未启动），返回 (server, batcher)"""
+    batcher = DynamicBatcher(
+        window_ms=window_ms,
+        max_batch_size=max_batch_size,
+        max_batch_tokens=max_batch_tokens,
+        max_workers=max_workers,
+    )
+    handler = _make_handler(
+        batcher,
+        default_model=model,
+        default_langs=target_langs or DEFAULT_TARGET_LANGS,
+        default_glossary=glossary,
+        default_prompt=translate_prompt,
+        request_timeout=request_timeout,
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server, batcher
@@ -0,0 +1,106 @@
+"""
+分片执行模块 - 把基准测试的 (model, text) 工作项按哈希分到 N 个分片，再合并各分片结果
+
+每个分片是一次独立的 benchmark 进程（可在不同核或不同机器上运行），写出自己的
+汇总/明细文件；`llm-translate merge` 读取全部分片，按 text_id 还原顺序后重新计算汇总。
+
+分片键为 (模型, 去重键) 的 crc32（去重键见 dedup.dedup_key）：与进程、机器、PYTHONHASHSEED 无关，
+且同一模型下 --dedup 视为相同的文本落在同一分片，--dedup 在分片内依然有效。
+"""
+
+import json
+import zlib
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from llm_translate.dedup import dedup_key
+from llm_translate.results_io import TEXT_FIELDS, load_rows, resolve_details_dir
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """解析 "i/N"（i 从 0 开始）"""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"分片格式应为 i/N，如 0/4: {value}") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"分片序号需满足 0 <= i < N: {value}")
+    return index, count
+
+
+def shard_of(model: str, text: str, count: int) -> int:
+    """(model, text) 所属分片"""
+    key = f"{model}\0{dedup_key(text)}".encode("utf-8")
+    return zlib.crc32(key) % count
+
+
+def load_shard(path) -> Tuple[dict, Dict[str, List[dict]]]:
+    """读取一个分片的输出，返回 (汇总 JSON, {model: [明细 dict, ...]})
+
+    明细来自 details/ 下的同名文件（--format json）或 details_dir（--format jsonl，相对汇总文件所在目录）。
+    jsonl 明细按 (model, text_id) 从逐语言行还原（译文、分数、延迟、tokens、校验与连接阶段等文本级字段）。
+    """
+    path = Path(path)
+    with open(path, encoding="utf-8") as f:
+        summary = json.load(f)
+
+    if summary.get("details_dir"):
+        run_dir = resolve_details_dir(path, summary["details_dir"])
+        if run_dir is None:
+            raise FileNotFoundError(f"找不到分片明细目录: {summary['details_dir']}（相对 {path.parent}）")
+        return summary, _details_from_rows(load_rows(run_dir))
+
+    details_file = path.parent / "details" / path.name
+    if not details_file.exists():
+        raise FileNotFoundError(f"找不到分片明细: {details_file}")
+    with open(details_file, encoding="utf-8") as f:
+        details = json.load(f)
+    return summary, {r["model"]: r.get("details") or [] for r in details.get("results", [])}
+
+
+def _details_from_rows(rows) -> Dict[str, List[dict]]:
+    """jsonl 逐语言行 -> 每条文本一个明细 dict"""
+    by_key: Dict[Tuple[str, int], dict] = {}
+    for row in rows:
+        key = (row["model"], row["text_id"])
+        single = by_key.get(key)
+        if single is None:
+            single = by_key[key] = {
+                "text_id": row["text_id"],
+                "text_type": row.get("text_type"),
+                "text": row.get("text"),
+                "success": row.get("success"),
+                "error": row.get("error"),
+                "latency_ms": row.get("latency_ms"),
+                "score": row.get("text_score"),
+                "prompt_tokens": row.get("prompt_tokens"),
+                "completion_tokens": row.get("completion_tokens"),
+                "total_tokens": row.get("total_tokens"),
+                "dedup_of": row.get("dedup_of"),
+                **{field: row.get(field) for field in TEXT_FIELDS},
+                "translations": {},
+                "eval_scores": {},
+                "multi_eval": {},
+            }
+            # 旧版本的行没有这些列
+            single["repair_calls"] = single["repair_calls"] or 0
+            single["validation_failed"] = bool(single["validation_failed"])
+        lang = row["lang"]
+        if row.get("translation") is not None:
+            single["translations"][lang] = row["translation"]
+        if row.get("score") is not None:
+            single["eval_scores"][lang] = row["score"]
+        for col, value in row.items():
+            if col.startswith("eval:") and value is not None:
+                entry = single["multi_eval"].setdefault(col[len("eval:"):], {"eval_scores": {}})
+                entry["eval_scores"][lang] = value
+
+    details: Dict[str, List[dict]] = {}
+    for (model, _), single in by_key.items():
+        for entry in single["multi_eval"].values():
+            scores = entry["eval_scores"]
+            entry["score"] = sum(scores.values()) / len(scores)
+        for field in ("translations", "eval_scores", "multi_eval"):
+            single[field] = single[field] or None
+        details.setdefault(model, []).append(single)
+    return details
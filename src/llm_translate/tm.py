@@ -0,0 +1,366 @@
+"""
+翻译记忆模块 - 保存历史 (原文, 语言, 译文)，按相似度检索复用
+
+- 精确命中（原文相同，仅做 Unicode NFC）：直接返回历史译文，不调用模型
+- 模糊命中：把最相似的几条历史译文作为简短的参考译文注入提示词；
+  相似度超过阈值时可改用便宜模型。仅大小写、空白不同的原文也走这里（相似度 1.0），
+  由模型按新原文的格式翻译
+- 索引：字符 3-gram 的 MinHash 签名 + LSH 分桶取候选，再用精确 Jaccard 重排，
+  单次查询不随记忆库规模线性增长（万级条目下亚毫秒）
+
+持久化为追加写的 JSONL（每行一条 {source, scope, translations}），启动时重放。
+"""
+
+import heapq
+import json
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from llm_translate.dedup import dedup_key, normalize_text
+
+# 命中的相似度分档（下限, 名称），按下限降序；精确命中单独计为 "exact"
+SIMILARITY_BANDS = [
+    (0.9, "0.9-1.0"),
+    (0.8, "0.8-0.9"),
+    (0.7, "0.7-0.8"),
+    (0.5, "0.5-0.7"),
+]
+
+
+def similarity_band(similarity: Optional[float], exact: bool = False) -> str:
+    """相似度所属分档名"""
+    if exact:
+        return "exact"
+    if similarity is not None:
+        for low, name in SIMILARITY_BANDS:
+            if similarity >= low:
+                return name
+    return "miss"
+
+
+def shingles(norm: str, size: int = 3) -> frozenset:
+    """规范化文本的字符 n-gram 集合（过短的文本整体作为一个 gram）"""
+    if len(norm) <= size:
+        return frozenset([norm])
+    return frozenset(norm[i:i + size] for i in range(len(norm) - size + 1))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass(slots=True)
+class MemoryEntry:
+    """一条记忆：原文及其各语言译文"""
+    source: str
+    norm: str
+    scope: Optional[str]
+    translations: Dict[str, str]
+    grams: frozenset
+
+
+@dataclass(slots=True)
+class MemoryMatch:
+    """检索结果"""
+    source: str
+    translations: Dict[str, str]
+    similarity: float
+    exact: bool
+
+
+class TranslationMemory:
+    """翻译记忆（线程安全）
+
+    Args:
+        path: JSONL 持久化文件，None 时只在内存中
+        num_perm: MinHash 置换数
+        bands: LSH 分桶数（num_perm 需能被整除；相似度约 (1/bands)^(bands/num_perm) 以上的文本大概率成为候选）
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, num_perm: int = 32, bands: int = 8):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) 必须能被 bands ({bands}) 整除")
+        self.path = Path(path) if path else None
+        self.num_perm = num_perm
+        self.bands = bands
+        self._rows = num_perm // bands
+        # 用与随机掩码异或代替 (a*h+b) mod p 置换：精度相当，签名计算快约 3 倍
+        rng = random.Random(1)
+        self._masks = [rng.getrandbits(32) for _ in range(num_perm)]
+        self._lock = threading.Lock()
+        self._entries: List[MemoryEntry] = []
+        self._exact: Dict[Tuple[Optional[str], str], int] = {}
+        self._buckets: Dict[Tuple[int, tuple], List[int]] = {}
+        self._hits: Dict[Optional[str], Dict[str, int]] = {}
+        self._served: Dict[Optional[str], Dict[str, int]] = {}
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    # 中断写入留下的半行
+                    continue
+                self._add(item["source"], item.get("translations") or {}, item.get("scope"))
+
+    def _signature(self, grams: frozenset) -> List[int]:
+        hashes = [zlib.crc32(g.encode("utf-8")) for g in grams]
+        return [min([h ^ mask for h in hashes]) for mask in self._masks]
+
+    def _band_keys(self, signature: List[int]) -> List[Tuple[int, tuple]]:
+        r = self._rows
+        return [(i, tuple(signature[i * r:(i + 1) * r])) for i in range(self.bands)]
+
+    def _add(self, source: str, translations: Dict[str, str], scope: Optional[str]) -> None:
+        exact_key = (scope, dedup_key(source))
+        idx = self._exact.get(exact_key)
+        if idx is not None:
+            self._entries[idx].translations.update(translations)
+            return
+        norm = normalize_text(source)
+        grams = shingles(norm)
+        idx = len(self._entries)
+        self._entries.append(MemoryEntry(source, norm, scope, dict(translations), grams))
+        self._exact[exact_key] = idx
+        for key in self._band_keys(self._signature(grams)):
+            self._buckets.setdefault(key, []).append(idx)
+
+    def add(self, source: str, translations: Dict[str, str], scope: Optional[str] = None) -> None:
+        """写入一条记忆（同一 scope 下相同的原文合并译文）
+
+        Args:
+            source: 原文
+            translations: {lang: 译文}，空译文会被忽略
+            scope: 作用域（如模型名），不同作用域的记忆互不可见
+        """
+        translations = {lang: t for lang, t in translations.items() if t}
+        if not translations:
+            return
+        with self._lock:
+            self._add(source, translations, scope)
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(
+                        {"source": source, "scope": scope, "translations": translations}, ensure_ascii=False,
+                    ) + "\n")
+
+    def lookup(
+        self,
+        text: str,
+        k: int = 2,
+        scope: Optional[str] = None,
+        target_langs: Optional[Sequence[str]] = None,
+        min_similarity: float = 0.5,
+    ) -> List[MemoryMatch]:
+        """检索最相似的 k 条记忆（按相似度降序）
+
+        Args:
+            text: 待翻译原文
+            k: 最多返回条数
+            scope: 作用域
+            target_langs: 只返回含这些语言译文的记忆（精确命中需全部语言齐全才算 exact）
+            min_similarity: Jaccard 相似度下限
+        """
+        norm = normalize_text(text)
+        langs = list(target_langs or [])
+        with self._lock:
+            # 精确命中只认原文本身；规范化后才相同的（大小写、空白不同）按模糊命中处理
+            idx = self._exact.get((scope, dedup_key(text)))
+            if idx is not None:
+                entry = self._entries[idx]
+                if all(entry.translations.get(lang) for lang in langs):
+                    return [MemoryMatch(entry.source, dict(entry.translations), 1.0, True)]
+
+            grams = shingles(norm)
+            # 同桶次数越多，估计相似度越高；只对前若干个候选做精确 Jaccard
+            collisions: Dict[int, int] = {}
+            for key in self._band_keys(self._signature(grams)):
+                for i in self._buckets.get(key, ()):
+                    collisions[i] = collisions.get(i, 0) + 1
+            candidates = heapq.nlargest(max(k * 8, 16), collisions, key=collisions.__getitem__)
+
+            matches = []
+            for i in candidates:
+                entry = self._entries[i]
+                if entry.scope != scope:
+                    continue
+                if langs and not any(entry.translations.get(lang) for lang in langs):
+                    continue
+                sim = jaccard(grams, entry.grams)
+                if sim >= min_similarity:
+                    matches.append(MemoryMatch(entry.source, dict(entry.translations), sim, False))
+        matches.sort(key=lambda m: m.similarity, reverse=True)
+        return matches[:k]
+
+    def record(self, scope: Optional[str], match: Optional[MemoryMatch], served_by: str) -> None:
+        """记录一次查询的命中分档与处理方式（exact / cheap / model）"""
+        band = similarity_band(match.similarity if match else None, match.exact if match else False)
+        with self._lock:
+            hits = self._hits.setdefault(scope, {})
+            hits[band] = hits.get(band, 0) + 1
+            served = self._served.setdefault(scope, {})
+            served[served_by] = served.get(served_by, 0) + 1
+
+    def stats(self, scope: Optional[str] = None) -> dict:
+        """按相似度分档的命中数与命中率"""
+        with self._lock:
+            hits = dict(self._hits.get(scope, {}))
+            served = dict(self._served.get(scope, {}))
+        total = sum(hits.values())
+        bands = ["exact"] + [name for _, name in SIMILARITY_BANDS] + ["miss"]
+        return {
+            "lookups": total,
+            "entries": len(self._entries),
+            "bands": {
+                name: {"count": hits.get(name, 0), "rate": hits.get(name, 0) / total if total else 0.0}
+                for name in bands
+            },
+            "hit_rate": 1 - hits.get("miss", 0) / total if total else 0.0,
+            "served": served,
+        }
+
+
+def translate_with_memory(
+    texts: Union[str, List[str]],
+    memory: TranslationMemory,
+    source_lang: str = "en",
+    target_langs: Optional[List[str]] = None,
+    model: str = "gemini-2.5-flash-lite",
+    cheap_model: Optional[str] = None,
+    threshold: float = 0.9,
+    min_similarity: float = 0.5,
+    k: int = 2,
+    scope: Optional[str] = None,
+    **kwargs,
+):
+    """带翻译记忆的 multi_translate
+
+    - 精确命中：直接使用历史译文
+    - 相似度 ≥ threshold 且指定了 cheap_model：交给便宜模型，附参考译文
+    - 其余：交给 model，相似度 ≥ min_similarity 的记忆作为参考译文
+    成功的译文写回记忆。
+
+    Args:
+        texts: 单个文本或文本列表
+        memory: 翻译记忆
+        cheap_model: 高相似度文本使用的模型（None 时仍用 model）
+        threshold: 改用 cheap_model 的相似度阈值
+        min_similarity: 作为参考译文的最低相似度
+        k: 每条文本最多注入的参考译文数
+        scope: 记忆作用域（默认用 model）
+        **kwargs: 透传给 multi_translate（glossary、translate_prompt、fanout 等）
+
+    Returns:
+        MultiTranslateResult（按原顺序合并；任一子请求失败则整体失败）
+    """
+    from llm_translate.config import DEFAULT_TARGET_LANGS
+    from llm_translate.translator import MultiTranslateResult, multi_translate
+
+    if isinstance(texts, str):
+        texts = [texts]
+    target_langs = target_langs or DEFAULT_TARGET_LANGS
+    scope = model if scope is None else scope
+
+    start_time = time.perf_counter()
+    served: Dict[int, Dict[str, str]] = {}
+    # (模型, 是否便宜模型) -> [(下标, 参考译文)]
+    groups: Dict[Tuple[str, str], List[Tuple[int, List[MemoryMatch]]]] = {}
+    for i, text in enumerate(texts):
+        matches = memory.lookup(text, k=k, scope=scope, target_langs=target_langs, min_similarity=min_similarity)
+        best = matches[0] if matches else None
+        if best is not None and best.exact:
+            served[i] = {lang: best.translations[lang] for lang in target_langs}
+            memory.record(scope, best, "exact")
+        elif best is not None and cheap_model and best.similarity >= threshold:
+            groups.setdefault((cheap_model, "cheap"), []).append((i, matches))
+            memory.record(scope, best, "cheap")
+        else:
+            groups.setdefault((model, "model"), []).append((i, matches))
+            memory.record(scope, best, "model")
+
+    def run(group_key):
+        group_model, _ = group_key
+        items = groups[group_key]
+        references = []
+        seen = set()
+        for _, matches in items:
+            for m in matches:
+                if m.source not in seen:
+                    seen.add(m.source)
+                    references.append((m.source, m.translations))
+        return multi_translate(
+            [texts[i] for i, _ in items], source_lang, target_langs, group_model,
+            references=references or None, **kwargs,
+        )
+
+    keys = list(groups)
+    if len(keys) > 1:
+        with ThreadPoolExecutor(max_workers=len(keys)) as executor:
+            parts = list(executor.map(run, keys))
+    else:
+        parts = [run(key) for key in keys]
+
+    from llm_translate.validate import CellIssue
+
+    invalid_cells: List[CellIssue] = []
+    unresolved_cells: List[CellIssue] = []
+    for key, part in zip(keys, parts):
+        if not part.success:
+            continue
+        indices = [i for i, _ in groups[key]]
+        # 问题单元格的下标换回原顺序；未通过校验的译文不写入记忆
+        invalid_cells += [CellIssue(c.lang, indices[c.index], c.reason) for c in part.invalid_cells or ()]
+        unresolved_cells += [CellIssue(c.lang, indices[c.index], c.reason) for c in part.unresolved_cells or ()]
+        bad = {c.index for c in part.unresolved_cells or ()}
+        for pos, i in enumerate(indices):
+            trans = {lang: part.translations.get(lang, [])[pos] for lang in target_langs
+                     if pos < len(part.translations.get(lang, []))}
+            served[i] = trans
+            if len(trans) == len(target_langs) and pos not in bad:
+                memory.add(texts[i], trans, scope)
+
+    errors = [p.error for p in parts if not p.success and p.error]
+    success = all(p.success for p in parts)
+    translations: Dict[str, List[str]] = {lang: [] for lang in target_langs}
+    if success:
+        # 与 multi_translate 一致：列表偏短即缺失，在第一个缺失位置截断
+        for lang in target_langs:
+            for i in range(len(texts)):
+                if lang not in served.get(i, {}):
+                    break
+                translations[lang].append(served[i][lang])
+
+    return MultiTranslateResult(
+        source_texts=texts,
+        source_lang=source_lang,
+        translations=translations if success else {},
+        model=model,
+        latency_ms=(time.perf_counter() - start_time) * 1000,
+        prompt_tokens=sum(p.prompt_tokens for p in parts),
+        completion_tokens=sum(p.completion_tokens for p in parts),
+        total_tokens=sum(p.total_tokens for p in parts),
+        success=success,
+        error="; ".join(errors) if errors else None,
+        error_type=next((p.error_type for p in parts if p.error_type), None),
+        invalid_cells=invalid_cells,
+        unresolved_cells=unresolved_cells,
+        repair_calls=sum(p.repair_calls for p in parts),
+    )
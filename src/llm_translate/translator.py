@@ -2,25 +2,105 @@
 核心翻译模块 - 一次 API 调用，同时输出多个语言
 """
 
+import dataclasses
 import json
+import math
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 
 import httpx
 
 from llm_translate.config import (
     API_BASE_URL,
     API_KEY,
-    EU_LANGUAGES,
     EVALUATOR_MODEL,
 )
-from llm_translate.glossary import build_glossary_prompt, build_matched_glossary_prompt
+from llm_translate import metrics
+from llm_translate.cassette import get_cassette
+from llm_translate.coalesce import SingleFlight, request_key
+from llm_translate.dedup import dedup_texts
+from llm_translate.protocols import ProtocolError, parse_response, split_directive
+from llm_translate.validate import CellIssue, validate_translations
 
 
 # 提示词模板缓存
 _prompt_cache: Dict[str, str] = {}
+# 翻译模板 -> 响应协议
+_protocol_cache: Dict[str, str] = {}
+
+# 相同请求并发合并（single-flight）
+_translate_flight = SingleFlight("translate")
+_evaluate_flight = SingleFlight("evaluate")
+
+
+# 各模型观测到的输出速度 (completion tokens/s, EWMA)，用于自动选择 fan-out 份数
+_model_throughput: Dict[str, float] = {}
+_throughput_lock = threading.Lock()
+_THROUGHPUT_EWMA_ALPHA = 0.2
+DEFAULT_TOKENS_PER_SECOND = 80.0
+# auto 模式下单个请求的目标生成耗时（秒）
+FANOUT_TARGET_SECONDS = 3.0
+# 译文相对源文本的 token 膨胀系数（JSON 引号、德语等更长的语言）
+_OUTPUT_EXPANSION = 1.4
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估计文本 token 数（约 4 字符 / token）"""
+    return len(text) // 4 + 1
+
+
+def _observe_throughput(model: str, completion_tokens: int, latency_ms: float) -> None:
+    """记录一次请求的输出速度"""
+    if completion_tokens <= 0 or latency_ms <= 0:
+        return
+    tps = completion_tokens / (latency_ms / 1000)
+    with _throughput_lock:
+        prev = _model_throughput.get(model)
+        _model_throughput[model] = tps if prev is None else (
+            _THROUGHPUT_EWMA_ALPHA * tps + (1 - _THROUGHPUT_EWMA_ALPHA) * prev
+        )
+
+
+def get_model_throughput(model: str) -> Optional[float]:
+    """返回模型观测到的输出速度 (tokens/s)，尚无观测时返回 None"""
+    with _throughput_lock:
+        return _model_throughput.get(model)
+
+
+def choose_fanout(texts: List[str], target_langs: List[str], model: str) -> int:
+    """根据文本长度和模型输出速度估算 fan-out 份数
+
+    估算一次性输出所有语言需要的时间，按 FANOUT_TARGET_SECONDS 切分，
+    结果限制在 [1, len(target_langs)]。
+    """
+    output_tokens = sum(estimate_tokens(t) for t in texts) * len(target_langs) * _OUTPUT_EXPANSION
+    tps = get_model_throughput(model) or DEFAULT_TOKENS_PER_SECOND
+    k = math.ceil(output_tokens / tps / FANOUT_TARGET_SECONDS)
+    return max(1, min(k, len(target_langs)))
+
+
+def _split_langs(target_langs: List[str], k: int) -> List[List[str]]:
+    """把目标语言切成 k 份（尽量均匀，保持顺序）"""
+    size, extra = divmod(len(target_langs), k)
+    groups, start = [], 0
+    for i in range(k):
+        end = start + size + (1 if i < extra else 0)
+        groups.append(target_langs[start:end])
+        start = end
+    return [g for g in groups if g]
+
+
+def get_coalescing_stats() -> Dict[str, dict]:
+    """返回翻译/评估请求合并统计 {translate: {...}, evaluate: {...}}"""
+    return {
+        "translate": _translate_flight.stats(),
+        "evaluate": _evaluate_flight.stats(),
+    }
 
 
 def load_prompt_template(name: str, prompt_type: str) -> str:
@@ -36,7 +116,9 @@ def load_prompt_template(name: str, prompt_type: str) -> str:
     """
     cache_key = f"{prompt_type}_{name}"
     if cache_key in _prompt_cache:
+        metrics.record_cache("prompt_template", hit=True)
         return _prompt_cache[cache_key]
+    metrics.record_cache("prompt_template", hit=False)
 
     # 如果是文件路径，直接加载
     path = Path(name)
@@ -57,7 +139,16 @@ def load_prompt_template(name: str, prompt_type: str) -> str:
     raise FileNotFoundError(f"提示词模板不存在: {name} (尝试路径: {template_file})")
 
 
-@dataclass
+def get_translate_protocol(translate_prompt: Optional[str] = None) -> str:
+    """翻译模板声明的响应协议 (json / lines / rows，见 protocols 模块)"""
+    name = translate_prompt or "default"
+    protocol = _protocol_cache.get(name)
+    if protocol is None:
+        protocol = _protocol_cache[name] = split_directive(load_prompt_template(name, "translate"))[0]
+    return protocol
+
+
+@dataclass(slots=True)
 class MultiTranslateResult:
     """多语言翻译结果"""
     source_texts: List[str]
@@ -70,6 +161,13 @@ class MultiTranslateResult:
     total_tokens: int
     success: bool
     error: Optional[str] = None
+    fanout: int = 1  # 拆分成的并行请求数
+    error_type: Optional[str] = None  # 错误类型 (rate_limited, timeout, http_error, parse_error, error)
+    unique_texts: Optional[int] = None  # 去重后实际翻译的文本数（未去重为 None）
+    invalid_cells: Optional[list] = None  # 校验发现的问题单元格 [CellIssue]（修复前）
+    unresolved_cells: Optional[list] = None  # 修复后仍未通过校验的单元格 [CellIssue]
+    repair_calls: int = 0  # 定向重译的请求数
+    timings: Optional[Dict[str, float]] = None  # 连接各阶段耗时 ms（见 PHASES；fan-out 时为最慢的子请求）
 
     def to_dict(self) -> dict:
         return asdict(self)
@@ -84,7 +182,7 @@ class MultiTranslateResult:
         return {lang: texts[0] if texts else "" for lang, texts in self.translations.items()}
 
 
-@dataclass
+@dataclass(slots=True)
 class TranslationScore:
     """翻译评分"""
     lang_code: str
@@ -96,7 +194,7 @@ class TranslationScore:
     individual_scores: Optional[List[float]] = None  # 各条文本的分数
 
 
-@dataclass
+@dataclass(slots=True)
 class EvaluationResult:
     """评估结果"""
     source_texts: List[str]
@@ -107,12 +205,25 @@ class EvaluationResult:
     total_tokens: int
     prompt_tokens: int = 0
     completion_tokens: int = 0
+    error: Optional[str] = None
+    error_type: Optional[str] = None  # 错误类型 (rate_limited, timeout, http_error, parse_error, error)
 
     @property
     def source_text(self) -> str:
         """兼容旧接口"""
         return self.source_texts[0] if self.source_texts else ""
 
+    def scores_for(self, index: int) -> Dict[str, float]:
+        """返回第 index 条文本的各语言分数 {lang: score}"""
+        result = {}
+        for lang, score in self.scores.items():
+            if score.individual_scores is not None:
+                if index < len(score.individual_scores):
+                    result[lang] = score.individual_scores[index]
+            elif index == 0:
+                result[lang] = score.overall  # 旧格式只有单条分数
+        return result
+
 
 def _build_translate_prompt(
     texts: List[str],
@@ -120,6 +231,9 @@ def _build_translate_prompt(
     target_langs: List[str],
     glossary: Optional[str] = None,
     prompt_template: Optional[str] = None,
+    glossary_langs: Optional[List[str]] = None,
+    references: Optional[List[Tuple[str, Dict[str, str]]]] = None,
+    glossary_format: str = "table",
 ) -> Tuple[str, str, int]:
     """构建翻译提示词（业务一致格式）
 
@@ -130,6 +244,10 @@ def _build_translate_prompt(
         glossary: 术语表ID (fashion_hard, fashion_core, fashion_full, fashion_v4, ecommerce, None)
                   fashion_v4 使用智能匹配，只发送匹配到的术语
         prompt_template: 提示词模板名称或路径，None 表示使用默认
+        glossary_langs: 术语表列出的语言，默认同 target_langs；
+                        fan-out 时传入全部语言，使各子请求共享相同的 system prompt 前缀
+        references: 参考译文 [(原文, {lang: 译文}), ...]（翻译记忆中的相似文本），附在术语表之后
+        glossary_format: 术语表渲染格式 (table, tsv, lists, grouped)，见 glossary.render_glossary
 
     Returns:
         (system_prompt, user_prompt, matched_terms_count) 元组
@@ -137,11 +255,15 @@ def _build_translate_prompt(
     # 术语表部分
     glossary_section = ""
     matched_terms_count = 0
+    glossary_langs = glossary_langs or target_langs
 
     if glossary:
+        # 术语表在首次使用时才导入（导入本模块不加载术语数据）
+        from llm_translate.glossary import build_glossary_prompt, build_matched_glossary_prompt
+
         if glossary == "fashion_v4":
             # 使用智能匹配：只发送文本中出现的术语
-            glossary_content = build_matched_glossary_prompt(texts, target_langs, glossary)
+            glossary_content = build_matched_glossary_prompt(texts, glossary_langs, glossary, glossary_format)
             if glossary_content:
                 glossary_section = f"\n## 术语表\n{glossary_content}"
                 # 从内容中提取匹配数量
@@ -153,16 +275,26 @@ def _build_translate_prompt(
             # 传统方式：发送完整术语表
             glossary_section = f"""
 ## 术语表
-{build_glossary_prompt(target_langs, glossary)}
+{build_glossary_prompt(glossary_langs, glossary, glossary_format)}
 """
 
+    if references:
+        lines = [
+            f"- {source} → " + " | ".join(f"{lang}: {trans[lang]}" for lang in target_langs if trans.get(lang))
+            for source, trans in references
+        ]
+        glossary_section += (
+            "\n## 参考译文\n以下是相似商品标题的已有译文，相同的词组请保持一致的译法：\n"
+            + "\n".join(lines) + "\n"
+        )
+
     # 构建输入 JSON
     input_data = {"contents": texts, "langs": target_langs}
     input_json = json.dumps(input_data, ensure_ascii=False)
 
     # 加载模板作为 system prompt
     template_name = prompt_template or "default"
-    template = load_prompt_template(template_name, "translate")
+    _, template = split_directive(load_prompt_template(template_name, "translate"))
     system_prompt = template.format(glossary_section=glossary_section)
 
     # input_json 作为 user prompt
@@ -213,24 +345,46 @@ def _parse_json_response(content: str) -> dict:
     return json.loads(content)
 
 
-def _call_llm(
+# 连接阶段 (ms)：httpcore 在 connect_tcp 内解析域名，不单独发出 DNS 事件，connect 包含 DNS
+PHASES = ("connect_ms", "tls_ms", "send_ms", "ttfb_ms", "receive_ms")
+
+# httpcore trace 事件名（去掉 http11./http2. 前缀）-> 阶段
+_TRACE_PHASES = {
+    "connection.connect_tcp": "connect_ms",
+    "connection.start_tls": "tls_ms",
+    "send_request_headers": "send_ms",
+    "send_request_body": "send_ms",
+    "receive_response_headers": "ttfb_ms",
+    "receive_response_body": "receive_ms",
+}
+
+
+def _phase_tracer(timings: Dict[str, float]):
+    """httpx trace 扩展的回调：把 *.started / *.complete 事件对累加到 timings"""
+    started: Dict[str, float] = {}
+
+    def trace(event_name: str, info: dict) -> None:
+        name, _, stage = event_name.rpartition(".")
+        phase = _TRACE_PHASES.get(name) or _TRACE_PHASES.get(name.partition(".")[2])
+        if phase is None:
+            return
+        now = time.perf_counter()
+        if stage == "started":
+            started[name] = now
+        elif name in started:  # complete / failed
+            timings[phase] = timings.get(phase, 0.0) + (now - started.pop(name)) * 1000
+
+    return trace
+
+
+def _chat_payload(
     user_prompt: str,
     model: str,
     system_prompt: str = "",
     temperature: float = 0.3,
     max_tokens: int = 4096,
-    timeout: float = 120.0
-) -> tuple[str, dict, float]:
-    """调用 LLM API，返回 (内容, usage, 延迟ms)
-
-    Args:
-        user_prompt: 用户消息
-        model: 模型名称
-        system_prompt: 系统消息（可选）
-        temperature: 温度参数
-        max_tokens: 最大 token 数
-        timeout: 超时时间
-    """
+) -> dict:
+    """构建 /v1/chat/completions 请求体（同步调用与批处理任务共用）"""
     messages = []
     if system_prompt:
         messages.append({"role": "system", "content": system_prompt})
@@ -244,23 +398,68 @@ def _call_llm(
     # gpt-5 系列不支持 temperature 参数，只能用默认值
     if not model.startswith("gpt-5"):
         payload["temperature"] = temperature
+    return payload
+
+
+def _send_chat(
+    payload: dict,
+    timeout: float = 120.0,
+    timings: Optional[Dict[str, float]] = None,
+) -> tuple[dict, float]:
+    """发送一个 chat completions 请求体，返回 (响应 JSON, 延迟ms)；经过录制带（见 cassette 模块）
+
+    传入 timings 时记录各连接阶段耗时（回放时没有网络阶段，保持为空）。
+    """
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {API_KEY}",
     }
 
+    url = f"{API_BASE_URL}/v1/chat/completions"
+    cassette = get_cassette()
     start_time = time.perf_counter()
 
-    with httpx.Client(timeout=timeout) as client:
-        response = client.post(
-            f"{API_BASE_URL}/v1/chat/completions",
-            json=payload,
-            headers=headers,
-        )
+    if cassette is not None and cassette.mode == "replay":
+        # 回放：不访问网络，按录制的状态码/响应体重建响应（错误响应同样复现）
+        status, body, latency_ms = cassette.replay(payload)
+        response = httpx.Response(status, text=body, request=httpx.Request("POST", url))
         response.raise_for_status()
+    else:
+        with httpx.Client(timeout=timeout) as client:
+            extensions = {"trace": _phase_tracer(timings)} if timings is not None else None
+            response = client.post(url, json=payload, headers=headers, extensions=extensions)
+            if cassette is not None:
+                cassette.record(payload, response.status_code, response.text,
+                                (time.perf_counter() - start_time) * 1000)
+            response.raise_for_status()
+        latency_ms = (time.perf_counter() - start_time) * 1000
 
-    latency_ms = (time.perf_counter() - start_time) * 1000
-    data = response.json()
+    return response.json(), latency_ms
+
+
+def _call_llm(
+    user_prompt: str,
+    model: str,
+    system_prompt: str = "",
+    temperature: float = 0.3,
+    max_tokens: int = 4096,
+    timeout: float = 120.0,
+    timings: Optional[Dict[str, float]] = None,
+) -> tuple[str, dict, float]:
+    """调用 LLM API，返回 (内容, usage, 延迟ms)
+
+    Args:
+        user_prompt: 用户消息
+        model: 模型名称
+        system_prompt: 系统消息（可选）
+        temperature: 温度参数
+        max_tokens: 最大 token 数
+        timeout: 超时时间
+        timings: 输出参数，填入各连接阶段耗时 {connect_ms, tls_ms, send_ms, ttfb_ms, receive_ms}
+                 （请求失败时保留已完成的阶段）
+    """
+    payload = _chat_payload(user_prompt, model, system_prompt, temperature, max_tokens)
+    data, latency_ms = _send_chat(payload, timeout, timings)
     content = data["choices"][0]["message"]["content"].strip()
     usage = data.get("usage", {})
 
@@ -276,6 +475,11 @@ def multi_translate(
     max_tokens: int = 4096,
     glossary: Optional[str] = None,
     translate_prompt: Optional[str] = None,
+    fanout: Optional[Union[int, str]] = None,
+    dedup: bool = False,
+    references: Optional[List[Tuple[str, Dict[str, str]]]] = None,
+    repair: bool = False,
+    glossary_format: str = "table",
 ) -> MultiTranslateResult:
     """
     一次 API 调用翻译多个文本到多个语言
@@ -289,6 +493,12 @@ def multi_translate(
         max_tokens: 最大 token 数
         glossary: 术语表ID (fashion_mini, fashion_full, ecommerce, None)
         translate_prompt: 翻译提示词模板名称或路径
+        fanout: 语言拆分策略。None/1 为单次调用；整数 K 表示把目标语言拆成 K 个并行请求；
+                "auto" 根据文本长度和模型观测到的输出速度自动选择 K
+        dedup: 按 Unicode NFC 精确去重后只翻译唯一文本（大小写、空白不同视为不同文本），结果按原顺序回填
+        references: 参考译文 [(原文, {lang: 译文}), ...]，作为 few-shot 附在提示词中（见 tm 模块）
+        repair: 校验未通过的 (语言, 文本) 单元格定向重译一次（校验本身总会执行，见 validate 模块）
+        glossary_format: 术语表渲染格式 (table, tsv, lists, grouped)
 
     Returns:
         MultiTranslateResult: 翻译结果
@@ -300,34 +510,297 @@ def multi_translate(
     if target_langs is None:
         target_langs = ["de", "fr", "es", "it", "pt", "nl", "pl"]
 
+    if dedup:
+        plan = dedup_texts(texts)
+        result = multi_translate(
+            plan.unique_texts, source_lang, target_langs, model, temperature, max_tokens,
+            glossary, translate_prompt, fanout, references=references, repair=repair,
+            glossary_format=glossary_format,
+        )
+
+        def fan_back_issues(issues):
+            # 问题单元格的下标映射回所有重复位置
+            if not issues:
+                return issues
+            return [
+                CellIssue(issue.lang, i, issue.reason)
+                for issue in issues
+                for i, unique_idx in enumerate(plan.index_map) if unique_idx == issue.index
+            ]
+
+        # 内层结果可能被 single-flight 共享，回填结果写到新对象上
+        return dataclasses.replace(
+            result,
+            source_texts=list(texts),
+            translations={lang: plan.fan_back(values) for lang, values in result.translations.items()},
+            unique_texts=plan.unique,
+            invalid_cells=fan_back_issues(result.invalid_cells),
+            unresolved_cells=fan_back_issues(result.unresolved_cells),
+        )
+
+    if fanout == "auto":
+        fanout = choose_fanout(texts, target_langs, model)
+    fanout = min(int(fanout or 1), len(target_langs))
+    if fanout > 1:
+        result = _fanout_translate(
+            texts, source_lang, target_langs, model, temperature, max_tokens,
+            glossary, translate_prompt, fanout, references, glossary_format=glossary_format,
+        )
+    else:
+        result = _translate_once(
+            texts, source_lang, target_langs, model, temperature, max_tokens,
+            glossary, translate_prompt, references=references, glossary_format=glossary_format,
+        )
+    if not result.success:
+        return result
+
+    issues = validate_translations(texts, result.translations, target_langs)
+    # 单次 MultiTranslateResult 可能被 single-flight 共享，校验与修复结果都写到新对象上
+    result = dataclasses.replace(result, invalid_cells=issues, unresolved_cells=issues)
+    if issues and repair:
+        repaired = repair_translations(
+            texts, result.translations, issues, source_lang, target_langs, model,
+            temperature, max_tokens, glossary, translate_prompt, glossary_format=glossary_format,
+        )
+        result = dataclasses.replace(
+            result,
+            translations=repaired.translations,
+            latency_ms=result.latency_ms + repaired.latency_ms,
+            prompt_tokens=result.prompt_tokens + repaired.prompt_tokens,
+            completion_tokens=result.completion_tokens + repaired.completion_tokens,
+            total_tokens=result.total_tokens + repaired.total_tokens,
+            unresolved_cells=repaired.unresolved_cells,
+            repair_calls=repaired.repair_calls,
+        )
+    return result
+
+
+def repair_translations(
+    source_texts: List[str],
+    translations: Dict[str, List[str]],
+    issues: List[CellIssue],
+    source_lang: str,
+    target_langs: List[str],
+    model: str,
+    temperature: float = 0.3,
+    max_tokens: int = 4096,
+    glossary: Optional[str] = None,
+    translate_prompt: Optional[str] = None,
+    glossary_format: str = "table",
+) -> MultiTranslateResult:
+    """只重译校验未通过的单元格
+
+    问题单元格按“文本缺哪些语言”分组，每组一次请求（只含这些文本和语言），并行发出；
+    重译结果写回对应单元格后再次校验。
+
+    Returns:
+        MultiTranslateResult：translations 为修补后的完整译文，tokens/延迟仅含重译请求，
+        unresolved_cells 为仍未通过的单元格
+    """
+    n = len(source_texts)
+    # 数组对齐到原文条数：多出的截掉（整列已标记为 length），缺的补空
+    patched = {}
+    for lang in target_langs:
+        values = translations.get(lang)
+        values = list(values) if isinstance(values, list) else []
+        patched[lang] = (values + [""] * n)[:n]
+
+    langs_by_index: Dict[int, List[str]] = {}
+    for issue in issues:
+        langs_by_index.setdefault(issue.index, []).append(issue.lang)
+        metrics.record_retry("translate", model, issue.reason)
+    groups: Dict[Tuple[str, ...], List[int]] = {}
+    for index, langs in langs_by_index.items():
+        key = tuple(lang for lang in target_langs if lang in langs)
+        groups.setdefault(key, []).append(index)
+
+    def run(item):
+        langs, indices = item
+        return _translate_once(
+            [source_texts[i] for i in indices], source_lang, list(langs), model, temperature, max_tokens,
+            glossary, translate_prompt, glossary_langs=target_langs, glossary_format=glossary_format,
+        )
+
+    start_time = time.perf_counter()
+    items = list(groups.items())
+    with ThreadPoolExecutor(max_workers=max(len(items), 1)) as executor:
+        parts = list(executor.map(run, items))
+    latency_ms = (time.perf_counter() - start_time) * 1000
+
+    for (langs, indices), part in zip(items, parts):
+        if not part.success:
+            continue
+        for lang in langs:
+            values = part.translations.get(lang)
+            if not isinstance(values, list) or len(values) != len(indices):
+                continue
+            for i, value in zip(indices, values):
+                patched[lang][i] = value
+
+    unresolved = validate_translations(source_texts, patched, target_langs)
+    return MultiTranslateResult(
+        source_texts=source_texts,
+        source_lang=source_lang,
+        translations=patched,
+        model=model,
+        latency_ms=latency_ms,
+        prompt_tokens=sum(p.prompt_tokens for p in parts),
+        completion_tokens=sum(p.completion_tokens for p in parts),
+        total_tokens=sum(p.total_tokens for p in parts),
+        success=True,
+        invalid_cells=issues,
+        unresolved_cells=unresolved,
+        repair_calls=len(parts),
+    )
+
+
+def _fanout_translate(
+    texts: List[str],
+    source_lang: str,
+    target_langs: List[str],
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    glossary: Optional[str],
+    translate_prompt: Optional[str],
+    fanout: int,
+    references: Optional[List[Tuple[str, Dict[str, str]]]] = None,
+    glossary_format: str = "table",
+) -> MultiTranslateResult:
+    """把目标语言拆成 fanout 份并行请求，再合并结果"""
+    groups = _split_langs(target_langs, fanout)
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+        parts = list(executor.map(
+            lambda langs: _translate_once(
+                texts, source_lang, langs, model, temperature, max_tokens,
+                glossary, translate_prompt, glossary_langs=target_langs, references=references,
+                glossary_format=glossary_format,
+            ),
+            groups,
+        ))
+    latency_ms = (time.perf_counter() - start_time) * 1000
+
+    translations: Dict[str, List[str]] = {}
+    for part in parts:
+        translations.update(part.translations)
+    errors = [p.error for p in parts if not p.success and p.error]
+    success = all(p.success for p in parts)
+    return MultiTranslateResult(
+        source_texts=texts,
+        source_lang=source_lang,
+        translations=translations if success else {},
+        model=model,
+        latency_ms=latency_ms,
+        prompt_tokens=sum(p.prompt_tokens for p in parts),
+        completion_tokens=sum(p.completion_tokens for p in parts),
+        total_tokens=sum(p.total_tokens for p in parts),
+        success=success,
+        error="; ".join(errors) if errors else None,
+        fanout=len(groups),
+        error_type=next((p.error_type for p in parts if p.error_type), None),
+        timings=max(parts, key=lambda p: p.latency_ms).timings,
+    )
+
+
+def _translate_once(
+    texts: List[str],
+    source_lang: str,
+    target_langs: List[str],
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    glossary: Optional[str],
+    translate_prompt: Optional[str],
+    glossary_langs: Optional[List[str]] = None,
+    references: Optional[List[Tuple[str, Dict[str, str]]]] = None,
+    glossary_format: str = "table",
+) -> MultiTranslateResult:
+    """构建提示词并发起一次翻译请求"""
     system_prompt, user_prompt, matched_terms = _build_translate_prompt(
         texts, source_lang, target_langs,
         glossary=glossary,
         prompt_template=translate_prompt,
+        glossary_langs=glossary_langs,
+        references=references,
+        glossary_format=glossary_format,
     )
-    start_time = time.perf_counter()
     # 可选：记录匹配到的术语数量（用于调试）
     # if matched_terms > 0:
     #     print(f"[Glossary] Matched {matched_terms} terms")
 
-    try:
-        content, usage, latency_ms = _call_llm(
-            user_prompt=user_prompt,
-            model=model,
-            system_prompt=system_prompt,
-            temperature=temperature,
-            max_tokens=max_tokens,
-        )
-        raw_translations = _parse_json_response(content)
+    # 相同请求并发时只调用一次 API
+    key = request_key("translate", model, system_prompt, user_prompt, temperature, max_tokens)
+    return _translate_flight.do(key, lambda: _run_translate(
+        texts, source_lang, model, system_prompt, user_prompt, temperature, max_tokens,
+        target_langs=target_langs, protocol=get_translate_protocol(translate_prompt),
+    ))
+
+
+def _parse_translations(content: str) -> Dict[str, List[str]]:
+    """解析翻译响应 {"de": ["译文1", "译文2"], ...}
+
+    Raises:
+        json.JSONDecodeError: 响应不是合法 JSON
+    """
+    raw_translations = _parse_json_response(content)
+
+    # 语言代码驻留（intern），大量结果共享同一个字符串对象
+    translations = {}
+    for lang, trans_list in raw_translations.items():
+        if isinstance(trans_list, list):
+            translations[sys.intern(lang)] = trans_list
+        elif isinstance(trans_list, str):
+            translations[sys.intern(lang)] = [trans_list]  # 兼容旧格式
+    return translations
+
+
+def _parse_response(
+    content: str,
+    protocol: str,
+    target_langs: Optional[List[str]],
+    count: int,
+) -> Dict[str, list]:
+    """按响应协议解析翻译结果
+
+    Raises:
+        json.JSONDecodeError / ProtocolError: 响应不符合协议
+    """
+    if protocol == "json":
+        return _parse_translations(content)
+    translations = parse_response(protocol, content, target_langs or [], count)
+    return {sys.intern(lang): values for lang, values in translations.items()}
 
-        # 格式: {"de": ["译文1", "译文2"], "fr": ["译文1", "译文2"]}
-        translations = {}
-        for lang, trans_list in raw_translations.items():
-            if isinstance(trans_list, list):
-                translations[lang] = trans_list
-            elif isinstance(trans_list, str):
-                translations[lang] = [trans_list]  # 兼容旧格式
 
+def _run_translate(
+    texts: List[str],
+    source_lang: str,
+    model: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    max_tokens: int,
+    target_langs: Optional[List[str]] = None,
+    protocol: str = "json",
+) -> MultiTranslateResult:
+    """执行一次翻译请求并按响应协议解析结果（非 json 协议需要 target_langs）"""
+    start_time = time.perf_counter()
+    usage = {}
+    timings: Dict[str, float] = {}
+    try:
+        with metrics.track_in_flight("translate", model):
+            content, usage, latency_ms = _call_llm(
+                user_prompt=user_prompt,
+                model=model,
+                system_prompt=system_prompt,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timings=timings,
+            )
+        translations = _parse_response(content, protocol, target_langs, len(texts))
+
+        metrics.record_request("translate", model, "success", latency_ms, usage)
+        _observe_throughput(model, usage.get("completion_tokens", 0), latency_ms)
         return MultiTranslateResult(
             source_texts=texts,
             source_lang=source_lang,
@@ -338,10 +811,12 @@ def multi_translate(
             completion_tokens=usage.get("completion_tokens", 0),
             total_tokens=usage.get("total_tokens", 0),
             success=True,
+            timings=timings or None,
         )
 
-    except json.JSONDecodeError as e:
+    except (json.JSONDecodeError, ProtocolError) as e:
         latency_ms = (time.perf_counter() - start_time) * 1000
+        metrics.record_request("translate", model, "parse_error", latency_ms, usage)
         return MultiTranslateResult(
             source_texts=texts,
             source_lang=source_lang,
@@ -352,11 +827,15 @@ def multi_translate(
             completion_tokens=0,
             total_tokens=0,
             success=False,
-            error=f"JSON 解析失败: {e}",
+            error=f"{'JSON' if protocol == 'json' else protocol} 解析失败: {e}",
+            error_type="parse_error",
+            timings=timings or None,
         )
 
     except Exception as e:
         latency_ms = (time.perf_counter() - start_time) * 1000
+        error_type = metrics.classify_error(e)
+        metrics.record_request("translate", model, error_type, latency_ms, usage)
         return MultiTranslateResult(
             source_texts=texts,
             source_lang=source_lang,
@@ -367,9 +846,14 @@ def multi_translate(
             completion_tokens=0,
             total_tokens=0,
             success=False,
-            error=str(e),
+            error=str(e) or type(e).__name__,
+            error_type=error_type,
+            timings=timings or None,
         )
 
+    finally:
+        metrics.record_phases("translate", model, timings)
+
 
 def evaluate_translations(
     source_texts: List[str],
@@ -401,22 +885,38 @@ def evaluate_translations(
         source_texts, source_lang, translations,
         prompt_template=evaluate_prompt,
     )
-    start_time = time.perf_counter()
 
+    key = request_key("evaluate", evaluator_model, system_prompt, user_prompt)
+    return _evaluate_flight.do(key, lambda: _run_evaluate(
+        source_texts, evaluator_model, system_prompt, user_prompt,
+    ))
+
+
+def _run_evaluate(
+    source_texts: List[str],
+    evaluator_model: str,
+    system_prompt: str,
+    user_prompt: str,
+) -> EvaluationResult:
+    """执行一次评估请求并解析结果"""
+    start_time = time.perf_counter()
+    usage = {}
     try:
-        content, usage, latency_ms = _call_llm(
-            user_prompt=user_prompt,
-            model=evaluator_model,
-            system_prompt=system_prompt,
-            temperature=0.1,
-            max_tokens=4096,  # 多文本需要更大空间
-            timeout=300.0,    # 多文本需要更长时间
-        )
+        with metrics.track_in_flight("evaluate", evaluator_model):
+            content, usage, latency_ms = _call_llm(
+                user_prompt=user_prompt,
+                model=evaluator_model,
+                system_prompt=system_prompt,
+                temperature=0.1,
+                max_tokens=4096,  # 多文本需要更大空间
+                timeout=300.0,    # 多文本需要更长时间
+            )
         scores_data = _parse_json_response(content)
 
         # 格式: {"de": [95, 88, 92], "fr": [90, 85, 91]} -> TranslationScore
         scores = {}
         for lang_code, score_value in scores_data.items():
+            lang_code = sys.intern(lang_code)
             if isinstance(score_value, list):
                 # 计算平均分
                 avg_score = sum(score_value) / len(score_value) if score_value else 0
@@ -440,6 +940,7 @@ def evaluate_translations(
                     comments=score_value.get("comments", ""),
                 )
 
+        metrics.record_request("evaluate", evaluator_model, "success", latency_ms, usage)
         return EvaluationResult(
             source_texts=source_texts,
             model_evaluated="",
@@ -451,8 +952,10 @@ def evaluate_translations(
             completion_tokens=usage.get("completion_tokens", 0),
         )
 
-    except Exception:
+    except Exception as e:
         latency_ms = (time.perf_counter() - start_time) * 1000
+        error_type = metrics.classify_error(e)
+        metrics.record_request("evaluate", evaluator_model, error_type, latency_ms, usage)
         return EvaluationResult(
             source_texts=source_texts,
             model_evaluated="",
@@ -462,4 +965,6 @@ def evaluate_translations(
             total_tokens=0,
             prompt_tokens=0,
             completion_tokens=0,
+            error=str(e) or type(e).__name__,
+            error_type=error_type,
         )
@@ -0,0 +1,103 @@
+"""
+译文校验模块 - 确定性规则检查每个 (语言, 下标) 单元格
+
+检查项（对应 prompts/translate_default.txt 的输出格式与翻译规则 2–3）：
+- missing      缺少该语言或数组偏短
+- length       数组比原文多（可能错位，整列视为不可信）
+- empty        译文为空或不是字符串
+- placeholder  {{ xxx }} 占位符丢失或被改动
+- html         HTML 标签丢失或被改动
+- untranslated 译文与原文相同（仅对多词原文判断，避免误伤品牌名、尺码等）
+
+纯字符串处理，不调用模型；发现的问题单元格由 translator.repair_translations 定向重译。
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+from llm_translate.dedup import normalize_text
+
+_PLACEHOLDER_RE = re.compile(r"\{\{\s*([^{}]*?)\s*\}\}")
+_TAG_RE = re.compile(r"<\s*(/?)\s*([A-Za-z][\w-]*)[^<>]*?(/?)\s*>")
+_WORD_RE = re.compile(r"[^\W\d_]{2,}")
+
+# 原文至少包含这么多个单词时，才把“译文等于原文”视为未翻译
+UNTRANSLATED_MIN_WORDS = 3
+
+
+@dataclass(slots=True, frozen=True)
+class CellIssue:
+    """一个有问题的单元格"""
+    lang: str
+    index: int
+    reason: str
+
+    def __str__(self) -> str:
+        return f"{self.lang}[{self.index}]:{self.reason}"
+
+
+def placeholders(text: str) -> Counter:
+    """占位符（忽略花括号内两侧空白）"""
+    return Counter(_PLACEHOLDER_RE.findall(text))
+
+
+def html_tags(text: str) -> Counter:
+    """HTML 标签（按 开/闭 + 标签名 计数，忽略属性）"""
+    return Counter((close + name.lower() + selfclose) for close, name, selfclose in _TAG_RE.findall(text))
+
+
+def check_cell(source: str, translation) -> List[str]:
+    """检查单个译文，返回问题列表（空列表表示通过）"""
+    if not isinstance(translation, str) or not translation.strip():
+        return ["empty"]
+    reasons = []
+    if "{{" in source and placeholders(source) != placeholders(translation):
+        reasons.append("placeholder")
+    if "<" in source and html_tags(source) != html_tags(translation):
+        reasons.append("html")
+    if (len(_WORD_RE.findall(source)) >= UNTRANSLATED_MIN_WORDS
+            and normalize_text(translation) == normalize_text(source)):
+        reasons.append("untranslated")
+    return reasons
+
+
+def validate_translations(
+    source_texts: Sequence[str],
+    translations: Dict[str, list],
+    target_langs: Sequence[str],
+) -> List[CellIssue]:
+    """校验一次翻译的全部单元格
+
+    Args:
+        source_texts: 原文
+        translations: {lang: [译文, ...]}
+        target_langs: 应有的目标语言
+
+    Returns:
+        问题单元格列表（每个单元格只报告第一个问题）
+    """
+    n = len(source_texts)
+    issues = []
+    for lang in target_langs:
+        values = translations.get(lang)
+        if not isinstance(values, list):
+            issues.extend(CellIssue(lang, i, "missing") for i in range(n))
+            continue
+        if len(values) > n:
+            issues.extend(CellIssue(lang, i, "length") for i in range(n))
+            continue
+        for i, source in enumerate(source_texts):
+            if i >= len(values):
+                issues.append(CellIssue(lang, i, "missing"))
+                continue
+            reasons = check_cell(source, values[i])
+            if reasons:
+                issues.append(CellIssue(lang, i, reasons[0]))
+    return issues
+
+
+def issue_counts(issues: Sequence[CellIssue]) -> Dict[str, int]:
+    """按问题类型计数"""
+    return dict(Counter(issue.reason for issue in issues))